@@ -0,0 +1,80 @@
+"""
+Compare the old `sample.replace(b"&", b"and")` before parsing with escaping
+bare `&` while parsing: time and peak allocations per sample. The replace
+copies the whole sample, even when mactop doesn't read the tasks.
+
+    poetry run python benchmarks/bench_ampersand.py [--tasks 300]
+
+Every process name in the fake capture has a `&` in it.
+"""
+import argparse
+import io
+import time
+import tracemalloc
+
+from fake_capture import build_capture
+from mactop.metrics_source import fast_plist
+from mactop.metrics_source.framer import SampleFramer
+
+
+def replace_then_loads(sample, read_tasks):
+    data = fast_plist.loads(sample.replace(b"&", b"and"))
+    if read_tasks:
+        len(data["tasks"])
+
+
+def loads(sample, read_tasks):
+    data = fast_plist.loads(sample)
+    if read_tasks:
+        len(data["tasks"])
+
+
+def run(name, fn, samples, read_tasks, rounds):
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for sample in samples:
+            fn(sample, read_tasks)
+        cost = time.perf_counter() - start
+        best = cost if best is None else min(best, cost)
+
+    peaks = []
+    for sample in samples:
+        tracemalloc.start()
+        fn(sample, read_tasks)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    print(
+        f"{name:<28} {best / len(samples) * 1000:>8.2f} ms/sample"
+        f"  {max(peaks) / 1024:>10.1f} KiB peak/sample"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--samples", type=int, default=10)
+    parser.add_argument("--tasks", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    content = build_capture(args.samples, args.tasks)
+    content = content.replace(b"<string>process-", b"<string>AT&T process-")
+    samples = list(SampleFramer(io.BytesIO(content)))
+    size = sum(len(s) for s in samples) / len(samples)
+    print(f"{len(samples)} samples, {size / 1024:.0f} KiB/sample")
+
+    for read_tasks in (False, True):
+        suffix = " + tasks" if read_tasks else ""
+        run(
+            "replace + loads" + suffix,
+            replace_then_loads,
+            samples,
+            read_tasks,
+            args.rounds,
+        )
+        run("loads" + suffix, loads, samples, read_tasks, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Render 64 ColorBars and VStringBars at several widths, the old way (build the
+text on every render) and with the rendered-segment cache.
+
+    poetry run python benchmarks/bench_bars.py [--bars 64] [--ticks 200]
+
+Every tick, the bars get new cpu percentages (user, system, idle), with 0.1%
+precision like psutil, most of them change by a little, some not at all.
+Renders are repeated, as the screen is refreshed more often than samples.
+"""
+import argparse
+import random
+import time
+
+from rich.style import Style
+from rich.text import Text
+
+from mactop.widgets.colorbar import ColorBar, render_bar
+from mactop.widgets.vstringbar import VStringBar, render_vstring_bar
+
+COLORS = ("green", "red", "grey23")
+
+
+def legacy_color_bar(percentages, width, color_choices):
+    """ColorBar.render before the cache."""
+    _total = sum(percentages)
+    percentages = [p / _total for p in percentages]
+    units = width * 8
+    total = len(percentages)
+    segments = []
+    for index, (percent, color) in enumerate(zip(percentages, color_choices)):
+        current_units = max(units * percent, 0)
+        full_block_count = int(current_units // 8)
+        reminder_units = int(current_units % 8)
+        if reminder_units:
+            reminder_block = ColorBar.BARS[reminder_units - 1]
+        else:
+            reminder_block = ""
+        display = "".join(full_block_count * ColorBar.BARS[-1])
+        display += reminder_block
+        if index < total - 1:
+            next_color = color_choices[index + 1]
+        else:
+            next_color = color
+        segments.append((display, Style(color=color, bgcolor=next_color)))
+    return Text.assemble(*segments)
+
+
+def legacy_vstring_bar(percentages, width, color_choices):
+    """VStringBar.render before the cache."""
+    width = width - 2
+    _total = sum(percentages)
+    percentages = [p / _total for p in percentages]
+    segments = []
+    left_spaces = width
+    count = len(percentages)
+    for index, (percent, color) in enumerate(zip(percentages, color_choices)):
+        if index == count - 1:
+            segments.append((" " * left_spaces, Style(color=color)))
+            break
+        current = int(width * percent)
+        segments.append((VStringBar.BAR * current, Style(color=color)))
+        left_spaces -= current
+    content = Text.assemble(*segments)
+    return Text.assemble(("[", Style(bold=True)), content, ("]", Style(bold=True)))
+
+
+def cached_color_bar(percentages, width, color_choices):
+    """ColorBar.render with the cache."""
+    _total = sum(percentages)
+    units = width * 8
+    segment_units = tuple(int(units * (p / _total)) for p in percentages)
+    return render_bar(segment_units, color_choices)
+
+
+def cached_vstring_bar(percentages, width, color_choices):
+    """VStringBar.render with the cache."""
+    width = width - 2
+    _total = sum(percentages)
+    cells = tuple(int(width * (p / _total)) for p in percentages[:-1])
+    return render_vstring_bar(cells, width, color_choices, True)
+
+
+def build_frames(bars, ticks, seed=0):
+    rng = random.Random(seed)
+    usage = [[rng.uniform(0, 50), rng.uniform(0, 20)] for _ in range(bars)]
+    frames = []
+    for _ in range(ticks):
+        frame = []
+        for bar in usage:
+            if rng.random() < 0.7:
+                bar[0] = min(max(bar[0] + rng.gauss(0, 2), 0), 80)
+                bar[1] = min(max(bar[1] + rng.gauss(0, 1), 0), 20)
+            user, system = round(bar[0], 1), round(bar[1], 1)
+            frame.append((user, system, round(100 - user - system, 1)))
+        frames.append(frame)
+    return frames
+
+
+def run(name, render, frames, width, repeat):
+    start = time.perf_counter()
+    for frame in frames:
+        for _ in range(repeat):
+            for percentages in frame:
+                render(percentages, width, COLORS)
+    cost = time.perf_counter() - start
+    renders = len(frames) * repeat * len(frames[0])
+    print(f"  {name:<16} {cost / renders * 1e6:>8.2f} us/bar")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bars", type=int, default=64)
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=4, help="renders per tick")
+    args = parser.parse_args()
+
+    frames = build_frames(args.bars, args.ticks)
+    for width in (12, 24, 48, 96):
+        print(f"width {width}")
+        run("ColorBar", legacy_color_bar, frames, width, args.repeat)
+        run("ColorBar cached", cached_color_bar, frames, width, args.repeat)
+        run("VStringBar", legacy_vstring_bar, frames, width, args.repeat)
+        run("VStringBar cached", cached_vstring_bar, frames, width, args.repeat)
+    print(f"cache: {render_bar.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Format byte, speed, packet and frequency values, the old way (build markup,
+then parse it with Text.from_markup) and with the precompiled formatters.
+
+    poetry run python benchmarks/bench_formatting.py [--values 10000]
+
+Values are spread over all the units, like the numbers shown by the panels.
+"""
+import argparse
+import random
+import time
+
+from rich.text import Text
+
+from mactop.utils.formatting import (
+    hz_format,
+    packet_speed_fmt,
+    speed_sizeof_fmt,
+)
+
+
+def legacy_speed_sizeof_fmt(num, suffix="B"):
+    """speed_sizeof_fmt before the formatters."""
+    f = "{num:>6.1f}[b]{unit:<2}{suffix}/s[/b]"
+    for unit in ("", "Ki", "Mi", "Gi", "Ti", "Pi", "Ei", "Zi"):
+        if abs(num) < 1024.0:
+            return Text.from_markup(f.format(num=num, unit=unit, suffix=suffix))
+        num /= 1024.0
+    return Text.from_markup(f.format(num=num, unit="Yi", suffix=suffix))
+
+
+def legacy_packet_speed_fmt(num, suffix="packets/s", align=">"):
+    """packet_speed_fmt before the formatters."""
+    f = "{num:%s5.1f}[b]{unit:<1}[/b]%s" % (align, suffix)
+    for unit in ("", "k", "M"):
+        if abs(num) < 1000:
+            return Text.from_markup(f.format(num=num, unit=unit))
+        num /= 1000.0
+    return Text.from_markup(f.format(num=num, unit="B"))
+
+
+def legacy_hz_format(num, suffix="hz"):
+    """hz_format before the formatters."""
+    f = "{num:>4d}{unit:<1}{suffix}"
+    for unit in ("", "k"):
+        num = int(num)
+        if abs(num) < 1000:
+            return Text.from_markup(f.format(num=num, unit=unit, suffix=suffix))
+        num //= 1000
+    return Text.from_markup(f.format(num=num, unit="M", suffix=suffix))
+
+
+def run(name, format_values, values, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        format_values(values)
+    cost = time.perf_counter() - start
+    print(f"  {name:<8} {cost / repeat / len(values) * 1e6:>8.3f} us/value")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--values", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    values = [rng.random() * 10 ** rng.randint(0, 13) for _ in range(args.values)]
+    cases = (
+        ("speed_sizeof_fmt", legacy_speed_sizeof_fmt, speed_sizeof_fmt),
+        ("packet_speed_fmt", legacy_packet_speed_fmt, packet_speed_fmt),
+        ("hz_format", legacy_hz_format, hz_format),
+    )
+    for name, legacy, function in cases:
+        print(name)
+        run("legacy", lambda vs: [legacy(v) for v in vs], values, args.repeat)
+        run("function", lambda vs: [function(v) for v in vs], values, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Replay a `--powermetrics-fake` capture through the sample framer, compare with
+the old readline based framing.
+
+    poetry run python benchmarks/bench_framer.py [capture.plist]
+
+Without a capture file, a fake multi-megabyte capture will be generated.
+"""
+import argparse
+import io
+import time
+
+from fake_capture import build_capture
+from mactop.metrics_source.framer import SampleFramer
+
+
+def readline_framing(fd):
+    """The framing used by streaming_powermetrics before SampleFramer."""
+    samples = 0
+    copied = 0
+    read_content = b""
+    while True:
+        line = fd.readline()
+        if not line:
+            break
+        read_content += line
+        copied += len(read_content)
+        if b"</plist>" in line:
+            samples += 1
+            read_content = b""
+            fd.read(1)
+    return samples, copied
+
+
+def framer_framing(fd):
+    framer = SampleFramer(fd)
+    for _ in framer:
+        pass
+    return framer.samples, framer.bytes_copied
+
+
+def run(name, fn, content, rounds):
+    best = None
+    for _ in range(rounds):
+        fd = io.BufferedReader(io.BytesIO(content))
+        start = time.perf_counter()
+        samples, copied = fn(fd)
+        cost = time.perf_counter() - start
+        best = cost if best is None else min(best, cost)
+
+    print(
+        f"{name:<10} {samples:>5} samples  {samples / best:>10.1f} samples/s"
+        f"  {copied / samples / 1024:>10.1f} KiB copied/sample"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("capture", nargs="?")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.capture:
+        with open(args.capture, "rb") as f:
+            content = f.read()
+    else:
+        content = build_capture()
+    print(f"capture size: {len(content) / 1024 / 1024:.1f} MiB")
+
+    run("readline", readline_framing, content, args.rounds)
+    run("framer", framer_framing, content, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Report the import time of mactop, like `python -X importtime`, to catch
+modules that make `mactop --version` or starting slower.
+
+    poetry run python benchmarks/bench_import.py [--runs 5] [--max-ms 250]
+
+Every run is a new process. With `--max-ms`, exit 1 if importing mactop.main
+takes longer (median), or if it imports textual.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+THEME = "mactop/themes/mactop.xml"
+
+
+def importtime(code):
+    """
+    Run `code` with -X importtime, return {module: (self us, cumulative us)}.
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stderr
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            # the header
+            continue
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def median_ms(runs, module):
+    return statistics.median(run[module][1] for run in runs) / 1000
+
+
+def heaviest(runs, count):
+    """
+    The top level packages taking most of the time, by their modules' own time.
+    """
+    packages = {}
+    for run in runs:
+        for name, (self_us, _) in run.items():
+            package = name.split(".")[0]
+            packages[package] = packages.get(package, 0) + self_us / len(runs)
+    return sorted(packages.items(), key=lambda item: -item[1])[:count]
+
+
+def wall_time(args, runs):
+    costs = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], check=True, capture_output=True)
+        costs.append(time.perf_counter() - start)
+    return statistics.median(costs) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None)
+    parser.add_argument("--theme", default=THEME)
+    args = parser.parse_args()
+
+    runs = [importtime("import mactop.main") for _ in range(args.runs)]
+    main_ms = median_ms(runs, "mactop.main")
+    print(f"import mactop.main: {main_ms:.1f} ms (median of {args.runs})")
+    for package, self_us in heaviest(runs, 8):
+        print(f"  {package:<24} {self_us / 1000:>7.1f} ms")
+    imports_textual = "textual" in runs[0]
+
+    version_ms = wall_time(
+        ["-c", "from mactop.main import main; main(['--version'])"], args.runs
+    )
+    print(f"mactop --version: {version_ms:.1f} ms wall, with the interpreter")
+
+    # panels are imported by importlib, which -X importtime doesn't show
+    code = (
+        "import sys, time; start = time.perf_counter();"
+        "from mactop.layout_loader import XmlLayoutLoader;"
+        f"XmlLayoutLoader({args.theme!r}, 1).load();"
+        "print(time.perf_counter() - start,"
+        " len([m for m in sys.modules if m.startswith('mactop.panels.')]),"
+        " len(sys.modules))"
+    )
+    theme_runs = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, "-c", code], check=True, capture_output=True, text=True
+        ).stdout
+        theme_runs.append(output.split())
+    load_ms = statistics.median(float(run[0]) for run in theme_runs) * 1000
+    _, panels, modules = theme_runs[0]
+    print(
+        f"import and load {args.theme}: {load_ms:.1f} ms,"
+        f" {panels} panel modules, {modules} modules imported"
+    )
+
+    if imports_textual:
+        print("FAIL: import mactop.main imports textual")
+        sys.exit(1)
+    if args.max_ms is not None and main_ms > args.max_ms:
+        print(f"FAIL: import mactop.main takes more than {args.max_ms} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
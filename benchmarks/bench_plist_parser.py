@@ -0,0 +1,91 @@
+"""
+Compare plistlib with fast_plist on powermetrics samples: parse time and peak
+allocations per sample, the fast parser is measured with and without reading
+the lazy tasks.
+
+    poetry run python benchmarks/bench_plist_parser.py [capture.plist | session.mactop]
+
+Takes a `--powermetrics-fake` capture or a `--record` file, without any, a
+fake capture will be generated.
+"""
+import argparse
+import io
+import plistlib
+import time
+import tracemalloc
+
+from fake_capture import build_capture
+from mactop.metrics_source import fast_plist
+from mactop.metrics_source.framer import SampleFramer
+from mactop.metrics_source.recorder import MAGIC, read_frames
+from mactop.metrics_store import MetricsSource
+
+
+def load_samples(path):
+    if path is None:
+        content = build_capture()
+    else:
+        with open(path, "rb") as f:
+            content = f.read()
+
+    if content.startswith(MAGIC):
+        frames = read_frames(io.BytesIO(content))
+        samples = [p for s, _, p in frames if s is MetricsSource.POWERMETRICS]
+    else:
+        samples = list(SampleFramer(io.BytesIO(content)))
+    return samples
+
+
+def plistlib_parse(sample):
+    plistlib.loads(sample)
+
+
+def fast_parse(sample):
+    fast_plist.loads(sample)
+
+
+def fast_parse_read_tasks(sample):
+    data = fast_plist.loads(sample)
+    if (tasks := data.get("tasks")) is not None:
+        len(tasks)
+
+
+def run(name, fn, samples, rounds):
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for sample in samples:
+            fn(sample)
+        cost = time.perf_counter() - start
+        best = cost if best is None else min(best, cost)
+
+    peaks = []
+    for sample in samples:
+        tracemalloc.start()
+        fn(sample)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    print(
+        f"{name:<22} {best / len(samples) * 1000:>8.2f} ms/sample"
+        f"  {max(peaks) / 1024:>10.1f} KiB peak/sample"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("samples", nargs="?")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    samples = load_samples(args.samples)
+    size = sum(len(s) for s in samples) / len(samples)
+    print(f"{len(samples)} samples, {size / 1024:.0f} KiB/sample")
+
+    run("plistlib", plistlib_parse, samples, args.rounds)
+    run("fast_plist", fast_parse, samples, args.rounds)
+    run("fast_plist + tasks", fast_parse_read_tasks, samples, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
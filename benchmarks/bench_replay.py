@@ -0,0 +1,57 @@
+"""
+Replay a record file (made by `mactop --record`) at max speed through the
+whole parse and publish pipeline.
+
+    poetry run python benchmarks/bench_replay.py [session.mactop]
+
+Without a record file, one will be generated from a fake powermetrics capture.
+"""
+import argparse
+import io
+import time
+
+from fake_capture import build_capture
+from mactop.metrics_source.framer import SampleFramer
+from mactop.metrics_source.recorder import Recorder, replay
+from mactop.metrics_store import MetricsSource
+
+
+def build_record(path):
+    content = build_capture()
+    recorder = Recorder(path)
+    for index, sample in enumerate(SampleFramer(io.BytesIO(content))):
+        recorder.write(MetricsSource.POWERMETRICS, sample, timestamp=float(index))
+    recorder.close()
+    print(
+        f"record: {recorder.frames} frames, {len(content) / 1024 / 1024:.1f} MiB"
+        f" of plist, {recorder.bytes_written / 1024 / 1024:.2f} MiB recorded"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("record", nargs="?")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    path = args.record
+    if path is None:
+        path = "/tmp/mactop_bench_replay.mactop"
+        open(path, "wb").close()
+        build_record(path)
+
+    with open(path, "rb") as f:
+        content = f.read()
+
+    best = None
+    for _ in range(args.rounds):
+        start = time.perf_counter()
+        samples = replay(io.BytesIO(content), 1.0, speed=0)
+        cost = time.perf_counter() - start
+        best = cost if best is None else min(best, cost)
+
+    print(f"replay     {samples:>5} samples  {samples / best:>10.1f} samples/s")
+
+
+if __name__ == "__main__":
+    main()
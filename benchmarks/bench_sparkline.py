@@ -0,0 +1,82 @@
+"""
+Render 20 reversed sparklines 200 columns wide, the old way (min, max and all
+the buckets recomputed on every render) and with the incremental buckets.
+
+    poetry run python benchmarks/bench_sparkline.py [--sparklines 20] [--width 200]
+
+Every tick, every history gets one new sample and is published as a snapshot,
+then all the sparklines are rendered, once per tick like the panels do.
+"""
+import argparse
+import random
+import time
+
+from rich.color import Color
+from rich.console import Console
+from rich.segment import Segments
+
+from mactop.metrics_store import RingBuffer
+from mactop.widgets.labeled_sparkline import ReversedSparklineRenderable
+from mactop.widgets.sparkline_buckets import SparklineBuckets, level_style
+
+MIN_COLOR = Color.from_rgb(128, 96, 0)
+MAX_COLOR = Color.from_rgb(255, 192, 0)
+
+
+def legacy_render(console, history, state, width):
+    renderable = ReversedSparklineRenderable(
+        history.view(),
+        width=width,
+        min_color=MIN_COLOR,
+        max_color=MAX_COLOR,
+        summary_function=max,
+    )
+    return list(console.render(renderable))
+
+
+def buckets_render(console, history, state, width):
+    buckets = state.get(id(history.buffer))
+    if buckets is None:
+        buckets = state[id(history.buffer)] = SparklineBuckets(width, history.capacity)
+    buckets.update(history)
+    segments = buckets.segments(ReversedSparklineRenderable.BARS, MIN_COLOR, MAX_COLOR)
+    return list(console.render(Segments(segments)))
+
+
+def run(name, render, sparklines, capacity, width, ticks, seed=0):
+    rng = random.Random(seed)
+    console = Console(width=width, file=open("/dev/null", "w"))
+    histories = [RingBuffer(capacity) for _ in range(sparklines)]
+    values = [rng.uniform(0, 100) for _ in range(sparklines)]
+    for history, value in zip(histories, values):
+        for _ in range(capacity):
+            history.append(value)
+    state = {}
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        for i, history in enumerate(histories):
+            values[i] = min(max(values[i] + rng.gauss(0, 5), 0), 100)
+            history.append(round(values[i], 1))
+            # the panels render what the collector published
+            render(console, history.snapshot(), state, width)
+    cost = time.perf_counter() - start
+    print(f"  {name:<8} {cost / ticks * 1000:>8.3f} ms/tick")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sparklines", type=int, default=20)
+    parser.add_argument("--width", type=int, default=200)
+    parser.add_argument("--ticks", type=int, default=300)
+    args = parser.parse_args()
+
+    for capacity in (100, 1000, 10000):
+        print(f"{args.sparklines} sparklines, width {args.width}, history {capacity}")
+        for name, render in (("legacy", legacy_render), ("buckets", buckets_render)):
+            run(name, render, args.sparklines, capacity, args.width, args.ticks)
+    print(f"styles: {level_style.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Time starting mactop with a theme, without the compile caches, with an empty
+cache (cold) and with the cache of the last start (warm). Every start is a
+new process, the app runs headless until its first screen is ready.
+
+    poetry run python benchmarks/bench_startup.py [--theme mactop/themes/mactop.xml] [--runs 5]
+
+The time counted is loading the theme and starting the app, not importing
+the modules.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+def start_once(theme, cache_dir):
+    """Run in the child process, print the timings as json."""
+    from textual.css.stylesheet import Stylesheet
+
+    from mactop.compile_cache import FileCache, RulesCache
+    from mactop.layout_loader import XmlLayoutLoader
+    from mactop.app import MactopApp
+
+    parse_time = 0.0
+    parse = Stylesheet.parse
+
+    def timed_parse(self):
+        nonlocal parse_time
+        start = time.perf_counter()
+        try:
+            parse(self)
+        finally:
+            parse_time += time.perf_counter() - start
+
+    Stylesheet.parse = timed_parse
+
+    layout_cache = rules_cache = None
+    if cache_dir:
+        layout_cache = FileCache(cache_dir, "layout")
+        rules_cache = RulesCache(FileCache(cache_dir, "css", max_files=2))
+
+    async def run():
+        start = time.perf_counter()
+        loader = XmlLayoutLoader(theme, 1.0, cache=layout_cache)
+        items, css = loader.load()
+        loaded = time.perf_counter()
+        MactopApp.CSS = css
+        app = MactopApp(items, threading.Event(), 1.0, rules_cache=rules_cache)
+        async with app.run_test(size=(160, 50)) as pilot:
+            await pilot.pause()
+            ready = time.perf_counter()
+        if rules_cache is not None:
+            rules_cache.save()
+        return loaded - start, ready - start
+
+    load_time, ready_time = asyncio.run(run())
+    print(json.dumps({"load": load_time, "css": parse_time, "ready": ready_time}))
+
+
+def spawn(theme, cache_dir):
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", "--theme", theme, "--cache", cache_dir],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def report(name, results):
+    line = f"{name:<8}"
+    for key in ("load", "css", "ready"):
+        median = statistics.median(result[key] for result in results)
+        line += f"  {key} {median * 1000:>7.1f} ms"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--theme", default="mactop/themes/mactop.xml")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--cache", default="", help=argparse.SUPPRESS)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        start_once(args.theme, args.cache)
+        return
+
+    print(f"{args.theme}, median of {args.runs} starts")
+    report("no cache", [spawn(args.theme, "") for _ in range(args.runs)])
+    cold = []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cold.append(spawn(args.theme, cache_dir))
+    report("cold", cold)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        spawn(args.theme, cache_dir)
+        report("warm", [spawn(args.theme, cache_dir) for _ in range(args.runs)])
+        print(f"cache: {sorted(os.listdir(cache_dir))}")
+
+
+if __name__ == "__main__":
+    main()
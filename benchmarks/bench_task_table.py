@@ -0,0 +1,141 @@
+"""
+Update a TaskTable of 1000 tasks, the old way (update every cell, remove the
+gone rows one by one) and with the keyed diff. Runs in a headless app.
+
+    poetry run python benchmarks/bench_task_table.py [--tasks 1000] [--ticks 30]
+
+Every tick, some tasks exit and new ones start, the others change some of
+their values.
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from textual.app import App
+
+from mactop.panels.tasks import TaskTable, diff_tasks
+
+
+def build_ticks(task_count, ticks, churn, changing, seed=0):
+    rng = random.Random(seed)
+    next_pid = 100
+    tasks = {}
+    for _ in range(task_count):
+        tasks[next_pid] = {
+            "pid": next_pid,
+            "name": f"process-{next_pid}",
+            "energy_impact": 0.0,
+            "energy_delta": 0.0,
+            "cpu_ms_per_s": 0.0,
+            "cputime_ns": 0,
+            "trend": "",
+        }
+        next_pid += 1
+
+    result = []
+    for _ in range(ticks):
+        for pid in rng.sample(sorted(tasks), int(task_count * churn)):
+            del tasks[pid]
+            tasks[next_pid] = {
+                "pid": next_pid,
+                "name": f"process-{next_pid}",
+                "energy_impact": 0.0,
+                "energy_delta": 0.0,
+                "cpu_ms_per_s": 0.0,
+                "cputime_ns": 0,
+                "trend": "",
+            }
+            next_pid += 1
+        for pid in rng.sample(sorted(tasks), int(task_count * changing)):
+            task = dict(tasks[pid])
+            energy = round(rng.random() * 10, 2)
+            task["energy_delta"] = round(energy - task["energy_impact"], 2)
+            task["energy_impact"] = energy
+            task["cputime_ns"] = rng.randrange(1000000)
+            task["cpu_ms_per_s"] = round(task["cputime_ns"] / 1e6, 1)
+            tasks[pid] = task
+        result.append(list(tasks.values()))
+    return result
+
+
+def legacy_update(table, tasks):
+    """watch_tasks before the keyed diff."""
+    existing_keys = set(table.rows.keys())
+    cells = 0
+    for task in tasks:
+        row_key = str(task["pid"])
+        if row_key not in existing_keys:
+            table.add_row(*[task[key] for key in table.show_columns], key=row_key)
+        else:
+            for col in table.show_columns:
+                table.update_cell(row_key, col, task[col])
+                cells += 1
+    new_keys = set(str(t["pid"]) for t in tasks)
+    for key in existing_keys:
+        if key not in new_keys:
+            table.remove_row(key)
+    return cells
+
+
+def diff_update(table, tasks):
+    """watch_tasks, returns the cells updated."""
+    rows = [tuple(task[col] for col in table.show_columns) for task in tasks]
+    diff, table.shown = diff_tasks(table.shown, rows, table.show_columns)
+    table.apply_diff(diff)
+    return len(diff.changed)
+
+
+class BenchApp(App):
+    def __init__(self, ticks, update):
+        super().__init__()
+        self.ticks = ticks
+        self.update = update
+        self.costs = []
+        self.cells = 0
+
+    def compose(self):
+        yield TaskTable(refresh_interval=3600)
+
+    async def run_ticks(self, pilot):
+        table = self.query_one(TaskTable)
+        # the first tick fills the table
+        self.update(table, self.ticks[0])
+        await pilot.pause()
+        for tasks in self.ticks[1:]:
+            start = time.perf_counter()
+            cells = self.update(table, tasks)
+            self.costs.append(time.perf_counter() - start)
+            self.cells += cells
+            await pilot.pause()
+        assert table.row_count == len(self.ticks[-1])
+
+
+async def run(name, update, ticks):
+    app = BenchApp(ticks, update)
+    async with app.run_test(size=(120, 40)) as pilot:
+        await app.run_ticks(pilot)
+    costs = sorted(app.costs)
+    print(
+        f"{name:<8} {costs[len(costs) // 2] * 1000:>8.2f} ms/tick median"
+        f"  p95 {costs[int(len(costs) * 0.95)] * 1000:>8.2f} ms"
+        f"  {app.cells / len(costs):>8.0f} cells updated/tick"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--ticks", type=int, default=30)
+    parser.add_argument("--churn", type=float, default=0.02)
+    parser.add_argument("--changing", type=float, default=0.2)
+    args = parser.parse_args()
+
+    ticks = build_ticks(args.tasks, args.ticks, args.churn, args.changing)
+    print(f"{args.tasks} tasks, {args.ticks} ticks")
+    asyncio.run(run("legacy", legacy_update, ticks))
+    asyncio.run(run("diff", diff_update, ticks))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Build fake powermetrics captures (the same format as `--powermetrics-fake`
+expects) for benchmarks.
+
+    poetry run python benchmarks/fake_capture.py capture.plist --samples 10 --tasks 300
+"""
+import argparse
+import plistlib
+import random
+
+
+def build_sample(index, task_count, rng):
+    tasks = []
+    for pid in range(task_count):
+        tasks.append(
+            {
+                "pid": pid + 100,
+                "name": f"process-{pid}",
+                "started_abstime_ns": 1000000 + pid,
+                "interval_ns": 1000000000,
+                "cputime_ns": rng.randint(0, 10**9),
+                "cputime_ms_per_s": rng.random() * 100,
+                "cputime_sample_ms_per_s": rng.random() * 100,
+                "cputime_userland_ratio": rng.random(),
+                "intr_wakeups": rng.randint(0, 100),
+                "idle_wakeups": rng.randint(0, 100),
+                "timer_wakeups": [
+                    {"interval_ns": 2000000, "wakeups": rng.randint(0, 10)},
+                    {"interval_ns": 5000000, "wakeups": rng.randint(0, 10)},
+                ],
+                "diskio_bytesread": rng.randint(0, 10**6),
+                "diskio_byteswritten": rng.randint(0, 10**6),
+                "packets_received": rng.randint(0, 1000),
+                "packets_sent": rng.randint(0, 1000),
+                "bytes_received": rng.randint(0, 10**6),
+                "bytes_sent": rng.randint(0, 10**6),
+                "energy_impact": rng.random() * 50,
+                "energy_impact_per_s": rng.random() * 50,
+            }
+        )
+
+    cpus = [
+        {"cpu": i, "freq_hz": 2.6e9, "freq_ratio": rng.random()} for i in range(16)
+    ]
+    return {
+        "is_delta": True,
+        "elapsed_ns": 1000000000,
+        "hw_model": "MacBookPro16,1",
+        "kern_osversion": "22G91",
+        "timestamp": f"2023-12-06 16:34:{index % 60:02d}",
+        "backlight": {"value": rng.randint(0, 100)},
+        "tasks": tasks,
+        "network": {
+            "ibyte_rate": rng.random() * 10**6,
+            "obyte_rate": rng.random() * 10**6,
+            "ipacket_rate": rng.random() * 1000,
+            "opacket_rate": rng.random() * 1000,
+        },
+        "disk": {
+            "rbytes_per_s": rng.random() * 10**6,
+            "wbytes_per_s": rng.random() * 10**6,
+            "rops_per_s": rng.random() * 100,
+            "wops_per_s": rng.random() * 100,
+        },
+        "processor": {
+            "package_watts": rng.random() * 40,
+            "packages": [
+                {
+                    "c_state_ratio": rng.random(),
+                    "cores": [
+                        {
+                            "core": core,
+                            "c_state_ratio": rng.random(),
+                            "cpus": cpus[core * 2 : core * 2 + 2],
+                        }
+                        for core in range(8)
+                    ],
+                }
+            ],
+        },
+        "smc": {
+            "cpu_die": rng.random() * 100,
+            "gpu_die": rng.random() * 100,
+            "fan": rng.random() * 5000,
+        },
+    }
+
+
+def build_capture(samples=10, tasks=300, seed=0):
+    rng = random.Random(seed)
+    chunks = []
+    for index in range(samples):
+        chunks.append(plistlib.dumps(build_sample(index, tasks, rng)))
+        chunks.append(b"\x00")
+    return b"".join(chunks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("output")
+    parser.add_argument("--samples", type=int, default=10)
+    parser.add_argument("--tasks", type=int, default=300)
+    args = parser.parse_args()
+
+    content = build_capture(args.samples, args.tasks)
+    with open(args.output, "wb") as f:
+        f.write(content)
+    print(f"{args.output}: {args.samples} samples, {len(content)} bytes")
+
+
+if __name__ == "__main__":
+    main()
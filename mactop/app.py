@@ -0,0 +1,180 @@
+"""
+The textual app of mactop, imported only when the app is run.
+"""
+import inspect
+import logging
+import time
+
+from textual.app import App, ComposeResult
+from textual.binding import Binding
+from textual.css.model import RuleSet
+from textual.css.stylesheet import Stylesheet
+from textual.widgets import Footer
+
+from mactop import __version__
+from mactop.compile_cache import RulesCache, cache_key
+from mactop.scheduler import RefreshScheduler, SampleReady
+from mactop.widgets.header import MactopHeader
+
+logger = logging.getLogger(__name__)
+
+# Stylesheet._parse_rules is private, CachedStylesheet is only used when it
+# has the signature it overrides, otherwise textual parses all the CSS
+PARSE_RULES_PARAMETERS = ["self", "css", "path", "is_default_rules", "tie_breaker"]
+CACHEABLE_STYLESHEET = (
+    list(inspect.signature(Stylesheet._parse_rules).parameters)
+    == PARSE_RULES_PARAMETERS
+)
+
+
+def valid_rules(rules):
+    return isinstance(rules, list) and all(isinstance(r, RuleSet) for r in rules)
+
+
+class CachedStylesheet(Stylesheet):
+    """
+    Stylesheet which takes the parsed rules of a CSS source from
+    `rules_cache`. Only valid rules are cached, invalid CSS is parsed (and
+    its errors reported) every time.
+
+    The cache is keyed by the versions of mactop and textual too, see
+    `cache_key`, cached values which are not rules are parsed again.
+    """
+
+    def __init__(self, *, rules_cache: RulesCache, variables=None) -> None:
+        super().__init__(variables=variables)
+        self.rules_cache = rules_cache
+        self._variables_key = None
+
+    def set_variables(self, variables) -> None:
+        super().set_variables(variables)
+        self._variables_key = None
+
+    def _parse_rules(self, css, path, is_default_rules=False, tie_breaker=0):
+        if self._variables_key is None:
+            self._variables_key = repr(sorted(self._variables.items()))
+        key = cache_key(
+            css,
+            str(path),
+            repr((is_default_rules, tie_breaker)),
+            self._variables_key,
+        )
+        rules = self.rules_cache.get(key)
+        if not valid_rules(rules):
+            rules = super()._parse_rules(css, path, is_default_rules, tie_breaker)
+            if not any(rule.errors for rule in rules):
+                self.rules_cache.put(key, rules)
+        return list(rules)
+
+    def copy(self) -> Stylesheet:
+        stylesheet = CachedStylesheet(
+            rules_cache=self.rules_cache, variables=self._variables.copy()
+        )
+        stylesheet.source = self.source.copy()
+        return stylesheet
+
+
+class MactopApp(App):
+    BINDINGS = [
+        Binding("ctrl+c,q", "exit", "Exit", show=True, priority=True, key_display="Q"),
+    ]
+
+    def __init__(
+        self,
+        app_body_items,
+        user_exited_event,
+        refresh_interval,
+        push=False,
+        rules_cache=None,
+        *args,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        if rules_cache is not None and CACHEABLE_STYLESHEET:
+            self.stylesheet = CachedStylesheet(
+                rules_cache=rules_cache, variables=self.get_css_variables()
+            )
+        self.app_body_items = app_body_items
+        self.user_exited_event = user_exited_event
+        self.refresh_scheduler = RefreshScheduler(self, refresh_interval, push=push)
+
+    def on_mount(self) -> None:
+        self.title = "mactop"
+        self.sub_title = f"v{__version__}"
+        self.refresh_scheduler.start()
+
+    def on_unmount(self) -> None:
+        self.refresh_scheduler.stop()
+
+    def on_sample_ready(self, message: SampleReady) -> None:
+        self.refresh_scheduler.handle_sample_ready()
+
+    def compose(self) -> ComposeResult:
+        """Create child widgets for the app."""
+        yield MactopHeader(show_clock=True)
+        yield Footer()
+
+        for item in self.app_body_items:
+            yield item
+
+    def css_source_path(self):
+        """
+        The path of the app CSS in the stylesheet, the same as textual's.
+        """
+        try:
+            return f"{inspect.getfile(self.__class__)}:{self.__class__.__name__}"
+        except (TypeError, OSError):
+            return f"{self.__class__.__name__}"
+
+    def update_css(self, css) -> None:
+        """
+        Replace the CSS of the theme, the old CSS is kept if the new one is
+        invalid.
+        """
+        stylesheet = self.stylesheet
+        path = self.css_source_path()
+        old_source = stylesheet.source.get(path)
+        stylesheet.add_source(css, path=path, is_default_css=False)
+        try:
+            stylesheet.parse()
+        except Exception:
+            if old_source is None:
+                del stylesheet.source[path]
+            else:
+                stylesheet.source[path] = old_source
+            raise
+        self.CSS = css
+        stylesheet.update(self)
+
+    async def reload_theme(self, layout_loader, nodes, css) -> None:
+        """
+        Apply the changed theme in place, the panels not changed keep their
+        state, see XmlLayoutLoader.swap_layout.
+        """
+        start = time.perf_counter()
+        if css != self.CSS:
+            try:
+                self.update_css(css)
+            except Exception as error:
+                logger.error("Invalid CSS in the theme, not applied: %s", error)
+
+        stats = {"kept": 0, "created": 0, "removed": 0}
+        removed = layout_loader.swap_layout(self.screen, nodes, stats)
+        for widget in removed:
+            await widget.remove()
+        self.screen.refresh(layout=True)
+        logger.info(
+            "Theme reloaded in %.1fms, panels kept: %d, created: %d, removed: %d",
+            (time.perf_counter() - start) * 1000,
+            stats["kept"],
+            stats["created"],
+            stats["removed"],
+        )
+
+    def action_toggle_dark(self) -> None:
+        """An action to toggle dark mode."""
+        self.dark = not self.dark
+
+    def action_exit(self) -> None:
+        self.user_exited_event.set()
+        self.exit()
@@ -0,0 +1,156 @@
+"""
+Caches of what mactop compiles on every start: the layout of the theme, see
+XmlLayoutLoader.compile, and the CSS rules parsed by textual.
+
+Textual parses the CSS of the app and of every widget class again each time
+a new widget class is mounted, so the same CSS is parsed tens of times on
+start. mactop.app.CachedStylesheet parses every source once, and keeps the
+rules in CACHE_LOCATION for the next start. Everything is keyed by sha256 of what it
+is built from, a changed theme or CSS is never read from the cache.
+"""
+from functools import lru_cache
+import hashlib
+import logging
+import os
+from pathlib import Path
+import pickle
+import tempfile
+
+from mactop import __version__
+
+logger = logging.getLogger(__name__)
+
+CACHE_LOCATION = Path("~/.config/mactop/cache").expanduser()
+# bump when the format of the cached values changes
+CACHE_FORMAT = 1
+MAX_CACHED_LAYOUTS = 16
+
+
+@lru_cache(maxsize=None)
+def compiler_version() -> str:
+    # textual is slow to import, only when a cache is used
+    from textual import __version__ as textual_version
+
+    return f"{CACHE_FORMAT}:{__version__}:{textual_version}"
+
+
+def cache_key(*parts) -> str:
+    """
+    sha256 of the parts (str or bytes), and of the versions of mactop and
+    textual, which decide how they are compiled.
+    """
+    digest = hashlib.sha256(compiler_version().encode())
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode()
+        digest.update(len(part).to_bytes(8, "little"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class FileCache:
+    """
+    Pickled values in `directory`, one file for each key, at most
+    `max_files` of them, the least recently used are removed.
+
+    The cache only makes starting faster, errors of reading or writing it
+    are logged and then ignored.
+    """
+
+    def __init__(self, directory, prefix, max_files=MAX_CACHED_LAYOUTS) -> None:
+        self.directory = Path(directory)
+        self.prefix = prefix
+        self.max_files = max_files
+
+    def path(self, key) -> Path:
+        return self.directory / f"{self.prefix}-{key}.pickle"
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.warning("Can not read cache %s, ignored", path, exc_info=True)
+            return None
+        logger.debug("cache hit: %s", path)
+        return value
+
+    def put(self, key, value) -> None:
+        path = self.path(key)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "wb", dir=self.directory, prefix=f".{self.prefix}-", delete=False
+            ) as f:
+                try:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                except BaseException:
+                    os.unlink(f.name)
+                    raise
+            os.replace(f.name, path)
+        except Exception:
+            logger.warning("Can not write cache %s, ignored", path, exc_info=True)
+            return
+        logger.debug("cache written: %s", path)
+        self.prune()
+
+    def prune(self) -> None:
+        files = []
+        for path in self.directory.glob(f"{self.prefix}-*.pickle"):
+            try:
+                files.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                pass
+        files.sort(reverse=True)
+        for _, path in files[self.max_files :]:
+            logger.debug("cache removed: %s", path)
+            path.unlink(missing_ok=True)
+
+
+class RulesCache:
+    """
+    Parsed CSS rules, by `cache_key` of the CSS source and the CSS variables.
+
+    All the rules are in one file, read on the first `get`, and written by
+    `save` with only the rules used since, rules of the old themes are not
+    kept.
+    """
+
+    def __init__(self, cache: FileCache) -> None:
+        self.cache = cache
+        self.rules = None
+        self.used = set()
+        self.added = False
+
+    def load(self):
+        if self.rules is None:
+            rules = self.cache.get(cache_key())
+            self.rules = rules if isinstance(rules, dict) else {}
+        return self.rules
+
+    def get(self, key):
+        rules = self.load().get(key)
+        if rules is not None:
+            self.used.add(key)
+        return rules
+
+    def put(self, key, rules) -> None:
+        self.load()[key] = rules
+        self.used.add(key)
+        self.added = True
+
+    def save(self) -> None:
+        rules = self.load()
+        if not self.added and self.used == rules.keys():
+            return
+        self.rules = {key: rules[key] for key in self.used}
+        self.cache.put(cache_key(), self.rules)
+        self.added = False
+
+
+layout_cache = FileCache(CACHE_LOCATION, "layout")
+css_rules_cache = RulesCache(FileCache(CACHE_LOCATION, "css", max_files=2))
@@ -1,26 +1,59 @@
 import logging
-from pathlib import Path
 import xml.etree.ElementTree as ET
 
+from mactop.compile_cache import cache_key
 from mactop.layouts import LAYOUTS
 from mactop.panels import PANELS
 
-
 logger = logging.getLogger(__name__)
 
-CACHE_LOCATION = Path("~/.config/mactop/cache").expanduser()
+
+def is_after(container, widget, previous):
+    children = container.children
+    index = children.index(previous) + 1
+    return index < len(children) and children[index] is widget
 
 
 class XmlLayoutLoader:
+    """
+    Loads the panels and the CSS of a theme file.
+
+    The XML is compiled to layout nodes, `(tag, is_panel, kwargs, children)`,
+    which are kept in `cache` (a FileCache) by the sha256 of the theme, so
+    the theme is parsed again only when it changes.
+    """
+
     COMMON_ATTRS = ("id", "class", "name")
 
-    def __init__(self, location, refresh_interval) -> None:
+    def __init__(self, location, refresh_interval, cache=None) -> None:
         self.file_location = location
         self.refresh_interval = refresh_interval
+        self.cache = cache
 
     def load(self):
-        tree = ET.parse(self.file_location)
-        root = tree.getroot()
+        nodes, css = self.compile()
+        return self.build_widgets(nodes), css
+
+    def compile(self, content=None):
+        """
+        Return the layout nodes and the CSS of the theme, `content` is the
+        theme file read already.
+        """
+        if content is None:
+            with open(self.file_location, "rb") as f:
+                content = f.read()
+
+        key = cache_key(content)
+        if self.cache is not None and (compiled := self.cache.get(key)):
+            return compiled
+
+        compiled = self.compile_xml(content)
+        if self.cache is not None:
+            self.cache.put(key, compiled)
+        return compiled
+
+    def compile_xml(self, content):
+        root = ET.fromstring(content)
 
         css = ""
         style = root.find("style")
@@ -29,39 +62,73 @@ class XmlLayoutLoader:
             css = style.text
 
         layout = root.find("layout")
-        app_body_items = self.compose_body(layout)
-
-        return app_body_items, css
-
-    def compose_body(self, layout):
-        widgets = []
+        return self.compile_nodes(layout), css
+
+    def powermetrics_keys(self):
+        """
+        The PowerMetrics fields used by all the panels in the layout, without
+        creating the panels. None if a panel doesn't declare them (e.g. of a
+        plugin), we can't tell what it uses, so it needs all of them.
+        """
+        nodes, _ = self.compile()
+
+        keys = set()
+        stack = list(nodes)
+        while stack:
+            tag, is_panel, _, children = stack.pop()
+            if is_panel:
+                panel_keys = getattr(PANELS[tag], "POWERMETRICS_KEYS", None)
+                if panel_keys is None:
+                    logger.info("%s doesn't declare POWERMETRICS_KEYS", tag)
+                    return None
+                keys.update(panel_keys)
+            stack.extend(children)
+        return keys
+
+    def compile_nodes(self, layout):
+        nodes = []
         for child_node in layout:
-            child_widget = None
             widget_name = child_node.tag
-            init_args = []
+            children = []
 
             logger.debug("loading node: %s", widget_name)
 
-            is_panel = False
-            if panel := PANELS.get(widget_name):
-                child_widget = panel
+            # builtin first, finding the plugins is slower
+            if widget_name in PANELS.builtin:
                 is_panel = True
-
-            elif child_layout := LAYOUTS.get(widget_name):
-                child_widget = child_layout
-                init_args = self.compose_body(child_node)
-
-            if not child_widget:
+            elif widget_name in LAYOUTS.builtin:
+                is_panel = False
+            elif widget_name in PANELS:
+                is_panel = True
+            elif widget_name in LAYOUTS:
+                is_panel = False
+            else:
                 raise Exception(f"Unsupported node: {widget_name}")
+            if not is_panel:
+                children = self.compile_nodes(child_node)
 
             kwargs = dict(child_node.items())
 
-            logger.info("node %s attrs: %s", child_widget, kwargs)
+            logger.info("node %s attrs: %s", widget_name, kwargs)
             if css_class := kwargs.pop("class", None):
                 kwargs["classes"] = css_class
 
-            if "refresh_interval" not in kwargs and is_panel:
-                kwargs["refresh_interval"] = self.refresh_interval
+            nodes.append((widget_name, is_panel, kwargs, children))
+
+        return nodes
+
+    def build_widgets(self, nodes):
+        widgets = []
+        for node in nodes:
+            widget_name, is_panel, kwargs, children = node
+            kwargs = dict(kwargs)
+            init_args = []
+            if is_panel:
+                child_widget = PANELS[widget_name]
+                kwargs.setdefault("refresh_interval", self.refresh_interval)
+            else:
+                child_widget = LAYOUTS[widget_name]
+                init_args = self.build_widgets(children)
 
             logger.debug(
                 "init child widget, name=%s, init_args=%s, kwargs=%s",
@@ -70,6 +137,62 @@ class XmlLayoutLoader:
                 kwargs,
             )
             w = child_widget(*init_args, **kwargs)
+            w.layout_node = node
             widgets.append(w)
 
         return widgets
+
+    def swap_layout(self, container, nodes, stats=None):
+        """
+        Change the widgets of `container` (the ones built by this loader) to
+        `nodes`. Widgets whose node didn't change are kept with their state,
+        only the changed ones are created again. Returns the widgets to be
+        removed, the caller should await their `remove()`.
+        """
+        if stats is None:
+            stats = {"kept": 0, "created": 0, "removed": 0}
+        leading = []
+        available = []
+        for child in container.children:
+            if getattr(child, "layout_node", None) is None:
+                if not available:
+                    leading.append(child)
+            else:
+                available.append(child)
+
+        removed = []
+        previous = leading[-1] if leading else None
+        for node in nodes:
+            widget_name, is_panel, kwargs, children = node
+            widget = next(
+                (
+                    w
+                    for w in available
+                    if w.layout_node[:3] == (widget_name, is_panel, kwargs)
+                ),
+                None,
+            )
+            if widget is None:
+                widget = self.build_widgets([node])[0]
+                if previous is not None:
+                    container.mount(widget, after=previous)
+                elif container.children:
+                    container.mount(widget, before=0)
+                else:
+                    container.mount(widget)
+                stats["created"] += 1
+            else:
+                available.remove(widget)
+                if previous is None:
+                    if container.children[0] is not widget:
+                        container.move_child(widget, before=0)
+                elif not is_after(container, widget, previous):
+                    container.move_child(widget, after=previous)
+                if not is_panel and widget.layout_node[3] != children:
+                    removed.extend(self.swap_layout(widget, children, stats))
+                widget.layout_node = node
+                stats["kept"] += 1
+            previous = widget
+
+        stats["removed"] += len(available)
+        return removed + available
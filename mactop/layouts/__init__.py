@@ -1,3 +1,9 @@
-from textual.containers import Vertical, Horizontal
+from mactop.registry import Registry
 
-LAYOUTS = {"Vertical": Vertical, "Horizontal": Horizontal}
+LAYOUTS = Registry(
+    {
+        "Vertical": "textual.containers:Vertical",
+        "Horizontal": "textual.containers:Horizontal",
+    },
+    "mactop.layouts",
+)
@@ -2,16 +2,23 @@ import logging
 import os
 from pathlib import Path
 import threading
-import time
 
 import click
-from textual.app import App, ComposeResult
-from textual.binding import Binding
-from textual.widgets import Footer
 
+from mactop.compile_cache import css_rules_cache, layout_cache
 from mactop.layout_loader import XmlLayoutLoader
 from mactop.metrics_source import IORegManager, PowerMetricsManager, PsutilManager
-from mactop.widgets.header import MactopHeader
+from mactop.metrics_source.daemon import (
+    DEFAULT_SOCKET_PATH,
+    AttachManager,
+    MetricsDaemon,
+    serve_forever,
+)
+from mactop.metrics_source.debug_dump import DEFAULT_DEBUG_RETENTION
+from mactop.metrics_source.powermetrics import samplers_for_keys
+from mactop.metrics_source.recorder import Recorder, ReplayManager
+from mactop.metrics_store import DEFAULT_HISTORY_SIZE, TaskQuery, metrics
+from mactop.theme_watcher import ThemeWatcher
 
 from . import __version__
 
@@ -34,37 +41,6 @@ def setup_log(enabled, level, loglocation):
     logger.info("------ mactop ------")
 
 
-class MactopApp(App):
-    BINDINGS = [
-        Binding("ctrl+c,q", "exit", "Exit", show=True, priority=True, key_display="Q"),
-    ]
-
-    def __init__(self, app_body_items, user_exited_event, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.app_body_items = app_body_items
-        self.user_exited_event = user_exited_event
-
-    def on_mount(self) -> None:
-        self.title = "mactop"
-        self.sub_title = f"v{__version__}"
-
-    def compose(self) -> ComposeResult:
-        """Create child widgets for the app."""
-        yield MactopHeader(show_clock=True)
-        yield Footer()
-
-        for item in self.app_body_items:
-            yield item
-
-    def action_toggle_dark(self) -> None:
-        """An action to toggle dark mode."""
-        self.dark = not self.dark
-
-    def action_exit(self) -> None:
-        self.user_exited_event.set()
-        self.exit()
-
-
 LOG_LEVEL = {0: logging.CRITICAL, 1: logging.WARNING, 2: logging.INFO, 3: logging.DEBUG}
 
 
@@ -75,7 +51,7 @@ def print_version(ctx, param, value):
     ctx.exit()
 
 
-@click.command()
+@click.group(invoke_without_command=True)
 @click.option(
     "--theme",
     "-t",
@@ -96,15 +72,75 @@ def print_version(ctx, param, value):
     default=1.0,
     help="Refresh interval seconds",
 )
+@click.option(
+    "--history-size",
+    default=DEFAULT_HISTORY_SIZE,
+    type=click.IntRange(min=1),
+    help="How many samples to keep for the history charts",
+    show_default=True,
+)
+@click.option(
+    "--push/--no-push",
+    default=False,
+    help="Redraw as soon as collectors publish a sample, instead of polling",
+    show_default=True,
+)
 @click.option("-v", "--verbose", count=True, default=2)
 @click.option("-l", "--log-to", type=click.Path(), default=None)
 @click.option("--powermetrics-fake", type=click.Path(), default=None)
+@click.option(
+    "--ioreg-fake",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Replay ioreg samples from a file instead of reading the battery",
+)
+@click.option(
+    "--record",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Append all collected samples to a record file",
+)
+@click.option(
+    "--replay",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Replay a record file instead of collecting metrics",
+)
+@click.option(
+    "--replay-speed",
+    type=click.FloatRange(min=0),
+    default=1.0,
+    help="Replay speed multiplier, 0 replays as fast as possible",
+    show_default=True,
+)
 @click.option(
     "--version", is_flag=True, callback=print_version, expose_value=False, is_eager=True
 )
 @click.option("--debug/--no-debug", default=False)
+@click.option(
+    "--debug-retention",
+    type=click.IntRange(min=1),
+    default=DEFAULT_DEBUG_RETENTION,
+    help="Disk space the --debug dumps can use, in MiB",
+    show_default=True,
+)
+@click.pass_context
 def main(
-    theme, auto_reload, refresh_interval, verbose, log_to, powermetrics_fake, debug
+    ctx,
+    theme,
+    auto_reload,
+    refresh_interval,
+    history_size,
+    push,
+    verbose,
+    log_to,
+    powermetrics_fake,
+    ioreg_fake,
+    record,
+    replay,
+    replay_speed,
+    debug,
+    debug_retention,
 ):
     verbose = max(min(int(verbose), 5), 0)
     log_level = LOG_LEVEL[verbose]
@@ -113,59 +149,200 @@ def main(
     theme = try_path(theme)
     logger.debug("Using theme file %s", theme)
 
-    metrics_source_manager = PowerMetricsManager(refresh_interval, debug=debug)
-    if not powermetrics_fake:
-        metrics_source_manager.start()
-    else:
-        metrics_source_manager.start_fake_data(str(powermetrics_fake))
+    # for the subcommands
+    ctx.obj = dict(ctx.params, theme=theme)
+    if ctx.invoked_subcommand is not None:
+        return
 
-    ioreg_manager = IORegManager(refresh_interval)
-    ioreg_manager.start()
+    # only run the powermetrics samplers the theme needs, but the theme may
+    # change in auto reload mode
+    samplers = None
+    if not auto_reload:
+        loader = XmlLayoutLoader(theme, refresh_interval, cache=layout_cache)
+        keys = loader.powermetrics_keys()
+        samplers = samplers_for_keys(keys)
+        logger.info("powermetrics samplers needed by the theme: %s", samplers)
+
+    recorder = Recorder(record) if record else None
+    managers = start_managers(
+        refresh_interval,
+        history_size,
+        debug,
+        powermetrics_fake,
+        ioreg_fake,
+        replay,
+        replay_speed,
+        recorder,
+        samplers=samplers,
+        debug_retention=debug_retention,
+    )
+
+    run_app(theme, auto_reload, refresh_interval, push)
 
-    psutil_manager = PsutilManager(refresh_interval)
-    psutil_manager.start()
+    logger.info("Mactop exited")
+    for manager in managers:
+        manager.stop()
+    if recorder is not None:
+        recorder.close()
+    logger.info("Metrics stopped")
+
+
+@main.command()
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False),
+    default=DEFAULT_SOCKET_PATH,
+    help="Unix socket for the viewers to attach",
+    show_default=True,
+)
+@click.pass_obj
+def daemon(options, socket_path):
+    """
+    Run the collectors for `mactop attach` viewers.
+    """
+    recorder = Recorder(options["record"]) if options["record"] else None
+    metrics_daemon = MetricsDaemon(socket_path)
+    # the tasks are only built for some query, viewers select their own from
+    # the records
+    metrics.add_task_query(TaskQuery())
+    managers = start_managers(
+        options["refresh_interval"],
+        options["history_size"],
+        options["debug"],
+        options["powermetrics_fake"],
+        options["ioreg_fake"],
+        options["replay"],
+        options["replay_speed"],
+        recorder,
+        sink=metrics_daemon,
+        debug_retention=options["debug_retention"],
+    )
+    click.echo(f"mactop daemon is serving on {socket_path}, Ctrl+C to stop.")
+    serve_forever(metrics_daemon, managers, user_exited_event)
+    if recorder is not None:
+        recorder.close()
+
+
+@main.command()
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False),
+    default=DEFAULT_SOCKET_PATH,
+    help="Unix socket of the running daemon",
+    show_default=True,
+)
+@click.pass_obj
+def attach(options, socket_path):
+    """
+    Show the metrics of a running `mactop daemon`.
+    """
+    attach_manager = AttachManager(socket_path)
+    attach_manager.start()
+
+    run_app(
+        options["theme"],
+        options["auto_reload"],
+        options["refresh_interval"],
+        options["push"],
+    )
+
+    logger.info("Mactop exited")
+    attach_manager.stop()
 
+
+def run_app(theme, auto_reload, refresh_interval, push):
+    # textual is slow to import, not needed by `--version` or `daemon`
+    from mactop.app import MactopApp
+
+    layout_loader = XmlLayoutLoader(theme, refresh_interval, cache=layout_cache)
     while not user_exited_event.is_set():
-        layout_loader = XmlLayoutLoader(theme, refresh_interval)
         app_body_items, styles_content = layout_loader.load()
         MactopApp.CSS = styles_content
-        app = MactopApp(app_body_items, user_exited_event)
+        app = MactopApp(
+            app_body_items,
+            user_exited_event,
+            refresh_interval,
+            push=push,
+            rules_cache=css_rules_cache,
+        )
+        watcher = None
         if auto_reload:
-            watch_theme_file_with_app(theme, app)
+            watcher = watch_theme_file_with_app(theme, app, layout_loader)
         app.run()
+        if watcher is not None:
+            watcher.stop()
+        css_rules_cache.save()
+
+
+def start_managers(
+    refresh_interval,
+    history_size,
+    debug,
+    powermetrics_fake,
+    ioreg_fake,
+    replay,
+    replay_speed,
+    recorder,
+    samplers=None,
+    debug_retention=DEFAULT_DEBUG_RETENTION,
+    sink=None,
+):
+    if sink is not None:
+        # before any collector starts, so no sample is missed
+        metrics.add_listener(sink.publish)
+    if replay:
+        replay_manager = ReplayManager(
+            replay,
+            refresh_interval,
+            speed=replay_speed,
+            history_size=history_size,
+            recorder=recorder,
+        )
+        replay_manager.start()
+        return [replay_manager]
+
+    metrics_source_manager = PowerMetricsManager(
+        refresh_interval,
+        debug=debug,
+        history_size=history_size,
+        recorder=recorder,
+        samplers=samplers,
+        debug_retention=debug_retention,
+    )
+    if not powermetrics_fake:
+        metrics_source_manager.start()
+    else:
+        metrics_source_manager.start_fake_data(str(powermetrics_fake))
 
-    logger.info("Mactop exited")
-    metrics_source_manager.stop()
-    ioreg_manager.stop()
-    logger.info("Metrics stopped")
+    ioreg_manager = IORegManager(
+        refresh_interval, fake_filepath=ioreg_fake, recorder=recorder
+    )
+    ioreg_manager.start()
 
+    psutil_manager = PsutilManager(refresh_interval, recorder=recorder)
+    psutil_manager.start()
+
+    return [metrics_source_manager, ioreg_manager, psutil_manager]
 
-def watch_theme_file_with_app(theme_file, app):
-    def watch_file_bg_t(theme_file, app):
+
+def watch_theme_file_with_app(theme_file, app, layout_loader):
+    def reload_theme(content):
+        try:
+            nodes, css = layout_loader.compile(content)
+        except Exception:
+            logger.exception("Can not load the theme file %s, ignored", theme_file)
+            return
         try:
-            last_content = None
-            while True:
-                with open(theme_file) as f:
-                    content = f.read()
-
-                if last_content is None:
-                    last_content = content
-                    continue
-
-                if last_content != content:
-                    logger.info(
-                        "Theme file %s has been changed, restart the app...", theme_file
-                    )
-                    last_content = content
-                    app.exit()
-                    return
-
-                time.sleep(1)
-        except:
-            logger.exception(f"error when watch the theme file {theme_file=}")
-
-    t = threading.Thread(target=watch_file_bg_t, args=(theme_file, app), daemon=True)
-    t.start()
+            app.call_from_thread(app.reload_theme, layout_loader, nodes, css)
+        except Exception:
+            logger.exception("Can not reload the theme in place, restart the app...")
+            app.exit()
+
+    watcher = ThemeWatcher(theme_file, reload_theme)
+    watcher.start()
+    return watcher
 
 
 def try_path(theme):
@@ -0,0 +1,348 @@
+"""
+Share one set of collectors between many mactop viewers.
+
+`mactop daemon` runs the collectors once and sends every sample they publish,
+parsed and with its histories, to the viewers connected to a Unix socket. A
+viewer attached later gets the latest sample of every source first, which has
+the full histories already.
+
+`mactop attach` publishes the samples as they are received, viewers don't
+parse samples or keep histories, and the daemon serializes every sample once
+for all of them, so N viewers cost about the same as one.
+
+The stream is a magic header, followed by frames of `(source id, timestamp,
+payload length)` (the same header as the record file, see recorder.py) and
+the pickled sample. Only the metrics classes can be unpickled.
+
+The socket is only for the user who runs mactop (who ran sudo, if it is run
+by sudo), it is in a directory only that user can enter.
+"""
+from dataclasses import replace
+import io
+import logging
+import os
+import pickle
+import queue
+import signal
+import socket
+import stat
+import threading
+import time
+
+from mactop.metrics_store import MetricsSource, metrics
+from mactop.metrics_source.recorder import (
+    FRAME_HEADER,
+    SOURCE_IDS,
+    SOURCES_BY_ID,
+    RecordFormatError,
+)
+
+logger = logging.getLogger(__name__)
+
+STREAM_MAGIC = b"MACTOPD1"
+# frames queued for a viewer before it is considered stuck and dropped
+VIEWER_QUEUE_SIZE = 256
+MAX_VIEWERS = 16
+RECONNECT_INTERVAL = 1
+
+
+def socket_owner() -> int:
+    """
+    The uid of the user who runs mactop, the one who ran sudo if run by sudo.
+    """
+    return int(os.environ.get("SUDO_UID", os.getuid()))
+
+
+DEFAULT_SOCKET_DIR = f"/tmp/mactop-{socket_owner()}"
+DEFAULT_SOCKET_PATH = os.path.join(DEFAULT_SOCKET_DIR, "mactop.sock")
+
+
+def prepare_socket_directory(directory, owner):
+    """
+    Create `directory` only `owner` can enter. If it exists, it must be a
+    directory of `owner` (or of us), not a symlink, e.g. created by another
+    user in /tmp beforehand.
+    """
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid not in (owner, os.getuid()):
+        raise RuntimeError(f"{directory} is not a directory of uid {owner}")
+    if st.st_uid != owner:
+        os.chown(directory, owner, -1)
+    os.chmod(directory, 0o700)
+
+
+def shared_value(source: MetricsSource, value):
+    """
+    What the viewers get of a published sample, without the live histories,
+    which are only for the collector.
+    """
+    if source is MetricsSource.POWERMETRICS:
+        # the viewers select their own tasks from the records
+        return replace(value, tasks=None, task_history=None, task_views={})
+    return value
+
+
+def encode_sample(source: MetricsSource, value, timestamp=None) -> bytes:
+    if timestamp is None:
+        timestamp = time.time()
+    payload = pickle.dumps(shared_value(source, value), pickle.HIGHEST_PROTOCOL)
+    return FRAME_HEADER.pack(SOURCE_IDS[source], timestamp, len(payload)) + payload
+
+
+class SampleUnpickler(pickle.Unpickler):
+    """
+    Only load the metrics classes, and the containers they use.
+    """
+
+    ALLOWED = {("array", "array"), ("array", "_array_reconstructor")}
+
+    def find_class(self, module, name):
+        if (module, name) in self.ALLOWED:
+            return super().find_class(module, name)
+        if module == "mactop.metrics_store":
+            cls = super().find_class(module, name)
+            if isinstance(cls, type) and cls.__module__ == module:
+                return cls
+        raise pickle.UnpicklingError(f"{module}.{name} is not allowed")
+
+
+def read_samples(f):
+    """
+    Yields `(source, value)` of the samples sent by the daemon.
+    """
+    if f.read(len(STREAM_MAGIC)) != STREAM_MAGIC:
+        raise RecordFormatError("not a mactop daemon stream")
+
+    while True:
+        header = f.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size:
+            return
+        source_id, _, length = FRAME_HEADER.unpack(header)
+        payload = f.read(length)
+        if len(payload) < length:
+            return
+
+        source = SOURCES_BY_ID.get(source_id)
+        if source is None:
+            logger.warning("Unknown source id %d from daemon, skip", source_id)
+            continue
+        yield source, SampleUnpickler(io.BytesIO(payload)).load()
+
+
+def install_sample(source: MetricsSource, value):
+    """
+    Publish a sample received from the daemon, the tasks are selected for
+    the task queries of this viewer.
+    """
+    if source is MetricsSource.POWERMETRICS:
+        if value.task_records is not None:
+            value.task_views = {
+                query: value.task_records.select(query)
+                for query in metrics.get_task_queries()
+            }
+        metrics.set_powermetrics(value)
+    elif source is MetricsSource.IOREG:
+        metrics.set_ioregmetrics(value)
+    elif source is MetricsSource.PSUTIL:
+        metrics.set_psutilmetrics(value)
+
+
+class Viewer:
+    def __init__(self, conn) -> None:
+        self.conn = conn
+        self.queue = queue.Queue(maxsize=VIEWER_QUEUE_SIZE)
+
+    def close(self):
+        """
+        Wake up the send loop, if it is blocked in sending, sending fails.
+        """
+        try:
+            self.conn.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        try:
+            self.queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+
+class MetricsDaemon:
+    """
+    Sends every sample the collectors publish to all the connected viewers,
+    at most `max_viewers` of them. `publish` is the listener of the metrics.
+    """
+
+    def __init__(
+        self, socket_path=DEFAULT_SOCKET_PATH, max_viewers=MAX_VIEWERS
+    ) -> None:
+        self.socket_path = socket_path
+        # source -> frame of the latest sample, a viewer attached later gets
+        # them first
+        self.latest = {}
+        # STREAM_MAGIC and the latest frames, built once for the viewers
+        # attached before the next sample
+        self.backlog_payload = None
+        self.max_viewers = max_viewers
+        self.viewers = []
+        self.lock = threading.Lock()
+        self.exited_event = threading.Event()
+        self.server = None
+
+    def publish(self, source: MetricsSource, snapshot):
+        frame = encode_sample(source, snapshot.value)
+        with self.lock:
+            self.latest[source] = frame
+            self.backlog_payload = None
+            for viewer in list(self.viewers):
+                try:
+                    viewer.queue.put_nowait(frame)
+                except queue.Full:
+                    logger.warning("Viewer is too slow, disconnect it")
+                    self.viewers.remove(viewer)
+                    viewer.close()
+
+    def _remove_stale_socket(self):
+        if not os.path.exists(self.socket_path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(self.socket_path)
+        else:
+            raise RuntimeError(f"Another daemon is running on {self.socket_path}")
+        finally:
+            probe.close()
+
+    def start(self):
+        owner = socket_owner()
+        if os.path.dirname(self.socket_path) == DEFAULT_SOCKET_DIR:
+            prepare_socket_directory(DEFAULT_SOCKET_DIR, owner)
+        self._remove_stale_socket()
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        if os.getuid() != owner:
+            # run by sudo, the user can attach without sudo
+            os.chown(self.socket_path, owner, -1)
+        self.server.listen()
+
+        t = threading.Thread(target=self.accept_loop, daemon=True)
+        t.start()
+        logger.info("Daemon is listening on %s", self.socket_path)
+
+    def accept_loop(self):
+        while not self.exited_event.is_set():
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                # server socket closed by stop()
+                return
+
+            viewer = Viewer(conn)
+            with self.lock:
+                if len(self.viewers) >= self.max_viewers:
+                    logger.warning("%d viewers attached, refuse more", self.max_viewers)
+                    conn.close()
+                    continue
+                # the backlog and the registration must be atomic, otherwise
+                # a frame may be missed or sent twice
+                if self.backlog_payload is None:
+                    self.backlog_payload = STREAM_MAGIC + b"".join(self.latest.values())
+                viewer.queue.put(self.backlog_payload)
+                self.viewers.append(viewer)
+            logger.info("Viewer attached, %d viewers now", len(self.viewers))
+
+            t = threading.Thread(target=self.send_loop, args=(viewer,), daemon=True)
+            t.start()
+
+    def send_loop(self, viewer):
+        try:
+            while (data := viewer.queue.get()) is not None:
+                viewer.conn.sendall(data)
+        except OSError as e:
+            logger.info("Viewer disconnected: %s", e)
+        finally:
+            with self.lock:
+                if viewer in self.viewers:
+                    self.viewers.remove(viewer)
+            viewer.conn.close()
+
+    def stop(self):
+        self.exited_event.set()
+        with self.lock:
+            for viewer in self.viewers:
+                viewer.close()
+            self.viewers = []
+        if self.server is not None:
+            self.server.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+
+class AttachManager:
+    """
+    Publish the samples from a running `mactop daemon`, in place of the
+    collectors. Reconnects when the daemon goes away.
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH) -> None:
+        self.socket_path = socket_path
+        self.exited_event = threading.Event()
+        self.sock = None
+
+    def receive(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+        logger.info("Attached to daemon %s", self.socket_path)
+        with self.sock.makefile("rb") as f:
+            for source, value in read_samples(f):
+                if self.exited_event.is_set():
+                    return
+                install_sample(source, value)
+
+    def start(self):
+        def attach_thread(stop_event):
+            while not stop_event.is_set():
+                try:
+                    self.receive()
+                except OSError as e:
+                    logger.warning("Can not receive from daemon: %s", e)
+                except Exception as e:
+                    logger.exception(e)
+                finally:
+                    if self.sock is not None:
+                        self.sock.close()
+                stop_event.wait(RECONNECT_INTERVAL)
+
+        t = threading.Thread(
+            target=attach_thread, args=(self.exited_event,), daemon=True
+        )
+        t.start()
+
+    def stop(self):
+        self.exited_event.set()
+        if self.sock is not None:
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def serve_forever(daemon: MetricsDaemon, managers, stop_event):
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    daemon.start()
+    try:
+        while not stop_event.wait(1):
+            pass
+    except KeyboardInterrupt:
+        logger.info("Daemon interrupted")
+    finally:
+        for manager in managers:
+            manager.stop()
+        daemon.stop()
+        logger.info("Daemon stopped")
@@ -0,0 +1,118 @@
+"""
+Write debug dumps (`--debug`) in a background thread.
+
+All dumps are appended to one gzip file, one JSON object per line. When the
+file is bigger than its share of the retention budget, it is rotated, the
+oldest one is deleted, so the dumps never use more disk than the budget.
+
+Dumps are queued and written by a worker, a slow disk never blocks the
+collector, if the worker falls behind, the oldest dump is dropped. The worker
+is started on the first dump, without `--debug` there is usually none.
+"""
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+
+from mactop.metrics_source.pipeline import DropOldestQueue, start_worker
+from mactop.metrics_store import PipelineStats
+
+logger = logging.getLogger(__name__)
+
+DEBUG_DUMP_LOCATION = "./debug_json"
+DEBUG_DUMP_FILENAME = "mactop_debug.jsonl.gz"
+# MiB, for all the dump files
+DEFAULT_DEBUG_RETENTION = 50
+# the current file and the rotated ones
+DEBUG_DUMP_FILES = 5
+DEBUG_QUEUE_SIZE = 32
+
+
+class DebugDumpWriter:
+    def __init__(
+        self,
+        directory=DEBUG_DUMP_LOCATION,
+        retention=DEFAULT_DEBUG_RETENTION,
+        files=DEBUG_DUMP_FILES,
+    ) -> None:
+        """
+        `retention` is the disk space all the dump files can use, in MiB.
+        """
+        self.directory = directory
+        self.path = os.path.join(directory, DEBUG_DUMP_FILENAME)
+        self.files = files
+        self.file_size = retention * 1024 * 1024 // files
+        self.stats = PipelineStats()
+        self.queue = DropOldestQueue(DEBUG_QUEUE_SIZE, self.stats)
+        self.worker = None
+        self.raw = None
+        self.gz = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            if self.worker is None and not self.queue.closed:
+                self.worker = start_worker(self.queue, self.write, "debug-dump")
+
+    def dump_sample(self, data: dict):
+        """
+        Dump a parsed sample, it must not be modified after this.
+        """
+        self.put({"time": time.time(), "sample": data})
+
+    def dump_error(self, raw: bytes, error: str):
+        """
+        Dump a sample which can not be parsed.
+        """
+        self.put(
+            {"time": time.time(), "error": error, "raw": raw.decode(errors="replace")}
+        )
+
+    def put(self, record):
+        self.start()
+        self.queue.put(record)
+
+    def write(self, record):
+        line = json.dumps(record, default=str).encode() + b"\n"
+        try:
+            if self.gz is None:
+                self._open()
+            self.gz.write(line)
+            # every record can be read even if mactop is killed
+            self.gz.flush()
+            if self.raw.tell() >= self.file_size:
+                self._rotate()
+        except OSError as e:
+            logger.warning("Can not write debug dump %s: %s", self.path, e)
+
+    def _open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.raw = open(self.path, "ab")
+        self.gz = gzip.GzipFile(fileobj=self.raw, mode="ab")
+        logger.info("Debug dumps are written to %s", self.path)
+
+    def _close_file(self):
+        if self.gz is not None:
+            self.gz.close()
+            self.raw.close()
+            self.gz = self.raw = None
+
+    def _rotate(self):
+        self._close_file()
+        for i in range(self.files - 1, 0, -1):
+            src = self.path if i == 1 else f"{self.path}.{i - 1}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i}")
+        if self.files == 1:
+            os.unlink(self.path)
+        logger.debug("Debug dump %s rotated", self.path)
+
+    def close(self):
+        self.queue.close()
+        if self.worker is not None:
+            self.worker.join()
+        self._close_file()
+        if self.stats.dropped:
+            logger.warning("%d debug dumps dropped", self.stats.dropped)
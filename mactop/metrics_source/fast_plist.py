@@ -0,0 +1,224 @@
+"""
+A plist parser for powermetrics samples which only builds what mactop reads.
+
+`plistlib.loads` builds Python objects for everything in the sample, most of
+them (tasks, interrupts, thermal...) are thrown away by PowerMetricsParser.
+
+`loads` here only scans the top level dict of the sample with `bytes.find`:
+every value is located by counting its start and end tags, without parsing
+what's inside. Then the values of the keys in `wanted` are cut out and parsed
+by plistlib in one go, values of the keys in `lazy` are copied out of the
+sample and parsed only when someone reads them, everything else is skipped.
+
+It works because `<` can never appear in the text of a XML document, every
+`<` starts a tag, and no plist tag name is the prefix of another.
+
+The result has the same shape as `plistlib.loads`, for the keys it keeps.
+"""
+from collections.abc import Sequence
+import plistlib
+import re
+import threading
+from xml.sax.saxutils import unescape
+
+# the top level keys PowerMetricsParser reads
+PARSED_KEYS = frozenset(
+    ["backlight", "battery", "disk", "gpu", "network", "processor", "smc"]
+)
+LAZY_KEYS = frozenset(["tasks"])
+
+PLIST_PREFIX = b'<?xml version="1.0" encoding="UTF-8"?>\n<plist version="1.0">'
+PLIST_SUFFIX = b"</plist>"
+TAG_NAME = re.compile(rb"<([a-z]+)")
+# `&` which doesn't start an entity
+BARE_AMPERSAND = re.compile(rb"&(?!(?:amp|lt|gt|quot|apos|#[0-9]+|#x[0-9a-fA-F]+);)")
+# longer than any entity BARE_AMPERSAND accepts
+ENTITY_MAX_LENGTH = 12
+SLASH = ord("/")
+
+
+class LazyPlistArray(Sequence):
+    """
+    A plist array which is parsed on first access. Only the bytes of the
+    array are kept until then, not the whole sample.
+    """
+
+    def __init__(self, sample: bytes, start: int, end: int) -> None:
+        self.content = sample[start:end]
+        self._items = None
+        self._lock = threading.Lock()
+
+    @property
+    def items(self):
+        if self._items is None:
+            with self._lock:
+                if self._items is None:
+                    self._items = load_fragments([self.content])
+                    self.content = None
+        return self._items
+
+    @property
+    def parsed(self):
+        return self._items is not None
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __eq__(self, other):
+        if isinstance(other, LazyPlistArray):
+            other = other.items
+        return self.items == other
+
+    def __repr__(self):
+        if self._items is None:
+            return f"LazyPlistArray(<{len(self.content)} bytes not parsed>)"
+        return f"LazyPlistArray({self._items!r})"
+
+
+class FragmentsReader:
+    """
+    A file-like object reads the fragments one by one, as if they were
+    concatenated, without copying them into one bytes. Only the chunk being
+    read is copied, expat reads 2 KiB at a time.
+
+    powermetrics doesn't escape `&` in process names, every bare `&` is
+    escaped as `&amp;` in the chunk being read, so the XML parser accepts it.
+    An entity must not span two fragments.
+    """
+
+    def __init__(self, fragments) -> None:
+        self.fragments = iter(fragments)
+        self.current = b""
+        # escaped data which didn't fit in the last read
+        self.pending = b""
+
+    def read(self, size=-1):
+        if self.pending:
+            data = self.pending
+        else:
+            data = self._read_escaped(size)
+
+        if 0 <= size < len(data):
+            data, self.pending = data[:size], data[size:]
+        else:
+            self.pending = b""
+        return data
+
+    def _read_escaped(self, size):
+        while not self.current:
+            fragment = next(self.fragments, None)
+            if fragment is None:
+                return b""
+            self.current = memoryview(fragment)
+
+        current = self.current
+        if size < 0 or size >= len(current):
+            size = len(current)
+        else:
+            size = self._entity_boundary(current, size)
+
+        # expat only accepts bytes from read(), not a memoryview
+        data = bytes(current[:size])
+        self.current = current[size:]
+        if b"&" in data:
+            data = BARE_AMPERSAND.sub(b"&amp;", data)
+        return data
+
+    def _entity_boundary(self, current, size):
+        """
+        Cut the chunk before the last `&` if it may start an entity which
+        doesn't end in the chunk, so the entity is not mistaken as a bare `&`.
+        """
+        tail_start = max(size - ENTITY_MAX_LENGTH, 0)
+        tail = current[tail_start:size].tobytes()
+        amp = tail.rfind(b"&")
+        if amp == -1 or b";" in tail[amp:]:
+            return size
+        if tail_start + amp:
+            return tail_start + amp
+        # the chunk starts with the `&`, take only the `&` or the entity
+        head = current[:ENTITY_MAX_LENGTH].tobytes()
+        if BARE_AMPERSAND.match(head):
+            return 1
+        return head.index(b";") + 1
+
+
+def load_fragments(fragments):
+    """
+    Parse the fragments as the content of a plist document.
+    """
+    reader = FragmentsReader([PLIST_PREFIX, *fragments, PLIST_SUFFIX])
+    return plistlib.load(reader, fmt=plistlib.FMT_XML)
+
+
+def full_loads(sample: bytes):
+    """
+    Parse the whole sample, same as `plistlib.loads` but accepts bare `&`.
+    """
+    return plistlib.load(FragmentsReader([sample]), fmt=plistlib.FMT_XML)
+
+
+def element_end(sample, start):
+    """
+    Returns the end index (exclusive) of the element starts at `start`.
+    """
+    name = TAG_NAME.match(sample, start).group(1)
+    tag_end = sample.index(b">", start)
+    if sample[tag_end - 1] == SLASH:
+        # empty element, e.g. <array/>
+        return tag_end + 1
+
+    open_tag = b"<" + name
+    close_tag = b"</" + name + b">"
+    depth = 1
+    pos = tag_end + 1
+    while True:
+        close = sample.index(close_tag, pos)
+        nested = sample.find(open_tag, pos, close)
+        if nested == -1:
+            depth -= 1
+            pos = close + len(close_tag)
+            if not depth:
+                return pos
+        else:
+            nested_end = sample.index(b">", nested)
+            if sample[nested_end - 1] != SLASH:
+                depth += 1
+            pos = nested_end + 1
+
+
+def loads(sample: bytes, wanted=PARSED_KEYS, lazy=LAZY_KEYS):
+    """
+    Parse a powermetrics sample, only the top level keys in `wanted` and
+    `lazy` are in the result.
+    """
+    root = sample.index(b"<dict", sample.index(b"<plist"))
+    root_end = element_end(sample, root)
+
+    result = {}
+    parts = [b"<dict>"]
+    pos = sample.index(b">", root) + 1
+    with memoryview(sample) as view:
+        while (key_start := sample.find(b"<key>", pos, root_end)) != -1:
+            key_end = sample.index(b"</key>", key_start)
+            key = unescape(sample[key_start + 5 : key_end].decode())
+
+            value_start = sample.index(b"<", key_end + 6)
+            value_end = element_end(sample, value_start)
+
+            if key in wanted:
+                parts.append(view[key_start:value_end])
+            elif key in lazy:
+                result[key] = LazyPlistArray(sample, value_start, value_end)
+            pos = value_end
+
+        if len(parts) > 1:
+            parts.append(b"</dict>")
+            result.update(load_fragments(parts))
+    return result
@@ -0,0 +1,92 @@
+"""
+Split the stdout of powermetrics into samples.
+
+powermetrics (with `--format plist`) writes one plist document per sample,
+every document is terminated by a `\x00`. Instead of reading line by line and
+concatenating the lines, we read big chunks into one reusable buffer and cut
+the samples out of it.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+DELIMITER = b"\x00"
+CHUNK_SIZE = 256 * 1024
+WHITESPACE = b" \t\r\n"
+
+
+class SampleFramer:
+    def __init__(self, stdout_fd, chunk_size=CHUNK_SIZE) -> None:
+        self.stdout_fd = stdout_fd
+        self.chunk_size = chunk_size
+        self.buffer = bytearray()
+        self.chunk = bytearray(chunk_size)
+
+        # stats, for benchmark and debug logs
+        self.samples = 0
+        self.bytes_read = 0
+        self.bytes_copied = 0
+
+    @property
+    def bytes_copied_per_sample(self):
+        if not self.samples:
+            return 0
+        return self.bytes_copied / self.samples
+
+    def _read_chunk(self):
+        """
+        Read whatever is available (up to chunk_size) into the reusable chunk,
+        return the count of bytes read, 0 means EOF.
+        """
+        readinto = getattr(self.stdout_fd, "readinto1", None)
+        if readinto is None:
+            readinto = self.stdout_fd.readinto
+        return readinto(self.chunk) or 0
+
+    def _cut(self, end):
+        """
+        Cut buffer[:end] out as one sample and drop the delimiter after it.
+        Deleting from the head of a bytearray only moves the start pointer,
+        so the only copy here is the returned sample itself.
+        """
+        with memoryview(self.buffer) as view:
+            start = 0
+            while start < end and view[start] in WHITESPACE:
+                start += 1
+            sample = bytes(view[start:end])
+        del self.buffer[: end + 1]
+
+        self.bytes_copied += len(sample)
+        return sample
+
+    def __iter__(self):
+        buffer = self.buffer
+        while True:
+            size = self._read_chunk()
+            if not size:
+                break
+            self.bytes_read += size
+
+            # only need to search the new data for delimiter
+            search_from = len(buffer)
+            with memoryview(self.chunk) as chunk:
+                buffer += chunk[:size]
+            self.bytes_copied += size
+
+            while (end := buffer.find(DELIMITER, search_from)) != -1:
+                sample = self._cut(end)
+                search_from = 0
+                if sample:
+                    self.samples += 1
+                    yield sample
+
+        # EOF, the last sample may not be terminated
+        if buffer.strip(WHITESPACE):
+            self.samples += 1
+            yield self._cut(len(buffer))
+        logger.info(
+            "Stream ended, %d samples, %d bytes read, %.0f bytes copied per sample",
+            self.samples,
+            self.bytes_read,
+            self.bytes_copied_per_sample,
+        )
@@ -3,20 +3,28 @@ import logging
 import subprocess
 import threading
 import plistlib
+
+from mactop.metrics_source.framer import SampleFramer
 from mactop.metrics_store import (
     IORegMetrics,
     metrics,
     AppleSmartBattery,
     AdapterDetails,
+    BatteryCapacityHistory,
+    MetricsSource,
 )
 
 logger = logging.getLogger(__name__)
 
 
 class IORegParser:
-    def __init__(self, raw, old_ioreg) -> None:
+    def __init__(self, raw, old_ioreg, timestamp=None) -> None:
+        """
+        `timestamp` is the time.time() the sample was read, now by default.
+        """
         self.raw = raw
         self.old_ioreg = old_ioreg
+        self.timestamp = time.time() if timestamp is None else timestamp
 
     def parse(self):
         ioreg_metrics = IORegMetrics()
@@ -57,12 +65,14 @@ class IORegParser:
         a.external_connected = battery_data["ExternalConnected"]
         a.is_charging = battery_data["IsCharging"]
 
-        old_history = self.old_ioreg.apple_smart_battery.battery_capacity_history
-        if not old_history:
-            old_history = []
+        published = self.old_ioreg.apple_smart_battery.battery_capacity_history
+        if published is None:
+            history = BatteryCapacityHistory()
+        else:
+            history = published.history
 
-        old_history.append((time.time(), a.apple_raw_current_capacity))
-        a.battery_capacity_history = old_history
+        history.append(self.timestamp, a.apple_raw_current_capacity)
+        a.battery_capacity_history = history.snapshot()
 
         logger.info("Adapter is currently connected? %s", a.external_connected)
         if a.external_connected:
@@ -74,27 +84,27 @@ class IORegParser:
         return a
 
 
-def run_ioreg_periodic(stop_event, command, interval):
-    while not stop_event.is_set():
-        process = subprocess.Popen(
-            command, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-        )
-        out, err = process.communicate()
+class IORegSource:
+    """
+    Where the AppleSmartBattery properties come from.
 
-        logger.info(
-            "Running command %s, return_code=%d, stderr=%s",
-            " ".join(command),
-            process.returncode,
-            err,
-        )
-        raw_data = plistlib.loads(out)
-        ioreg = IORegParser(raw_data, metrics.get_ioregmetrics()).parse()
-        metrics.ioregmetrics = ioreg
+    `read()` returns one plist document, either an array of the matched
+    entries (like `ioreg -a` prints) or the properties dict of the entry.
+    """
 
-        time.sleep(interval)
+    name = "base"
 
+    def read(self) -> bytes:
+        raise NotImplementedError
 
-class IORegManager:
+    def close(self):
+        pass
+
+
+class CommandIORegSource(IORegSource):
+    """Fork `ioreg` for every read, works everywhere ioreg exists."""
+
+    name = "command"
     COMMAND = [
         "ioreg",
         "-w",
@@ -105,27 +115,257 @@ class IORegManager:
         "AppleSmartBattery",
     ]
 
-    def __init__(self, interval) -> None:
-        self.process = None
+    def read(self):
+        process = subprocess.Popen(
+            self.COMMAND, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        out, err = process.communicate()
+
+        logger.debug(
+            "Running command %s, return_code=%d, stderr=%s",
+            " ".join(self.COMMAND),
+            process.returncode,
+            err,
+        )
+        return out
+
+
+class IOKitIORegSource(IORegSource):
+    """
+    Read the properties of AppleSmartBattery from IOKit in process.
+
+    The service is looked up once and kept during the lifetime of the source,
+    every read only copies the properties and serializes them as a XML plist,
+    so the parser is the same as the command source.
+    """
+
+    name = "iokit"
+    SERVICE_CLASS = b"AppleSmartBattery"
+    K_IO_MAIN_PORT_DEFAULT = 0
+    K_CF_PROPERTY_LIST_XML_FORMAT = 100
+
+    def __init__(self) -> None:
+        # not imported with the module, only this source needs it
+        import ctypes
+        import ctypes.util
+
+        iokit_path = ctypes.util.find_library("IOKit")
+        cf_path = ctypes.util.find_library("CoreFoundation")
+        if not iokit_path or not cf_path:
+            raise OSError("IOKit is not available on this platform")
+
+        self.iokit = iokit = ctypes.cdll.LoadLibrary(iokit_path)
+        self.cf = cf = ctypes.cdll.LoadLibrary(cf_path)
+
+        iokit.IOServiceMatching.argtypes = [ctypes.c_char_p]
+        iokit.IOServiceMatching.restype = ctypes.c_void_p
+        iokit.IOServiceGetMatchingService.argtypes = [ctypes.c_uint32, ctypes.c_void_p]
+        iokit.IOServiceGetMatchingService.restype = ctypes.c_uint32
+        iokit.IORegistryEntryCreateCFProperties.argtypes = [
+            ctypes.c_uint32,
+            ctypes.POINTER(ctypes.c_void_p),
+            ctypes.c_void_p,
+            ctypes.c_uint32,
+        ]
+        iokit.IORegistryEntryCreateCFProperties.restype = ctypes.c_int
+        iokit.IOObjectRelease.argtypes = [ctypes.c_uint32]
+        iokit.IOObjectRelease.restype = ctypes.c_int
+
+        cf.CFPropertyListCreateData.argtypes = [
+            ctypes.c_void_p,
+            ctypes.c_void_p,
+            ctypes.c_long,
+            ctypes.c_ulong,
+            ctypes.c_void_p,
+        ]
+        cf.CFPropertyListCreateData.restype = ctypes.c_void_p
+        cf.CFDataGetLength.argtypes = [ctypes.c_void_p]
+        cf.CFDataGetLength.restype = ctypes.c_long
+        cf.CFDataGetBytePtr.argtypes = [ctypes.c_void_p]
+        cf.CFDataGetBytePtr.restype = ctypes.c_void_p
+        cf.CFRelease.argtypes = [ctypes.c_void_p]
+        cf.CFRelease.restype = None
+
+        # IOServiceGetMatchingService consumes the matching dict
+        matching = iokit.IOServiceMatching(self.SERVICE_CLASS)
+        self.service = iokit.IOServiceGetMatchingService(
+            self.K_IO_MAIN_PORT_DEFAULT, matching
+        )
+        if not self.service:
+            raise OSError("AppleSmartBattery service not found")
+
+    def read(self):
+        import ctypes
+
+        properties = ctypes.c_void_p()
+        kr = self.iokit.IORegistryEntryCreateCFProperties(
+            self.service, ctypes.byref(properties), None, 0
+        )
+        if kr != 0 or not properties.value:
+            raise OSError(f"IORegistryEntryCreateCFProperties failed, {kr=}")
+
+        try:
+            data = self.cf.CFPropertyListCreateData(
+                None, properties, self.K_CF_PROPERTY_LIST_XML_FORMAT, 0, None
+            )
+            if not data:
+                raise OSError("CFPropertyListCreateData failed")
+            try:
+                length = self.cf.CFDataGetLength(data)
+                return ctypes.string_at(self.cf.CFDataGetBytePtr(data), length)
+            finally:
+                self.cf.CFRelease(data)
+        finally:
+            self.cf.CFRelease(properties)
+
+    def close(self):
+        if self.service:
+            self.iokit.IOObjectRelease(self.service)
+            self.service = 0
+
+
+class FileIORegSource(IORegSource):
+    """
+    Replay the samples saved in a file, samples are plist documents separated
+    by `\\x00`, the same as the powermetrics fake data. Starts over again
+    after the last sample.
+    """
+
+    name = "file"
+
+    def __init__(self, filepath) -> None:
+        self.filepath = filepath
+        with open(filepath, "rb") as f:
+            self.samples = list(SampleFramer(f))
+        if not self.samples:
+            raise ValueError(f"No ioreg samples found in {filepath}")
+        self.index = 0
+
+    def read(self):
+        sample = self.samples[self.index]
+        self.index = (self.index + 1) % len(self.samples)
+        return sample
+
+
+def create_ioreg_source(fake_filepath=None) -> IORegSource:
+    if fake_filepath:
+        return FileIORegSource(fake_filepath)
+    try:
+        return IOKitIORegSource()
+    except (OSError, AttributeError) as e:
+        logger.info("IOKit is not usable (%s), fallback to ioreg command", e)
+        return CommandIORegSource()
+
+
+def battery_change_key(battery: AppleSmartBattery):
+    """
+    The values which matter for deciding the polling rate, temperature and
+    voltage jitter all the time, so they are not part of it. Plugging in or
+    out changes it, so polling is back to the base interval right away.
+    """
+    return (
+        battery.apple_raw_current_capacity,
+        battery.apple_raw_max_capacity,
+        battery.is_charging,
+        battery.external_connected,
+    )
+
+
+class AdaptiveInterval:
+    """
+    Poll every `min_interval` while the values are changing, double the
+    interval each time nothing changed, up to `max_interval`.
+    """
+
+    def __init__(self, min_interval, max_interval) -> None:
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.current = min_interval
+
+    def next(self, changed):
+        if changed:
+            self.current = self.min_interval
+        else:
+            self.current = min(self.current * 2, self.max_interval)
+        return self.current
+
+
+def handle_ioreg_sample(sample: bytes, recorder=None, timestamp=None):
+    """
+    Parse one sample read from a IORegSource and publish it. `timestamp` is
+    when the sample was read, replayed samples pass the recorded time, since
+    the battery charging rate is computed from it.
+    """
+    if timestamp is None:
+        timestamp = time.time()
+    if recorder is not None:
+        recorder.write(MetricsSource.IOREG, sample, timestamp)
+    raw_data = plistlib.loads(sample)
+    if isinstance(raw_data, dict):
+        raw_data = [raw_data]
+    ioreg = IORegParser(raw_data, metrics.get_ioregmetrics(), timestamp).parse()
+    metrics.set_ioregmetrics(ioreg)
+    return ioreg
+
+
+def run_ioreg_periodic(stop_event, source, interval, max_interval, recorder=None):
+    polling = AdaptiveInterval(interval, max_interval)
+    last_key = None
+    next_deadline = time.monotonic()
+
+    while not stop_event.is_set():
+        ioreg = handle_ioreg_sample(source.read(), recorder=recorder)
+
+        key = battery_change_key(ioreg.apple_smart_battery)
+        wait = polling.next(key != last_key)
+        last_key = key
+        logger.debug("ioreg polled via %s, next poll in %.1fs", source.name, wait)
+
+        # the time spent reading doesn't add up to the interval
+        next_deadline = max(next_deadline + wait, time.monotonic())
+        stop_event.wait(next_deadline - time.monotonic())
+
+
+class IORegManager:
+    # battery values change about once a minute, no need to read them every
+    # refresh when nothing is changing, but a change must be seen soon enough
+    # for the charging rate
+    MAX_INTERVAL = BatteryCapacityHistory.RESOLUTION
+
+    def __init__(self, interval, fake_filepath=None, recorder=None) -> None:
         self.exited_event = threading.Event()
         self.interval = interval
+        self.fake_filepath = fake_filepath
+        self.recorder = recorder
+        self.source = None
 
     def start_loop_thread(self):
-        def loop_thread(stop_event, command, interval):
+        def loop_thread(stop_event, interval):
             try:
-                run_ioreg_periodic(stop_event, command, interval)
-            except Exception as stop_event:
-                logger.exception(stop_event)
+                self.source = create_ioreg_source(self.fake_filepath)
+                logger.info("Using ioreg source: %s", self.source.name)
+                run_ioreg_periodic(
+                    stop_event,
+                    self.source,
+                    interval,
+                    self.MAX_INTERVAL,
+                    recorder=self.recorder,
+                )
+            except Exception as e:
+                logger.exception(e)
+            finally:
+                if self.source is not None:
+                    self.source.close()
 
         # start the backgroud thread to process the stdout
         t = threading.Thread(
             target=loop_thread,
-            args=(self.exited_event, self.COMMAND, self.interval),
+            args=(self.exited_event, self.interval),
             daemon=True,
         )
         t.start()
 
-        logger.info("Background read_stdout started.")
+        logger.info("Background ioreg thread started.")
 
     def start(self):
         self.start_loop_thread()
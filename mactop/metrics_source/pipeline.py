@@ -0,0 +1,85 @@
+"""
+A bounded queue between the thread reads a collector's output and the thread
+parses it.
+
+When the parser falls behind, the oldest sample is dropped instead of blocking
+the reader, so the pipe never backs up and the UI always gets the freshest
+sample.
+"""
+from collections import deque
+import threading
+import time
+
+from mactop.metrics_store import PipelineStats
+
+# samples waiting to be parsed, more than this and the oldest one is dropped
+PIPELINE_QUEUE_SIZE = 2
+
+
+class DropOldestQueue:
+    def __init__(self, maxsize=PIPELINE_QUEUE_SIZE, stats=None) -> None:
+        self.items = deque()
+        self.maxsize = maxsize
+        self.stats = stats if stats is not None else PipelineStats()
+        self.closed = False
+        self.cond = threading.Condition()
+
+    def put(self, item) -> bool:
+        """
+        Returns False if the oldest item was dropped to make room.
+        """
+        with self.cond:
+            dropped = len(self.items) >= self.maxsize
+            if dropped:
+                self.items.popleft()
+                self.stats.dropped += 1
+            self.items.append((time.monotonic(), item))
+            self.stats.received += 1
+            self.stats.depth = len(self.items)
+            self.stats.max_depth = max(self.stats.max_depth, self.stats.depth)
+            self.cond.notify()
+        return not dropped
+
+    def get(self):
+        """
+        Blocks until an item is available, returns None when the queue is
+        closed and empty.
+        """
+        with self.cond:
+            while not self.items:
+                if self.closed:
+                    return None
+                self.cond.wait()
+            queued_at, item = self.items.popleft()
+            self.stats.depth = len(self.items)
+        self.stats.wait_latency = time.monotonic() - queued_at
+        return item
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def __len__(self):
+        return len(self.items)
+
+
+def run_worker(queue: DropOldestQueue, handle):
+    """
+    Call `handle` with every item of the queue until it is closed, records
+    how long `handle` takes.
+    """
+    stats = queue.stats
+    while (item := queue.get()) is not None:
+        start = time.monotonic()
+        handle(item)
+        stats.handle_latency = time.monotonic() - start
+        stats.handled += 1
+
+
+def start_worker(queue: DropOldestQueue, handle, name=None) -> threading.Thread:
+    t = threading.Thread(
+        target=run_worker, args=(queue, handle), name=name, daemon=True
+    )
+    t.start()
+    return t
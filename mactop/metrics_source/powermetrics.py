@@ -1,14 +1,10 @@
 """
 Managing the backgroud process and parse the metrics
 """
-import pathlib
 import time
-import json
 import threading
 import subprocess
 import logging
-import plistlib
-from datetime import datetime
 
 from mactop.metrics_store import (
     CPU,
@@ -18,6 +14,7 @@ from mactop.metrics_store import (
     ProcessorIntel,
     ProcessorPackage,
     ProcessorType,
+    MetricsSource,
     metrics,
     PowerMetricsBattery,
     PowerMetrics,
@@ -25,18 +22,77 @@ from mactop.metrics_store import (
     Netowrk,
     Disk,
     CPUCore,
+    DEFAULT_HISTORY_SIZE,
+    HistorySnapshot,
+    RingBuffer,
+    TaskHistory,
+    TaskRecords,
+    powermetrics_pipeline_stats,
 )
+from mactop.metrics_source import fast_plist
+from mactop.metrics_source.debug_dump import DEFAULT_DEBUG_RETENTION, DebugDumpWriter
+from mactop.metrics_source.framer import SampleFramer
+from mactop.metrics_source.pipeline import DropOldestQueue, start_worker
 
-DEBUG_DUMP_LOCATION = "./debug_json"
 logger = logging.getLogger(__name__)
 
+# PowerMetrics field -> the `powermetrics --samplers` which produces it
+SAMPLER_BY_KEY = {
+    # there is no backlight sampler, `powermetrics -h` lists the battery
+    # sampler as "battery and backlight info"
+    "backlight": "battery",
+    "battery": "battery",
+    "smc": "smc",
+    "tasks": "tasks",
+    "network": "network",
+    "disk": "disk",
+    "m1_gpu": "gpu_power",
+    "processor_intel": "cpu_power",
+    "processor_m1": "cpu_power",
+}
+
+
+def samplers_for_keys(keys):
+    """
+    Returns the sorted sampler names needed for the PowerMetrics fields,
+    None (all the samplers) if the fields are None.
+    """
+    if keys is None:
+        return None
+    samplers = set()
+    for key in keys:
+        if (sampler := SAMPLER_BY_KEY.get(key)) is None:
+            raise ValueError(f"Unknown powermetrics key: {key}")
+        samplers.add(sampler)
+    return sorted(samplers)
+
 
 class PowerMetricsParser:
-    def __init__(self, raw, old_powermetrics, interval):
+    def __init__(
+        self,
+        raw,
+        old_powermetrics,
+        interval,
+        history_size=DEFAULT_HISTORY_SIZE,
+        task_queries=(),
+    ):
         self.raw = raw
         self.interval = interval
         self.old_powermetrics = old_powermetrics
-        self.max_history_count = 100
+        self.max_history_count = history_size
+        self.task_queries = task_queries
+
+    def append_history(self, history: HistorySnapshot | None, value):
+        """
+        The RingBuffer of the previous sample is appended in place, a new
+        snapshot of it is published, so published samples never change.
+        """
+        if history is None:
+            buffer = RingBuffer(self.max_history_count)
+        else:
+            buffer = history.buffer
+        buffer.append(value)
+        return buffer.snapshot()
 
     def parse(self):
         powermetrics = PowerMetrics()
@@ -45,8 +101,20 @@ class PowerMetricsParser:
         if smc_data := self.raw.get("smc"):
             powermetrics.smc = self.parse_smc(smc_data)
 
-        if tasks := self.raw.get("tasks"):
+        # may be lazy, only parsed here when some widget wants it, otherwise
+        # not published, so nobody parses it in the UI thread
+        tasks = self.raw.get("tasks")
+        if tasks is not None and self.task_queries:
+            history = self.old_powermetrics.task_history
+            if history is None:
+                history = TaskHistory()
+            records = TaskRecords(tasks, history)
             powermetrics.tasks = tasks
+            powermetrics.task_history = history
+            powermetrics.task_records = records
+            powermetrics.task_views = {
+                query: records.select(query) for query in self.task_queries
+            }
 
         if network := self.raw.get("network"):
             powermetrics.network = self.parse_network(network)
@@ -73,11 +141,9 @@ class PowerMetricsParser:
         for cluster in processor["clusters"]:
             package.clusters.append(self.parse_processor_m1_cluster(cluster))
 
-        old_hisotry = self.old_powermetrics.processor_m1.cpu_energy_history
-        if not old_hisotry:
-            old_hisotry = []
-        old_hisotry.append(package.cpu_energy)
-        package.cpu_energy_history = old_hisotry[-self.max_history_count :]
+        package.cpu_energy_history = self.append_history(
+            self.old_powermetrics.processor_m1.cpu_energy_history, package.cpu_energy
+        )
 
         return package
 
@@ -95,11 +161,9 @@ class PowerMetricsParser:
         g.idle_ratio = gpu.get("idle_ratio")
         g.gpu_energy_ma = gpu.get("gpu_energy")
 
-        old_hisotry = self.old_powermetrics.m1_gpu.gpu_energy_ma_history
-        if not old_hisotry:
-            old_hisotry = []
-        old_hisotry.append(g.gpu_energy_ma)
-        g.gpu_energy_ma_history = old_hisotry[-self.max_history_count :]
+        g.gpu_energy_ma_history = self.append_history(
+            self.old_powermetrics.m1_gpu.gpu_energy_ma_history, g.gpu_energy_ma
+        )
 
         return g
 
@@ -110,29 +174,21 @@ class PowerMetricsParser:
         n.rops_per_s = disk.get("rops_per_s")
         n.wops_per_s = disk.get("wops_per_s")
 
-        old_hisotry = self.old_powermetrics.disk.rbytes_per_s_history
-        if not old_hisotry:
-            old_hisotry = []
-        old_hisotry.append(n.rbytes_per_s)
-        n.rbytes_per_s_history = old_hisotry[-self.max_history_count :]
-
-        old_hisotry = self.old_powermetrics.disk.wbytes_per_s_history
-        if not old_hisotry:
-            old_hisotry = []
-        old_hisotry.append(n.wbytes_per_s)
-        n.wbytes_per_s_history = old_hisotry[-self.max_history_count :]
-
-        old_hisotry = self.old_powermetrics.disk.rops_per_s_history
-        if not old_hisotry:
-            old_hisotry = []
-        old_hisotry.append(n.rops_per_s)
-        n.rops_per_s_history = old_hisotry[-self.max_history_count :]
-
-        old_hisotry = self.old_powermetrics.disk.wops_per_s_history
-        if not old_hisotry:
-            old_hisotry = []
-        old_hisotry.append(n.wops_per_s)
-        n.wops_per_s_history = old_hisotry[-self.max_history_count :]
+        n.rbytes_per_s_history = self.append_history(
+            self.old_powermetrics.disk.rbytes_per_s_history, n.rbytes_per_s
+        )
+
+        n.wbytes_per_s_history = self.append_history(
+            self.old_powermetrics.disk.wbytes_per_s_history, n.wbytes_per_s
+        )
+
+        n.rops_per_s_history = self.append_history(
+            self.old_powermetrics.disk.rops_per_s_history, n.rops_per_s
+        )
+
+        n.wops_per_s_history = self.append_history(
+            self.old_powermetrics.disk.wops_per_s_history, n.wops_per_s
+        )
         return n
 
     def parse_network(self, network):
@@ -142,43 +198,30 @@ class PowerMetricsParser:
         n.ipacket_rate = network.get("ipacket_rate")
         n.opacket_rate = network.get("opacket_rate")
 
-        old_hisotry = self.old_powermetrics.network.ibyte_rate_history
-        if not old_hisotry:
-            old_hisotry = []
-        old_hisotry.append(n.ibyte_rate)
-        n.ibyte_rate_history = old_hisotry[-self.max_history_count :]
-
-        old_hisotry = self.old_powermetrics.network.obyte_rate_history
-        if not old_hisotry:
-            old_hisotry = []
-        old_hisotry.append(n.obyte_rate)
-        n.obyte_rate_history = old_hisotry[-self.max_history_count :]
-
-        old_hisotry = self.old_powermetrics.network.ipacket_rate_history
-        if not old_hisotry:
-            old_hisotry = []
-        old_hisotry.append(n.ipacket_rate)
-        n.ipacket_rate_history = old_hisotry[-self.max_history_count :]
-
-        old_hisotry = self.old_powermetrics.network.opacket_rate_history
-        if not old_hisotry:
-            old_hisotry = []
-        old_hisotry.append(n.opacket_rate)
-        n.opacket_rate_history = old_hisotry[-self.max_history_count :]
+        n.ibyte_rate_history = self.append_history(
+            self.old_powermetrics.network.ibyte_rate_history, n.ibyte_rate
+        )
+
+        n.obyte_rate_history = self.append_history(
+            self.old_powermetrics.network.obyte_rate_history, n.obyte_rate
+        )
+
+        n.ipacket_rate_history = self.append_history(
+            self.old_powermetrics.network.ipacket_rate_history, n.ipacket_rate
+        )
+
+        n.opacket_rate_history = self.append_history(
+            self.old_powermetrics.network.opacket_rate_history, n.opacket_rate
+        )
         return n
 
     def parse_processor_intel(self, processor):
         pi = ProcessorIntel()
         if package_watts := processor.get("package_watts"):
-            old_hisotry = self.old_powermetrics.processor_intel.package_watts_history
-            new_history = []
-            if not old_hisotry:
-                new_history = []
-            else:
-                new_history = old_hisotry
-
-            new_history.append(package_watts)
-            pi.package_watts_history = new_history[-self.max_history_count :]
+            pi.package_watts_history = self.append_history(
+                self.old_powermetrics.processor_intel.package_watts_history,
+                package_watts,
+            )
 
         if "packages" in processor:
             pi.packages = self.parse_processor_packages(processor["packages"])
@@ -248,69 +291,136 @@ class PowerMetricsParser:
         return smc
 
 
-def streaming_powermetrics(stdout_fd, interval, sleep=0, debug=False):
+def handle_sample(
+    sample,
+    interval,
+    debug=False,
+    history_size=DEFAULT_HISTORY_SIZE,
+    recorder=None,
+    loads=fast_plist.loads,
+    debug_writer=None,
+):
+    """
+    Parse one sample and publish it. `loads` parses the plist, it can be
+    `fast_plist.full_loads` or `fast_plist.loads`, in debug mode the whole
+    sample is always parsed, since it is dumped.
+
+    Samples can not be parsed, and in debug mode all samples, are dumped by
+    `debug_writer`.
+    """
+    if recorder is not None:
+        recorder.write(MetricsSource.POWERMETRICS, sample)
+    if debug:
+        loads = fast_plist.full_loads
+    try:
+        data = loads(sample)
+    except Exception as e:
+        logger.exception("Error when load powermetrics, dump output...")
+        if debug_writer is not None:
+            debug_writer.dump_error(sample, repr(e))
+        return
+
+    if debug and debug_writer is not None:
+        debug_writer.dump_sample(data)
+
+    powermetrics = PowerMetricsParser(
+        data,
+        metrics.get_powermetrics(),
+        interval,
+        history_size,
+        task_queries=metrics.get_task_queries(),
+    ).parse()
+    metrics.set_powermetrics(powermetrics)
+
+
+def streaming_powermetrics(
+    stdout_fd,
+    interval,
+    sleep=0,
+    debug=False,
+    history_size=DEFAULT_HISTORY_SIZE,
+    recorder=None,
+    stats=powermetrics_pipeline_stats,
+    debug_writer=None,
+):
     """
-    The delimiter is \x00
-    but I haven't figure out how to read effciently mean while using this \x00
+    The delimiter is \x00, samples are cut out by SampleFramer.
+
+    This thread only reads, samples are parsed in a worker thread, so a slow
+    parse never backs up the pipe. If the worker falls behind, the oldest
+    sample is dropped. Returns after all the samples read are published.
 
     ref:
     https://stackoverflow.com/questions/375427
     """
-    read_content = b""
-    while True:
-        line = stdout_fd.readline()
-        read_content += line
-
-        # handle one batch
-        if b"</plist>" in line:
-            read_content = read_content.replace(b"&", b"and")
-            try:
-                data = plistlib.loads(read_content)
-            except:
-                dumpfile = f"powermetrics_dump_{time.time()}.plist"
-                logger.exception("Error when load powermetrics, dump output...")
-                with open(dumpfile, "w") as f:
-                    f.write(read_content.decode())
-                continue
-
-            read_content = b""
-            stdout_fd.read(1)
-
-            if debug:
-                pathlib.Path(DEBUG_DUMP_LOCATION).mkdir(parents=True, exist_ok=True)
-                debug_file = (
-                    f"{DEBUG_DUMP_LOCATION}/mactop_debug_{ datetime.now().strftime('%Y%m%d_%H:%M:%S')}.json"
-                )
-                logger.info("Got metrics, debug file saved to %s", debug_file)
-                with open(debug_file, "w") as d:
-                    json.dump(data, d, default=str)
-
-            metrics.powermetrics = PowerMetricsParser(
-                data, metrics.get_powermetrics(), interval
-            ).parse()
 
+    def handle(sample):
+        try:
+            handle_sample(
+                sample,
+                interval,
+                debug=debug,
+                history_size=history_size,
+                recorder=recorder,
+                debug_writer=debug_writer,
+            )
+        except Exception as e:
+            logger.exception(e)
+
+    queue = DropOldestQueue(stats=stats)
+    worker = start_worker(queue, handle, name="powermetrics-parser")
+    try:
+        for sample in SampleFramer(stdout_fd):
+            if not queue.put(sample):
+                logger.info(
+                    "Parser is behind, dropped a sample, %d dropped", stats.dropped
+                )
             time.sleep(sleep)
+    finally:
+        queue.close()
+        worker.join()
 
 
 class PowerMetricsManager:
-    def __init__(self, refresh_interval_seconds: float, debug: bool) -> None:
+    def __init__(
+        self,
+        refresh_interval_seconds: float,
+        debug: bool,
+        history_size: int = DEFAULT_HISTORY_SIZE,
+        recorder=None,
+        samplers=None,
+        debug_retention=DEFAULT_DEBUG_RETENTION,
+    ) -> None:
+        """
+        `samplers` is the list of powermetrics samplers to run, None means all.
+        `debug_retention` is the disk space of debug dumps, in MiB.
+        """
         self.process = None
         self.refresh_interval_seconds = refresh_interval_seconds
         self.debug = debug
+        self.history_size = history_size
+        self.recorder = recorder
+        self.samplers = samplers
+        self.stopped = False
+        # without --debug, only started if some sample can not be parsed
+        self.debug_writer = DebugDumpWriter(retention=debug_retention)
 
     def start_background_process(self):
         sample_rate = int(self.refresh_interval_seconds * 1000)
+        samplers = "all" if self.samplers is None else ",".join(self.samplers)
         command = [
             "sudo",
             "powermetrics",
             "--format",
             "plist",
             "--samplers",
-            "all",
+            samplers,
             "--sample-rate",
             f"{sample_rate}",
         ]
         logger.info("Start powermetrics process: %s", command)
+        if self.debug:
+            self.debug_writer.start()
         self.process = subprocess.Popen(
             command,
             stdout=subprocess.PIPE,
@@ -322,9 +432,28 @@ class PowerMetricsManager:
 
         def read_stdout(stdout_fd, stderr, interval):
             try:
-                streaming_powermetrics(stdout_fd, interval, debug=self.debug)
+                streaming_powermetrics(
+                    stdout_fd,
+                    interval,
+                    debug=self.debug,
+                    history_size=self.history_size,
+                    recorder=self.recorder,
+                    debug_writer=self.debug_writer,
+                )
             except Exception as e:
                 logger.exception(e)
+                return
+
+            returncode = self.process.wait()
+            if returncode and self.samplers is not None and not self.stopped:
+                # some samplers are not available on every Mac, e.g. smc
+                logger.warning(
+                    "powermetrics exited with %d, stderr=%s, retry with all samplers",
+                    returncode,
+                    stderr.read(),
+                )
+                self.samplers = None
+                self.start_background_process()
 
         # start the backgroud thread to process the stdout
         t = threading.Thread(
@@ -337,13 +466,27 @@ class PowerMetricsManager:
         logger.info("Background read_stdout started.")
 
     def start(self):
+        if self.samplers is not None and not self.samplers:
+            logger.info("No panel needs powermetrics, not starting it")
+            return
         self.start_background_process()
 
     def start_fake_data(self, filepath):
+        if self.debug:
+            self.debug_writer.start()
+
         def read_stdout(filepath, interval):
             f = open(filepath, "br")
             try:
-                streaming_powermetrics(f, interval, sleep=1, debug=self.debug)
+                streaming_powermetrics(
+                    f,
+                    interval,
+                    sleep=1,
+                    debug=self.debug,
+                    history_size=self.history_size,
+                    recorder=self.recorder,
+                    debug_writer=self.debug_writer,
+                )
             except Exception as e:
                 logger.exception(e)
             finally:
@@ -360,6 +503,9 @@ class PowerMetricsManager:
         logger.info("Background read_stdout with fake data started.")
 
     def stop(self):
+        self.stopped = True
+        logger.info("powermetrics pipeline: %s", powermetrics_pipeline_stats)
+        self.debug_writer.close()
         try:
             if self.process is not None:
                 self.process.terminate()
@@ -1,9 +1,13 @@
+import dataclasses
+import json
 import time
 import psutil
 import logging
 import threading
 from mactop.metrics_store import (
     LoadAvg,
+    MetricsSource,
+    PsutilMetrics,
     SwapMemory,
     metrics,
     CPUTimesPercent,
@@ -14,9 +18,46 @@ from mactop.metrics_store import (
 logger = logging.getLogger(__name__)
 
 
-def perf_cpu(interval):
-    result = psutil.cpu_times_percent(interval=interval, percpu=True)
-    psu = metrics.get_psutilmetrics()
+def cpu_times_percent_delta(old, new):
+    """
+    The same as psutil.cpu_times_percent, but calculated from two cpu_times
+    snapshots, so it never blocks.
+    """
+    all_delta = sum(new) - sum(old)
+
+    def percent(field):
+        if all_delta <= 0:
+            return 0.0
+        field_delta = getattr(new, field) - getattr(old, field)
+        return min(max(field_delta / all_delta * 100, 0.0), 100.0)
+
+    return CPUTimesPercent(
+        user=percent("user"),
+        nice=percent("nice"),
+        system=percent("system"),
+        idle=percent("idle"),
+    )
+
+
+class CPUTimesSampler:
+    def __init__(self) -> None:
+        self.last_cpu_times = psutil.cpu_times(percpu=True)
+
+    def sample(self):
+        """
+        Returns the per cpu percentages since the last call.
+        """
+        cpu_times = psutil.cpu_times(percpu=True)
+        result = [
+            cpu_times_percent_delta(old, new)
+            for old, new in zip(self.last_cpu_times, cpu_times)
+        ]
+        self.last_cpu_times = cpu_times
+        return result
+
+
+def perf_cpu(psu, sampler):
+    result = sampler.sample()
     total_user = 0
     total_nice = 0
     total_system = 0
@@ -24,9 +65,7 @@ def perf_cpu(interval):
 
     percpus = []
     for r in result:
-        percpus.append(
-            CPUTimesPercent(user=r.user, nice=r.nice, system=r.system, idle=r.idle)
-        )
+        percpus.append(r)
         total_user += r.user
         total_nice += r.nice
         total_system += r.system
@@ -35,6 +74,8 @@ def perf_cpu(interval):
     psu.cpu_percent_percpu = percpus
 
     total = total_user + total_system + total_nice + total_idle
+    if not total:
+        return
     psu.cpu_percent = CPUTimesPercent(
         user=total_user / total,
         system=total_system / total,
@@ -43,7 +84,7 @@ def perf_cpu(interval):
     )
 
 
-def get_swap_memory():
+def get_swap_memory(psu):
     swap = psutil.swap_memory()
     n = SwapMemory()
 
@@ -54,11 +95,10 @@ def get_swap_memory():
     n.sin_bytes = swap.sin
     n.sout_bytes = swap.sout
 
-    psu = metrics.get_psutilmetrics()
     psu.swap_memory = n
 
 
-def get_virtual_memory():
+def get_virtual_memory(psu):
     vm = psutil.virtual_memory()
     n = VirtualMemory()
 
@@ -69,56 +109,99 @@ def get_virtual_memory():
     n.free = vm.free
     n.active = vm.active
     n.inactive = vm.inactive
-    n.wired = vm.wired
+    # wired is only available on macOS and BSD
+    n.wired = getattr(vm, "wired", None)
 
-    psu = metrics.get_psutilmetrics()
-    psu.virtual_memory = vm
+    psu.virtual_memory = n
 
 
-def get_loadavg():
+def get_loadavg(psu):
     la = LoadAvg()
     pa = psutil.getloadavg()
 
     la.load1, la.load5, la.load15 = pa
 
-    psu = metrics.get_psutilmetrics()
     psu.loadavg = la
 
 
-def get_boot_time():
+def get_boot_time(psu):
     t = psutil.boot_time()
-    psu = metrics.get_psutilmetrics()
     psu.boot_time = t
 
 
-def run_psutil(stop_event, interval):
-    last_run_time = time.time()
-    while not stop_event.is_set():
-        perf_cpu(interval)
-        get_swap_memory()
-        get_virtual_memory()
-        get_loadavg()
-        get_boot_time()
+def encode_psutil_sample(psu: PsutilMetrics) -> bytes:
+    return json.dumps(dataclasses.asdict(psu)).encode()
+
+
+def decode_psutil_sample(payload: bytes) -> PsutilMetrics:
+    data = json.loads(payload)
+    percpu = data.pop("cpu_percent_percpu")
+    if percpu is not None:
+        percpu = [CPUTimesPercent(**p) for p in percpu]
+    return PsutilMetrics(
+        cpu_percent_percpu=percpu,
+        cpu_percent=CPUTimesPercent(**data.pop("cpu_percent")),
+        swap_memory=SwapMemory(**data.pop("swap_memory")),
+        virtual_memory=VirtualMemory(**data.pop("virtual_memory")),
+        loadavg=LoadAvg(**data.pop("loadavg")),
+        **data,
+    )
 
-        current_time = time.time()
-        wait_time = current_time - last_run_time
-        logger.debug("wait_time: %s", wait_time)
-        if wait_time < interval:
-            logger.debug("put to wait_time")
-            time.sleep(wait_time)
 
-        last_run_time = time.time()
+def handle_psutil_sample(payload: bytes, recorder=None):
+    """
+    Publish a recorded psutil sample.
+    """
+    if recorder is not None:
+        recorder.write(MetricsSource.PSUTIL, payload)
+    psu = decode_psutil_sample(payload)
+    metrics.set_psutilmetrics(psu)
+    return psu
+
+
+def run_psutil(stop_event, interval, recorder=None):
+    """
+    Collect all psutil metrics in one tick, ticks are scheduled on the
+    monotonic clock, so the time spent in collecting doesn't make ticks drift.
+    """
+    sampler = CPUTimesSampler()
+    next_tick = time.monotonic() + interval
+
+    while not stop_event.wait(max(next_tick - time.monotonic(), 0)):
+        jitter = time.monotonic() - next_tick
+
+        psu = PsutilMetrics()
+        perf_cpu(psu, sampler)
+        get_swap_memory(psu)
+        get_virtual_memory(psu)
+        get_loadavg(psu)
+        get_boot_time(psu)
+        psu.tick_jitter = jitter
+        if recorder is not None:
+            recorder.write(MetricsSource.PSUTIL, encode_psutil_sample(psu))
+        metrics.set_psutilmetrics(psu)
+
+        logger.debug("psutil tick jitter: %.4fs", jitter)
+
+        next_tick += interval
+        now = time.monotonic()
+        if next_tick < now:
+            # fell behind for more than one tick, skip the missed ticks
+            missed = int((now - next_tick) // interval) + 1
+            logger.warning("psutil missed %d ticks", missed)
+            next_tick += missed * interval
 
 
 class PsutilManager:
-    def __init__(self, interval: float) -> None:
+    def __init__(self, interval: float, recorder=None) -> None:
         self.interval = interval
+        self.recorder = recorder
         self.exited_event = threading.Event()
 
     def start_cpu_prof(self, interval: float):
         def cpu_prof_thread(stop_event, interval):
             try:
-                run_psutil(stop_event, interval)
+                run_psutil(stop_event, interval, recorder=self.recorder)
             except Exception as stop_event:
                 logger.exception(stop_event)
 
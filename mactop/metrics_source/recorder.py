@@ -0,0 +1,210 @@
+"""
+Record the samples of all metrics sources into one file, and replay them.
+
+The file is append-only: a magic header, followed by frames. Every frame is a
+fixed size header `(source id, timestamp, payload length)` and the zlib
+compressed payload:
+
+- powermetrics: the raw plist of the sample, as powermetrics printed it;
+- ioreg: the raw plist read from the ioreg source;
+- psutil: the published PsutilMetrics, as JSON.
+
+Replaying feeds the payloads to the same handlers the collectors use, so the
+whole pipeline runs the same way without a Mac or sudo.
+"""
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+
+from mactop.metrics_store import DEFAULT_HISTORY_SIZE, MetricsSource
+from mactop.metrics_source.ioreg import handle_ioreg_sample
+from mactop.metrics_source.powermetrics import handle_sample
+from mactop.metrics_source.psutil_manager import handle_psutil_sample
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"MACTOPR1"
+# source id, time.time() of the sample, payload length
+FRAME_HEADER = struct.Struct("<BdI")
+COMPRESS_LEVEL = 6
+
+SOURCE_IDS = {
+    MetricsSource.POWERMETRICS: 1,
+    MetricsSource.IOREG: 2,
+    MetricsSource.PSUTIL: 3,
+}
+SOURCES_BY_ID = {v: k for k, v in SOURCE_IDS.items()}
+
+
+class RecordFormatError(Exception):
+    pass
+
+
+def encode_frame(source: MetricsSource, payload: bytes, timestamp=None) -> bytes:
+    if timestamp is None:
+        timestamp = time.time()
+    compressed = zlib.compress(payload, COMPRESS_LEVEL)
+    header = FRAME_HEADER.pack(SOURCE_IDS[source], timestamp, len(compressed))
+    return header + compressed
+
+
+class Recorder:
+    """
+    Append frames to a record file, can be shared by all collector threads.
+    """
+
+    def __init__(self, path) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            with open(path, "rb") as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    raise RecordFormatError(f"{path} is not a mactop record file")
+        self.f = open(path, "ab")
+        if not exists:
+            self.f.write(MAGIC)
+        self.frames = 0
+        self.bytes_written = 0
+
+    def write(self, source: MetricsSource, payload: bytes, timestamp=None):
+        frame = encode_frame(source, payload, timestamp)
+        with self.lock:
+            if self.f.closed:
+                return
+            self.f.write(frame)
+            self.f.flush()
+            self.frames += 1
+            self.bytes_written += len(frame)
+
+    def close(self):
+        with self.lock:
+            self.f.close()
+        logger.info(
+            "Recorded %d frames, %d bytes to %s",
+            self.frames,
+            self.bytes_written,
+            self.path,
+        )
+
+
+def read_frames(f):
+    """
+    Yields `(source, timestamp, payload)` from a record file object. A frame
+    truncated at the end (e.g. mactop was killed while writing) is ignored.
+    """
+    if f.read(len(MAGIC)) != MAGIC:
+        raise RecordFormatError("not a mactop record file")
+
+    while True:
+        header = f.read(FRAME_HEADER.size)
+        if not header:
+            return
+        if len(header) < FRAME_HEADER.size:
+            logger.warning("Record file ends with a truncated frame header")
+            return
+        source_id, timestamp, length = FRAME_HEADER.unpack(header)
+        compressed = f.read(length)
+        if len(compressed) < length:
+            logger.warning("Record file ends with a truncated frame")
+            return
+
+        source = SOURCES_BY_ID.get(source_id)
+        if source is None:
+            logger.warning("Unknown source id %d in record file, skip", source_id)
+            continue
+        yield source, timestamp, zlib.decompress(compressed)
+
+
+def replay(
+    f,
+    interval,
+    speed=1.0,
+    stop_event=None,
+    history_size=DEFAULT_HISTORY_SIZE,
+    recorder=None,
+):
+    """
+    Publish the recorded samples in order. Samples are spaced out the same as
+    when they were recorded, divided by `speed`, speed 0 means as fast as
+    possible. Returns the count of samples replayed.
+
+    Histories which depend on time (the battery charging rate) are stamped
+    with the recorded time of the samples, not the time they are replayed.
+    """
+    start = time.monotonic()
+    first_timestamp = None
+    count = 0
+
+    for source, timestamp, payload in read_frames(f):
+        if first_timestamp is None:
+            first_timestamp = timestamp
+
+        if speed:
+            due = start + (timestamp - first_timestamp) / speed
+            wait = due - time.monotonic()
+            if stop_event is not None:
+                if stop_event.wait(max(wait, 0)):
+                    break
+            elif wait > 0:
+                time.sleep(wait)
+        elif stop_event is not None and stop_event.is_set():
+            break
+
+        if source is MetricsSource.POWERMETRICS:
+            handle_sample(
+                payload, interval, history_size=history_size, recorder=recorder
+            )
+        elif source is MetricsSource.IOREG:
+            handle_ioreg_sample(payload, recorder=recorder, timestamp=timestamp)
+        elif source is MetricsSource.PSUTIL:
+            handle_psutil_sample(payload, recorder=recorder)
+        count += 1
+
+    logger.info("Replay finished, %d samples replayed", count)
+    return count
+
+
+class ReplayManager:
+    def __init__(
+        self,
+        filepath,
+        interval,
+        speed=1.0,
+        history_size=DEFAULT_HISTORY_SIZE,
+        recorder=None,
+    ) -> None:
+        self.filepath = filepath
+        self.interval = interval
+        self.speed = speed
+        self.history_size = history_size
+        self.recorder = recorder
+        self.exited_event = threading.Event()
+
+    def start(self):
+        def replay_thread(stop_event):
+            try:
+                with open(self.filepath, "rb") as f:
+                    replay(
+                        f,
+                        self.interval,
+                        speed=self.speed,
+                        stop_event=stop_event,
+                        history_size=self.history_size,
+                        recorder=self.recorder,
+                    )
+            except Exception as e:
+                logger.exception(e)
+
+        t = threading.Thread(
+            target=replay_thread, args=(self.exited_event,), daemon=True
+        )
+        t.start()
+
+        logger.info("Background replay thread started, speed=%s.", self.speed)
+
+    def stop(self):
+        self.exited_event.set()
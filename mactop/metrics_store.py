@@ -1,9 +1,20 @@
+from array import array
+from collections import deque
 from dataclasses import dataclass, field
+import enum
+from functools import lru_cache
+import heapq
+import itertools
+import logging
+import time
 
 import psutil
-from mactop.utils import RWLock
-from typing import List, Tuple
-import enum
+from typing import List
+
+DEFAULT_HISTORY_SIZE = 100
+# seconds of battery capacity history to keep
+DEFAULT_BATTERY_RETENTION = 60 * 60
+logger = logging.getLogger(__name__)
 
 
 class ProcessorType(enum.Enum):
@@ -11,6 +22,244 @@ class ProcessorType(enum.Enum):
     M1 = "M1"
 
 
+class MetricsSource(enum.Enum):
+    POWERMETRICS = "powermetrics"
+    IOREG = "ioreg"
+    PSUTIL = "psutil"
+
+
+class RingBuffer:
+    """
+    Fixed capacity history of numbers, the oldest values are dropped when full.
+
+    Values are appended to an array with room for `SEGMENTS` times the
+    capacity, so the latest values are always contiguous and `view()` returns
+    them as a memoryview, no copy is needed for reading.
+
+    A slot is never written twice: when the array is full, the latest values
+    are copied to the start of a new array. So a view never changes, and a
+    `snapshot()` is published without copying the values.
+    """
+
+    # the array is replaced once every (SEGMENTS - 1) * capacity appends
+    SEGMENTS = 4
+
+    def __init__(self, capacity=DEFAULT_HISTORY_SIZE, typecode="d") -> None:
+        if capacity < 1:
+            raise ValueError(f"capacity must be positive, got {capacity}")
+        self.capacity = capacity
+        self.typecode = typecode
+        self._data = array(typecode, [0]) * (capacity * self.SEGMENTS)
+        self._end = 0
+        # total values ever appended
+        self.count = 0
+
+    def append(self, value):
+        # a missing value is not a sample, it shouldn't show as 0
+        if value is None:
+            return
+        end = self._end
+        if end == len(self._data):
+            keep = self.capacity - 1
+            data = array(self.typecode, [0]) * len(self._data)
+            data[:keep] = self._data[end - keep : end]
+            self._data = data
+            end = keep
+        self._data[end] = value
+        self._end = end + 1
+        self.count += 1
+
+    def view(self, size=None):
+        """
+        Return the latest `size` values (all of them by default), oldest first.
+        """
+        length = len(self)
+        if size is not None:
+            length = min(size, length)
+        end = self._end
+        return memoryview(self._data)[end - length : end].toreadonly()
+
+    def last(self):
+        if not self.count:
+            return None
+        return self._data[self._end - 1]
+
+    def snapshot(self) -> "HistorySnapshot":
+        return HistorySnapshot(self, self.count, self.view())
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def __iter__(self):
+        return iter(self.view())
+
+    def __getitem__(self, index):
+        return self.view()[index]
+
+    def __repr__(self):
+        return f"RingBuffer(capacity={self.capacity}, {self.view().tolist()})"
+
+
+class HistorySnapshot:
+    """
+    The values of a RingBuffer when a sample was published, they never change
+    while the collector goes on appending to the RingBuffer.
+
+    Read the same as a RingBuffer. `buffer` is the RingBuffer it was taken
+    from, only for the collector to append the next sample to.
+    """
+
+    def __init__(self, buffer: RingBuffer, count, values: memoryview) -> None:
+        self.buffer = buffer
+        self.capacity = buffer.capacity
+        self.count = count
+        self._values = values
+
+    def view(self, size=None):
+        values = self._values
+        if size is None or size >= len(values):
+            return values
+        return values[len(values) - size :]
+
+    def last(self):
+        if not self._values:
+            return None
+        return self._values[-1]
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __getitem__(self, index):
+        return self._values[index]
+
+    def __repr__(self):
+        return f"HistorySnapshot(count={self.count}, {self._values.tolist()})"
+
+    def __getstate__(self):
+        # sent to the viewers of a daemon, the values only, not the buffer
+        values = array(self._values.format)
+        values.frombytes(self._values.cast("B"))
+        return self.capacity, self.count, values
+
+    def __setstate__(self, state):
+        self.capacity, self.count, values = state
+        self.buffer = None
+        self._values = memoryview(values).toreadonly()
+
+
+class BatteryCapacityHistory:
+    """
+    Battery capacity over time, run-length encoded.
+
+    Capacity changes about once a minute, so instead of storing every sample,
+    one run of `(start, last_seen, capacity)` is kept for each capacity value.
+    Runs not seen in the last `retention` seconds are dropped.
+
+    The charging rate is updated when a new run starts, from the starts of the
+    last two runs. The first run is never used for it, since we don't know
+    when it really started.
+    """
+
+    # seconds, a run starts when the capacity change is seen, up to one poll
+    # late, the rate is over about a minute, polling at least this often keeps
+    # its error within 5%
+    RESOLUTION = 3
+
+    def __init__(self, retention=DEFAULT_BATTERY_RETENTION) -> None:
+        self.retention = retention
+        self.runs = deque()
+        self.last_change = None
+        # mAh per minute, None before we saw two changes
+        self.minute_rate = None
+
+    def append(self, timestamp, capacity):
+        runs = self.runs
+        if runs and runs[-1][2] == capacity:
+            runs[-1] = (runs[-1][0], timestamp, capacity)
+        else:
+            if runs:
+                if self.last_change is not None:
+                    change_time, change_capacity = self.last_change
+                    if timestamp > change_time:
+                        self.minute_rate = (
+                            (capacity - change_capacity)
+                            / (timestamp - change_time)
+                            * 60
+                        )
+                self.last_change = (timestamp, capacity)
+            runs.append((timestamp, timestamp, capacity))
+
+        expired = timestamp - self.retention
+        while len(runs) > 1 and runs[0][1] < expired:
+            runs.popleft()
+
+    @property
+    def total_time(self):
+        if not self.runs:
+            return 0
+        return self.runs[-1][1] - self.runs[0][0]
+
+    @property
+    def accumulated(self):
+        if not self.runs:
+            return 0
+        return self.runs[-1][2] - self.runs[0][2]
+
+    def estimate_minutes(self, current_capacity, max_capacity):
+        return estimate_minutes(self.minute_rate, current_capacity, max_capacity)
+
+    def snapshot(self) -> "BatteryCapacitySnapshot":
+        return BatteryCapacitySnapshot(
+            self, len(self), self.total_time, self.accumulated, self.minute_rate
+        )
+
+    def __len__(self):
+        return len(self.runs)
+
+    def __repr__(self):
+        return f"BatteryCapacityHistory({list(self.runs)}, {self.minute_rate=})"
+
+
+def estimate_minutes(minute_rate, current_capacity, max_capacity):
+    """
+    Minutes to full when charging, or to empty when discharging, always
+    positive. None when capacity is not changing.
+    """
+    if not minute_rate:
+        return None
+    if minute_rate > 0:
+        return (max_capacity - current_capacity) / minute_rate
+    return -(current_capacity / minute_rate)
+
+
+@dataclass(frozen=True)
+class BatteryCapacitySnapshot:
+    """
+    What is published of a BatteryCapacityHistory, read the same. `history`
+    is the BatteryCapacityHistory it was taken from, only for the collector
+    to append the next sample to.
+    """
+
+    history: BatteryCapacityHistory = field(repr=False, compare=False)
+    run_count: int = 0
+    total_time: float = 0
+    accumulated: int = 0
+    minute_rate: float | None = None
+
+    def estimate_minutes(self, current_capacity, max_capacity):
+        return estimate_minutes(self.minute_rate, current_capacity, max_capacity)
+
+    def __len__(self):
+        return self.run_count
+
+    def __getstate__(self):
+        # sent to the viewers of a daemon, without the history
+        return dict(self.__dict__, history=None)
+
+
 @dataclass
 class Smc:
     cpu_die: int | None = None
@@ -31,10 +280,10 @@ class Netowrk:
     ibyte_rate: float | None = None
     obyte_rate: float | None = None
 
-    ipacket_rate_history: List[float] | None = None
-    opacket_rate_history: List[float] | None = None
-    ibyte_rate_history: List[float] | None = None
-    obyte_rate_history: List[float] | None = None
+    ipacket_rate_history: HistorySnapshot | None = None
+    opacket_rate_history: HistorySnapshot | None = None
+    ibyte_rate_history: HistorySnapshot | None = None
+    obyte_rate_history: HistorySnapshot | None = None
 
 
 @dataclass
@@ -47,7 +296,7 @@ class CPU:
 @dataclass
 class M1GPU:
     gpu_energy_ma: int | None = None
-    gpu_energy_ma_history: List[float] | None = None
+    gpu_energy_ma_history: HistorySnapshot | None = None
     idle_ratio: float | None = None
     freq_hz: float | None = None
 
@@ -75,14 +324,14 @@ class M1CPUCluster:
 @dataclass
 class M1ProcessorPackage:
     cpu_energy: float | None = None
-    cpu_energy_history: List[float] | None = None
+    cpu_energy_history: HistorySnapshot | None = None
     gpu_energy: float | None = None
     clusters: List[M1CPUCluster] | None = None
 
 
 @dataclass
 class ProcessorIntel:
-    package_watts_history: List[float] | None = None
+    package_watts_history: HistorySnapshot | None = None
     packages: List[ProcessorPackage] | None = None
 
     def get_core(self, core_index):
@@ -105,10 +354,215 @@ class Disk:
     rbytes_per_s: float | None = None
     wbytes_per_s: float | None = None
 
-    rops_per_s_history: List[float] | None = None
-    wops_per_s_history: List[float] | None = None
-    rbytes_per_s_history: List[float] | None = None
-    wbytes_per_s_history: List[float] | None = None
+    rops_per_s_history: HistorySnapshot | None = None
+    wops_per_s_history: HistorySnapshot | None = None
+    rbytes_per_s_history: HistorySnapshot | None = None
+    wbytes_per_s_history: HistorySnapshot | None = None
+
+
+# the columns tasks can be sorted by
+TASK_COLUMNS = (
+    "pid",
+    "name",
+    "energy_impact",
+    "energy_delta",
+    "cpu_ms_per_s",
+    "cputime_ns",
+)
+# the columns of the rows TaskRecords returns, trend is the recent energy
+# impact of the task, oldest first
+TASK_ROW_COLUMNS = TASK_COLUMNS + ("trend",)
+DEFAULT_TASK_LIMIT = 100
+# samples of history kept for every task, and shown in the trend
+DEFAULT_TASK_HISTORY_SIZE = 30
+TASK_TREND_SIZE = 8
+# tasks to keep history for, more tasks are not tracked
+MAX_TASK_HISTORIES = 2048
+# samples a task is not seen before its history is dropped
+TASK_EVICT_AFTER = 3
+
+
+@dataclass(frozen=True)
+class TaskQuery:
+    """
+    Which tasks a widget shows: sorted by `sort_by`, the name contains or the
+    pid is `filter`, and only the first `limit` (0 means all).
+    """
+
+    sort_by: str = "energy_impact"
+    descending: bool = True
+    filter: str = ""
+    limit: int = DEFAULT_TASK_LIMIT
+
+    def __post_init__(self):
+        if self.sort_by not in TASK_COLUMNS:
+            raise ValueError(
+                f"Can not sort tasks by {self.sort_by!r}, choose from {TASK_COLUMNS}"
+            )
+
+
+class TaskHistory:
+    """
+    Recent values of the running tasks, keyed by `(pid, started_abstime_ns)`
+    so a reused pid starts a new history.
+
+    Every task has a slot, one array per value holds the rings of `size`
+    values of all the slots. Histories of the tasks not seen for
+    TASK_EVICT_AFTER samples are dropped, at most `max_tasks` are kept.
+    """
+
+    def __init__(
+        self, size=DEFAULT_TASK_HISTORY_SIZE, max_tasks=MAX_TASK_HISTORIES
+    ) -> None:
+        self.size = size
+        self.max_tasks = max_tasks
+        # key -> slot, its values are at [slot * size, (slot + 1) * size)
+        self.slots = {}
+        self.free_slots = []
+        # values appended to every slot, the next one goes to count % size
+        self.counts = array("q")
+        self.energy_impact = array("d")
+        self.cpu_ms_per_s = array("d")
+        # key -> the sample it was last seen
+        self.last_seen = {}
+        # (sample, key) in the order they were seen, may be outdated
+        self.seen_order = deque()
+        self.samples = 0
+
+    def add_slot(self, key):
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.counts[slot] = 0
+        else:
+            slot = len(self.counts)
+            self.counts.append(0)
+            empty = array("d", [0]) * self.size
+            self.energy_impact.extend(empty)
+            self.cpu_ms_per_s.extend(empty)
+        self.slots[key] = slot
+        return slot
+
+    def update(self, records: "TaskRecords"):
+        """
+        Append the values of the sample, and fill `records.energy_delta` and
+        `records.trend`.
+        """
+        self.samples += 1
+        size = self.size
+        energy_impact = self.energy_impact
+        for i, key in enumerate(zip(records.pid, records.started)):
+            slot = self.slots.get(key)
+            if slot is None:
+                if len(self.slots) >= self.max_tasks:
+                    continue
+                slot = self.add_slot(key)
+            count = self.counts[slot]
+            start = slot * size
+            if count:
+                last = energy_impact[start + (count - 1) % size]
+                records.energy_delta[i] = records.energy_impact[i] - last
+            energy_impact[start + count % size] = records.energy_impact[i]
+            self.cpu_ms_per_s[start + count % size] = records.cpu_ms_per_s[i]
+            self.counts[slot] = count + 1
+            self.last_seen[key] = self.samples
+            self.seen_order.append((self.samples, key))
+            records.trend[i] = self.slot_trend(slot, TASK_TREND_SIZE)
+
+        expired = self.samples - TASK_EVICT_AFTER
+        while self.seen_order and self.seen_order[0][0] <= expired:
+            seen, key = self.seen_order.popleft()
+            # seen again later
+            if self.last_seen.get(key) != seen:
+                continue
+            del self.last_seen[key]
+            self.free_slots.append(self.slots.pop(key))
+
+    def slot_trend(self, slot, size):
+        """
+        The last `size` energy impacts of the slot, oldest first.
+        """
+        count = self.counts[slot]
+        size = min(size, count, self.size)
+        start = slot * self.size
+        first = (count - size) % self.size
+        end = first + size
+        if end <= self.size:
+            return tuple(self.energy_impact[start + first : start + end])
+        return tuple(
+            self.energy_impact[start + first : start + self.size]
+            + self.energy_impact[start : start + end - self.size]
+        )
+
+    def trend(self, key, size=TASK_TREND_SIZE):
+        slot = self.slots.get(key)
+        if slot is None:
+            return ()
+        return self.slot_trend(slot, size)
+
+    def __len__(self):
+        return len(self.slots)
+
+
+class TaskRecords:
+    """
+    The tasks of a sample, one array per column, so selecting from thousands
+    of tasks doesn't touch the dicts powermetrics gave.
+
+    With `history`, the history is updated with the sample, and the rows
+    have the deltas and trends from it. They are copied from the history when
+    the records are built, the history is not read afterwards.
+    """
+
+    def __init__(self, tasks, history: TaskHistory | None = None) -> None:
+        self.pid = array("q", (t["pid"] for t in tasks))
+        self.started = array("q", (t.get("started_abstime_ns", 0) for t in tasks))
+        self.name = [t["name"] for t in tasks]
+        self.energy_impact = array("d", (t.get("energy_impact", 0) for t in tasks))
+        self.cputime_ns = array("q", (t.get("cputime_ns", 0) for t in tasks))
+        self.cpu_ms_per_s = array("d", (t.get("cputime_ms_per_s", 0) for t in tasks))
+        self.energy_delta = array("d", [0]) * len(self.pid)
+        self.trend = [()] * len(self.pid)
+        if history is not None:
+            history.update(self)
+
+    def __len__(self):
+        return len(self.pid)
+
+    def row(self, i):
+        return (
+            self.pid[i],
+            self.name[i],
+            self.energy_impact[i],
+            self.energy_delta[i],
+            self.cpu_ms_per_s[i],
+            self.cputime_ns[i],
+            self.trend[i],
+        )
+
+    def match(self, text):
+        """
+        Indices of the tasks whose name contains `text`, or pid is `text`.
+        """
+        text = text.lower()
+        pid = int(text) if text.isdigit() else None
+        return [
+            i
+            for i, name in enumerate(self.name)
+            if text in name.lower() or self.pid[i] == pid
+        ]
+
+    def select(self, query: TaskQuery):
+        """
+        Returns the rows of the tasks `query` wants, in order.
+        """
+        indices = self.match(query.filter) if query.filter else range(len(self))
+        key = getattr(self, query.sort_by).__getitem__
+        if query.limit and query.limit < len(indices):
+            pick = heapq.nlargest if query.descending else heapq.nsmallest
+            indices = pick(query.limit, indices, key=key)
+        else:
+            indices = sorted(indices, key=key, reverse=query.descending)
+        return [self.row(i) for i in indices]
 
 
 @dataclass
@@ -117,7 +571,12 @@ class PowerMetrics:
     battery: PowerMetricsBattery = field(default_factory=PowerMetricsBattery)
     smc: Smc = field(default_factory=Smc)
 
+    # only when some widget queries the tasks, like the records
     tasks: List[dict] | None = None
+    task_records: TaskRecords | None = None
+    # appended by the next sample, only for the collector
+    task_history: TaskHistory | None = None
+    task_views: dict = field(default_factory=dict)
     processor_intel: ProcessorIntel = field(default_factory=ProcessorIntel)
     processor_type: ProcessorType | None = None
 
@@ -158,7 +617,7 @@ class AppleSmartBattery:
 
     adapter_details: AdapterDetails = field(default_factory=AdapterDetails)
 
-    battery_capacity_history: List[Tuple[float, int]] | None = None
+    battery_capacity_history: BatteryCapacitySnapshot | None = None
 
 
 @dataclass
@@ -203,48 +662,183 @@ class LoadAvg:
     load15: float | None = 0
 
 
+@lru_cache(maxsize=None)
+def cpu_count(logical=True):
+    """
+    psutil.cpu_count, once when first needed instead of on import, it
+    doesn't change and PsutilMetrics are created every tick.
+    """
+    return psutil.cpu_count(logical=logical)
+
+
 @dataclass
 class PsutilMetrics:
     cpu_percent_percpu: List[CPUTimesPercent] | None = None
     cpu_percent: CPUTimesPercent = field(default_factory=CPUTimesPercent)
-    cpu_count: int = psutil.cpu_count()
-    cpu_physical_count: int = psutil.cpu_count(logical=False)
+    cpu_count: int = field(default_factory=lambda: cpu_count())
+    cpu_physical_count: int = field(default_factory=lambda: cpu_count(False))
     swap_memory: SwapMemory = field(default_factory=SwapMemory)
     virtual_memory: VirtualMemory = field(default_factory=VirtualMemory)
     loadavg: LoadAvg = field(default_factory=LoadAvg)
     boot_time: float | None = None
+    # seconds between the scheduled and the actual time of the sample
+    tick_jitter: float | None = None
 
 
-@dataclass
-class Metrics:
-    powermetrics = PowerMetrics()
-    ioregmetrics = IORegMetrics()
-    psutilmetrics = PsutilMetrics()
+@dataclass(frozen=True)
+class Snapshot:
+    generation: int
+    value: object
+    # time.monotonic() when published
+    published_at: float = 0
 
-    _powermetrics_rwlock = RWLock()
-    _ioreg_rwlock = RWLock()
 
-    def get_psutilmetrics(self):
-        return self.psutilmetrics
+class Metrics:
+    """
+    Holds the latest published sample of every metrics source.
+
+    Collectors build a new metrics object for every sample and publish it with
+    `set_*`, a published object must not be changed afterwards. Publishing is
+    a single reference assignment of a frozen Snapshot, so readers always get a
+    consistent sample without any locking.
+
+    Histories are appended in place from one sample to the next, so what is
+    published are snapshots of them which never change (HistorySnapshot,
+    BatteryCapacitySnapshot, the trends of TaskRecords). The live histories
+    are carried to the next sample through the published object
+    (`HistorySnapshot.buffer`, `BatteryCapacitySnapshot.history`,
+    `PowerMetrics.task_history`), they are only for the collector, readers
+    must not use them.
+
+    Every publish takes a new generation from one shared counter, readers can
+    compare generations to tell whether anything new arrived.
+
+    Listeners are called with (source, snapshot) in the collector's thread
+    after every publish, they must be quick and must not block.
+    """
+
+    def __init__(self) -> None:
+        self._generation_counter = itertools.count(1)
+        self._powermetrics = Snapshot(0, PowerMetrics())
+        self._ioregmetrics = Snapshot(0, IORegMetrics())
+        self._psutilmetrics = Snapshot(0, PsutilMetrics())
+        self._listeners = ()
+        self._task_queries = ()
+
+    def _snapshot(self, value):
+        return Snapshot(next(self._generation_counter), value, time.monotonic())
+
+    def add_listener(self, listener):
+        # copy on write, publishers can iterate without locking
+        self._listeners = self._listeners + (listener,)
+
+    def remove_listener(self, listener):
+        self._listeners = tuple(l for l in self._listeners if l != listener)
+
+    def _notify(self, source, snapshot):
+        for listener in self._listeners:
+            try:
+                listener(source, snapshot)
+            except Exception:
+                logger.exception("Error when notify %s sample to %s", source, listener)
+
+    def add_task_query(self, query: TaskQuery):
+        """
+        The collector selects the tasks for the queries added, the same
+        query can be added more than once.
+        """
+        self._task_queries = self._task_queries + (query,)
+
+    def remove_task_query(self, query: TaskQuery):
+        queries = list(self._task_queries)
+        if query in queries:
+            queries.remove(query)
+        self._task_queries = tuple(queries)
+
+    def get_task_queries(self):
+        return set(self._task_queries)
+
+    def get_psutilmetrics(self) -> PsutilMetrics:
+        return self._psutilmetrics.value
+
+    def get_psutilmetrics_snapshot(self) -> Snapshot:
+        return self._psutilmetrics
 
     def set_psutilmetrics(self, p: PsutilMetrics):
-        self.psutilmetrics = p
+        self._psutilmetrics = snapshot = self._snapshot(p)
+        self._notify(MetricsSource.PSUTIL, snapshot)
+
+    def get_powermetrics(self) -> PowerMetrics:
+        return self._powermetrics.value
+
+    def get_powermetrics_snapshot(self) -> Snapshot:
+        return self._powermetrics
 
-    def get_powermetrics(self):
-        with self._powermetrics_rwlock.r_locked():
-            return self.powermetrics
+    def set_powermetrics(self, p: PowerMetrics):
+        self._powermetrics = snapshot = self._snapshot(p)
+        self._notify(MetricsSource.POWERMETRICS, snapshot)
 
-    def set_powermetrics(self, metrics):
-        with self._powermetrics_rwlock.w_locked():
-            self.ioregmetrics = metrics
+    def get_ioregmetrics(self) -> IORegMetrics:
+        return self._ioregmetrics.value
 
-    def get_ioregmetrics(self):
-        with self._ioreg_rwlock.r_locked():
-            return self.ioregmetrics
+    def get_ioregmetrics_snapshot(self) -> Snapshot:
+        return self._ioregmetrics
 
-    def set_ioregmetrics(self, metrics):
-        with self._ioreg_rwlock.w_locked():
-            self.ioregmetrics = metrics
+    def set_ioregmetrics(self, i: IORegMetrics):
+        self._ioregmetrics = snapshot = self._snapshot(i)
+        self._notify(MetricsSource.IOREG, snapshot)
+
+    def get_latest_generation(self) -> int:
+        return max(
+            self._powermetrics.generation,
+            self._ioregmetrics.generation,
+            self._psutilmetrics.generation,
+        )
+
+    def get_latest_published_at(self) -> float:
+        return max(
+            self._powermetrics.published_at,
+            self._ioregmetrics.published_at,
+            self._psutilmetrics.published_at,
+        )
+
+    def get_generation(self, source: MetricsSource) -> int:
+        if source is MetricsSource.POWERMETRICS:
+            return self._powermetrics.generation
+        if source is MetricsSource.IOREG:
+            return self._ioregmetrics.generation
+        return self._psutilmetrics.generation
 
 
 metrics = Metrics()
+
+
+@dataclass
+class RefreshStats:
+    refreshed: int = 0
+    skipped: int = 0
+    # seconds from the latest sample published to widgets refreshed
+    latency: float = 0
+
+
+refresh_stats = RefreshStats()
+
+
+@dataclass
+class PipelineStats:
+    # samples read from the collector
+    received: int = 0
+    # samples parsed and published
+    handled: int = 0
+    # samples dropped because the parser fell behind
+    dropped: int = 0
+    # samples waiting in the queue now, and the most ever waited
+    depth: int = 0
+    max_depth: int = 0
+    # seconds the latest sample waited in the queue, and took to parse
+    wait_latency: float = 0
+    handle_latency: float = 0
+
+
+powermetrics_pipeline_stats = PipelineStats()
+
@@ -1,66 +1,51 @@
-from mactop.panels.battery import BacklightDisplayText, BatteryPanel
-from mactop.panels.cpu_freq import CPUFreqPanel
-from mactop.panels.cpu_percpu_usage import CPUUsageBarPanel
-from mactop.panels.cpu_total_usage_bar import CPUTotalUsageBarPanel
-from mactop.panels.cpu_total_usage_text import CPUTotalUsageTextPanel
-from mactop.panels.disk import (
-    DiskIOBytesPerSText,
-    DiskIOOpsPerSText,
-    DiskRBytesPerSSparkline,
-    DiskROpsPerSSparkline,
-    DiskWBytesPerSSparkline,
-    DiskWOpsPerSSparkline,
-)
-from mactop.panels.energy import IntelProcessorEnergyPanel
-from mactop.panels.loadavg import LoadAvgText
-from mactop.panels.m1_cpu import M1CPUEnergyPanel
-from mactop.panels.m1_gpu import GPUFreqText, GPUUsageBarPanel, M1GPUEnergyPanel
-from mactop.panels.m1cpu_freq import M1CPUFreqPanel
-from mactop.panels.network_iobyte_rate_text import NetworkIOByteRateText
-from mactop.panels.network_iopacket_rate_text import NetworkIOPacketRateText
-from mactop.panels.network_sparkline import (
-    NetworkIByteRateSparkline,
-    NetworkIPacketRateSparkline,
-    NetworkOByteRateSparkline,
-    NetworkOPacketRateSparkline,
+from mactop.registry import Registry
+
+# only the panels used by the theme are imported
+PANELS = Registry(
+    {
+        "SensorsPanel": "mactop.panels.sensors:SensorsPanel",
+        "BatteryPanel": "mactop.panels.battery:BatteryPanel",
+        "TaskTable": "mactop.panels.tasks:TaskTable",
+        "IntelProcessorEnergyPanel": "mactop.panels.energy:IntelProcessorEnergyPanel",
+        "CPUTotalUsageBarPanel": "mactop.panels.cpu_total_usage_bar:CPUTotalUsageBarPanel",
+        "CPUTotalUsageTextPanel": "mactop.panels.cpu_total_usage_text:CPUTotalUsageTextPanel",
+        "CPUUsageBarPanel": "mactop.panels.cpu_percpu_usage:CPUUsageBarPanel",
+        "NetworkIOByteRateText": "mactop.panels.network_iobyte_rate_text:NetworkIOByteRateText",
+        "NetworkIByteRateSparkline": "mactop.panels.network_sparkline:NetworkIByteRateSparkline",
+        "NetworkOByteRateSparkline": "mactop.panels.network_sparkline:NetworkOByteRateSparkline",
+        "NetworkIPacketRateSparkline": "mactop.panels.network_sparkline:NetworkIPacketRateSparkline",
+        "NetworkOPacketRateSparkline": "mactop.panels.network_sparkline:NetworkOPacketRateSparkline",
+        "NetworkIOPacketRateText": "mactop.panels.network_iopacket_rate_text:NetworkIOPacketRateText",
+        "SwapMemoryInOutText": "mactop.panels.swap_memory:SwapMemoryInOutText",
+        "SwapMemoryUsageVBar": "mactop.panels.swap_memory:SwapMemoryUsageVBar",
+        "MemoryStatsText": "mactop.panels.virtual_memory:MemoryStatsText",
+        "MemoryUsageVBar": "mactop.panels.virtual_memory:MemoryUsageVBar",
+        "DiskIOOpsPerSText": "mactop.panels.disk:DiskIOOpsPerSText",
+        "DiskIOBytesPerSText": "mactop.panels.disk:DiskIOBytesPerSText",
+        "DiskROpsPerSSparkline": "mactop.panels.disk:DiskROpsPerSSparkline",
+        "DiskWOpsPerSSparkline": "mactop.panels.disk:DiskWOpsPerSSparkline",
+        "DiskRBytesPerSSparkline": "mactop.panels.disk:DiskRBytesPerSSparkline",
+        "DiskWBytesPerSSparkline": "mactop.panels.disk:DiskWBytesPerSSparkline",
+        "LoadAvgText": "mactop.panels.loadavg:LoadAvgText",
+        "UptimeText": "mactop.panels.uptime:UptimeText",
+        "CPUFreqPanel": "mactop.panels.cpu_freq:CPUFreqPanel",
+        "GPUFreqText": "mactop.panels.m1_gpu:GPUFreqText",
+        "GPUUsageBarPanel": "mactop.panels.m1_gpu:GPUUsageBarPanel",
+        "M1GPUEnergyPanel": "mactop.panels.m1_gpu:M1GPUEnergyPanel",
+        "M1CPUEnergyPanel": "mactop.panels.m1_cpu:M1CPUEnergyPanel",
+        "M1CPUFreqPanel": "mactop.panels.m1cpu_freq:M1CPUFreqPanel",
+        "BacklightDisplayText": "mactop.panels.battery:BacklightDisplayText",
+        "RefreshStatsText": "mactop.panels.refresh_stats:RefreshStatsText",
+    },
+    "mactop.panels",
 )
-from mactop.panels.sensors import SensorsPanel
-from mactop.panels.swap_memory import SwapMemoryInOutText, SwapMemoryUsageVBar
-from mactop.panels.tasks import TaskTable
-from mactop.panels.uptime import UptimeText
-from mactop.panels.virtual_memory import MemoryStatsText, MemoryUsageVBar
 
-PANELS = {
-    "SensorsPanel": SensorsPanel,
-    "BatteryPanel": BatteryPanel,
-    "TaskTable": TaskTable,
-    "IntelProcessorEnergyPanel": IntelProcessorEnergyPanel,
-    "CPUTotalUsageBarPanel": CPUTotalUsageBarPanel,
-    "CPUTotalUsageTextPanel": CPUTotalUsageTextPanel,
-    "CPUUsageBarPanel": CPUUsageBarPanel,
-    "NetworkIOByteRateText": NetworkIOByteRateText,
-    "NetworkIByteRateSparkline": NetworkIByteRateSparkline,
-    "NetworkOByteRateSparkline": NetworkOByteRateSparkline,
-    "NetworkIPacketRateSparkline": NetworkIPacketRateSparkline,
-    "NetworkOPacketRateSparkline": NetworkOPacketRateSparkline,
-    "NetworkIOPacketRateText": NetworkIOPacketRateText,
-    "SwapMemoryInOutText": SwapMemoryInOutText,
-    "SwapMemoryUsageVBar": SwapMemoryUsageVBar,
-    "MemoryStatsText": MemoryStatsText,
-    "MemoryUsageVBar": MemoryUsageVBar,
-    "DiskIOOpsPerSText": DiskIOOpsPerSText,
-    "DiskIOBytesPerSText": DiskIOBytesPerSText,
-    "DiskROpsPerSSparkline": DiskROpsPerSSparkline,
-    "DiskWOpsPerSSparkline": DiskWOpsPerSSparkline,
-    "DiskRBytesPerSSparkline": DiskRBytesPerSSparkline,
-    "DiskWBytesPerSSparkline": DiskWBytesPerSSparkline,
-    "LoadAvgText": LoadAvgText,
-    "UptimeText": UptimeText,
-    "CPUFreqPanel": CPUFreqPanel,
-    "GPUFreqText": GPUFreqText,
-    "GPUUsageBarPanel": GPUUsageBarPanel,
-    "M1GPUEnergyPanel": M1GPUEnergyPanel,
-    "M1CPUEnergyPanel": M1CPUEnergyPanel,
-    "M1CPUFreqPanel": M1CPUFreqPanel,
-    "BacklightDisplayText": BacklightDisplayText,
-}
+
+def __getattr__(name):
+    """
+    The builtin panel classes, e.g. `from mactop.panels import TaskTable`,
+    imported on first use.
+    """
+    if name in PANELS.builtin:
+        return PANELS[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
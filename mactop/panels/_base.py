@@ -1,6 +1,7 @@
 import logging
 from textual.widgets import Static
 from textual.app import ComposeResult
+from mactop.metrics_store import MetricsSource
 from mactop.widgets import LabeledSparkline
 
 
@@ -8,6 +9,9 @@ logger = logging.getLogger(__name__)
 
 
 class BaseStatic(Static):
+    # a panel sets POWERMETRICS_KEYS, the PowerMetrics fields it uses (see
+    # SAMPLER_BY_KEY), all the samplers are run for a panel without it
+
     def __init__(self, refresh_interval, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.refresh_interval = float(refresh_interval)
@@ -21,12 +25,21 @@ class SparkLinePanelBase(BaseStatic):
     """
 
     def __init__(
-        self, update_fn, label, reverse, show_value, value_format_fn, *args, **kwargs
+        self,
+        update_fn,
+        label,
+        reverse,
+        show_value,
+        value_format_fn,
+        source: MetricsSource | None = None,
+        *args,
+        **kwargs,
     ):
         super().__init__(*args, **kwargs)
         self.label = label
         self.reverse = reverse
         self.update_fn = update_fn
+        self.source = source
 
         if show_value:
             self.format_fn = value_format_fn
@@ -42,4 +55,5 @@ class SparkLinePanelBase(BaseStatic):
             update_interval=self.refresh_interval,
             prefix_label=self.label,
             sparkline_reverse=self.reverse,
+            source=self.source,
         )
@@ -4,7 +4,8 @@ from textual.app import ComposeResult
 from textual.containers import Vertical
 from textual.reactive import reactive
 
-from mactop.metrics_store import metrics
+from mactop.metrics_store import MetricsSource, metrics
+from mactop.scheduler import schedule_refresh
 from mactop.widgets import DynamicText, LabelProgressWidget
 from ._base import BaseStatic
 
@@ -17,7 +18,12 @@ class ChargerDispaly(BaseStatic):
     charging = reactive(None)
 
     def on_mount(self) -> None:
-        self.set_interval(self.refresh_interval, self.update_adapter)
+        schedule_refresh(
+            self,
+            self.update_adapter,
+            self.refresh_interval,
+            source=MetricsSource.IOREG,
+        )
 
     def update_adapter(self) -> None:
         if (ioreg := metrics.get_ioregmetrics()) is not None:
@@ -65,14 +71,20 @@ class ChargerDispaly(BaseStatic):
 
 
 class BacklightDisplayText(BaseStatic):
+    POWERMETRICS_KEYS = ("backlight",)
     backlight = reactive("loading")
 
     def on_mount(self) -> None:
         """Event handler called when widget is added to the app."""
-        self.set_interval(self.refresh_interval, self.update_backlight)
+        schedule_refresh(
+            self,
+            self.update_backlight,
+            self.refresh_interval,
+            source=MetricsSource.POWERMETRICS,
+        )
 
     def update_backlight(self) -> None:
-        if (backlight := metrics.powermetrics.backlight) is not None:
+        if (backlight := metrics.get_powermetrics().backlight) is not None:
             self.backlight = backlight
 
     def watch_backlight(self, backlight: int) -> None:
@@ -83,7 +95,12 @@ class BatteryHealthInfo(BaseStatic):
     capacity = reactive(None)
 
     def on_mount(self) -> None:
-        self.set_interval(self.refresh_interval, self.update_capacity)
+        schedule_refresh(
+            self,
+            self.update_capacity,
+            self.refresh_interval,
+            source=MetricsSource.IOREG,
+        )
 
     def update_capacity(self) -> None:
         if (ioreg := metrics.get_ioregmetrics()) is not None:
@@ -118,39 +135,12 @@ class ChargingRateDisplay(BaseStatic):
 
     def on_mount(self) -> None:
         """Event handler called when widget is added to the app."""
-        self.set_interval(self.refresh_interval, self.update_charing_history)
-
-    def _get_last_change(self, charging_history):
-        """
-        Returns the last changed time range:
-        A 1, B 1, C 2, D 2, E 2, F 3, G 3
-        should return C 2 and F 3
-        """
-        changes_last = None
-        changes_start = None
-
-        if len(charging_history) < 2:
-            return None, None
-
-        for item in charging_history[::-1]:
-            if not changes_last:
-                changes_last = item
-                continue
-
-            if changes_last[1] == item[1]:
-                changes_last = item
-                continue
-
-            if not changes_start:
-                changes_start = item
-                continue
-
-            if changes_start[1] == item[1]:
-                changes_start = item
-            else:
-                return changes_start, changes_last
-
-        return None, None
+        schedule_refresh(
+            self,
+            self.update_charing_history,
+            self.refresh_interval,
+            source=MetricsSource.IOREG,
+        )
 
     def update_charing_history(self) -> None:
         ioreg_metrics = metrics.get_ioregmetrics()
@@ -165,39 +155,19 @@ class ChargingRateDisplay(BaseStatic):
         if not charging_history or not max_cap or not curr_cap:
             return
 
-        if len(charging_history) < 2:
+        minrate = charging_history.minute_rate
+        if minrate is None:
             return
 
-        last_item = charging_history[-1]
-        first_item = charging_history[0]
-
         new_bs = BatteryState()
-        new_bs.total_time = last_item[0] - first_item[0]
-        new_bs.history_accumulated = last_item[1] - first_item[1]
-
-        changes_start, changes_last = self._get_last_change(charging_history)
-
-        if not changes_start or not changes_last:
-            return
-
-        minrate = new_bs.minute_rate = (
-            (changes_last[1] - changes_start[1])
-            / (changes_last[0] - changes_start[0])
-            * 60
+        new_bs.total_time = charging_history.total_time
+        new_bs.history_accumulated = charging_history.accumulated
+        new_bs.minute_rate = minrate
+        new_bs.estimate_minutes = (
+            charging_history.estimate_minutes(curr_cap, max_cap) or 0
         )
 
-        logger.info("------> min rate changed")
-
-        if minrate > 0:
-            new_bs.estimate_minutes = (max_cap - curr_cap) / minrate
-
-        if minrate < 0:
-            new_bs.estimate_minutes = -(curr_cap / minrate)
-
-        logger.debug(
-            f"{changes_start=}, {changes_last=}, {minrate=},"
-            f" {self.battery_state.estimate_minutes=}"
-        )
+        logger.debug(f"{charging_history=}, {new_bs=}")
         self.battery_state = new_bs
 
     def watch_battery_state(self, battery_state: BatteryState) -> None:
@@ -225,6 +195,8 @@ class ChargingRateDisplay(BaseStatic):
 
 
 class BatteryPanel(BaseStatic):
+    POWERMETRICS_KEYS = ()
+
     DEFAULT_CSS = """
     BatteryPanel {
         border-title-align: left;
@@ -241,6 +213,7 @@ class BatteryPanel(BaseStatic):
                 progress_total_update_fn=lambda: metrics.get_ioregmetrics().apple_smart_battery.apple_raw_max_capacity,
                 value_render_fn=lambda cput: f"{cput:.0f} mAh",
                 update_interval=self.refresh_interval,
+                source=MetricsSource.IOREG,
                 progress_total=8000,
                 prefix_label="Capacity",
             ),
@@ -250,12 +223,14 @@ class BatteryPanel(BaseStatic):
                 update_fn=lambda: metrics.get_ioregmetrics().apple_smart_battery.temperature,
                 value_render_fn=lambda cput: cput is not None and f"{cput/100:.1f} °C",
                 update_interval=self.refresh_interval,
+                source=MetricsSource.IOREG,
             ),
             DynamicText(
                 prefix_label="Cycle Count:",
                 update_fn=lambda: metrics.get_ioregmetrics().apple_smart_battery.cycle_count,
                 value_render_fn=lambda value: f"{value}",
                 update_interval=self.refresh_interval,
+                source=MetricsSource.IOREG,
             ),
             BatteryHealthInfo(refresh_interval=self.refresh_interval),
         )
@@ -6,7 +6,7 @@ from textual.app import ComposeResult
 from functools import partial
 
 from mactop.widgets import DynamicText
-from mactop.metrics_store import CPUCore, metrics
+from mactop.metrics_store import CPUCore, MetricsSource, metrics
 from ._base import BaseStatic
 from mactop.utils.formatting import hz_format
 from mactop.widgets import LabeledColorBar
@@ -65,6 +65,7 @@ class CPUCoreBlock(BaseStatic):
     def compose(self) -> ComposeResult:
         yield LabeledColorBar(
             update_interval=self.refresh_interval,
+            source=MetricsSource.POWERMETRICS,
             prefix_label=CSTATE_LABEL,
             color_choices=[const.COLOR_C_STATE, const.COLOR_P_STATE],
             percentages_update_fn=self.get_cp_state,
@@ -76,6 +77,7 @@ class CPUCoreBlock(BaseStatic):
             value_render_fn=display_callback,
             classes="cpucore-display-block",
             update_interval=self.refresh_interval,
+            source=MetricsSource.POWERMETRICS,
         )
 
     def render(self, *args, **kwargs):
@@ -89,6 +91,7 @@ def get_package_info(core_index):
 
 
 class CPUFreqPanel(BaseStatic):
+    POWERMETRICS_KEYS = ("processor_intel",)
     BORDER_TITLE = "CPU Frequency"
     DEFAULT_CSS = """
     CPUFreqPanel {
@@ -100,7 +103,7 @@ class CPUFreqPanel(BaseStatic):
     """
 
     def __init__(self, *args, **kwargs):
-        self.core_count = metrics.psutilmetrics.cpu_physical_count
+        self.core_count = metrics.get_psutilmetrics().cpu_physical_count
         super().__init__(*args, **kwargs)
 
     def on_resize(self, e):
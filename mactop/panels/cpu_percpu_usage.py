@@ -5,7 +5,7 @@ from functools import partial
 from textual.app import ComposeResult
 
 from mactop.widgets import LabeledColorBar
-from mactop.metrics_store import metrics
+from mactop.metrics_store import MetricsSource, metrics
 from mactop.utils.formatting import render_cpu_percentage_100
 from ._base import BaseStatic
 from mactop import const
@@ -15,7 +15,7 @@ logger = logging.getLogger(__name__)
 
 
 def get_percpu_percent(index):
-    cpus = metrics.psutilmetrics.cpu_percent_percpu
+    cpus = metrics.get_psutilmetrics().cpu_percent_percpu
     if not cpus:
         return [0, 0, 0, 0]
     cpu_percent = cpus[index]
@@ -28,6 +28,7 @@ def get_percpu_percent(index):
 
 
 class CPUUsageBarPanel(BaseStatic):
+    POWERMETRICS_KEYS = ()
     BORDER_TITLE = "CPU"
 
     DEFAULT_CSS = """
@@ -57,7 +58,7 @@ class CPUUsageBarPanel(BaseStatic):
 
     def compose(self) -> ComposeResult:
         self.styles.grid_size_columns = self.columns
-        cpu_count = metrics.psutilmetrics.cpu_count
+        cpu_count = metrics.get_psutilmetrics().cpu_count
         for index in range(cpu_count):
             yield LabeledColorBar(
                 prefix_label=f"[#FFFFE0]{index:>2}[/#FFFFE0]",
@@ -70,4 +71,5 @@ class CPUUsageBarPanel(BaseStatic):
                 percentages_update_fn=partial(get_percpu_percent, index=index),
                 value_render_fn=render_cpu_percentage_100,
                 update_interval=self.refresh_interval,
+                source=MetricsSource.PSUTIL,
             )
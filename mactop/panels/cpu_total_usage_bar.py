@@ -5,7 +5,7 @@ from textual.app import ComposeResult
 from textual.containers import Vertical
 
 from mactop.widgets import LabeledColorBar
-from mactop.metrics_store import metrics
+from mactop.metrics_store import MetricsSource, metrics
 from mactop.utils.formatting import render_cpu_percentage_1
 from ._base import BaseStatic
 from mactop import const
@@ -28,6 +28,7 @@ def get_cpu_percentage():
 
 
 class CPUTotalUsageBarPanel(BaseStatic):
+    POWERMETRICS_KEYS = ()
     BORDER_TITLE = "CPU"
 
     DEFAULT_CSS = """
@@ -67,5 +68,6 @@ class CPUTotalUsageBarPanel(BaseStatic):
                 percentages_update_fn=get_cpu_percentage,
                 value_render_fn=render_cpu_percentage_1,
                 update_interval=self.refresh_interval,
+                source=MetricsSource.PSUTIL,
             ),
         )
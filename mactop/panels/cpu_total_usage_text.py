@@ -11,6 +11,8 @@ from ._base import BaseStatic
 
 from .cpu_total_usage_bar import get_cpu_percentage
 from mactop import const
+from mactop.metrics_store import MetricsSource
+from mactop.scheduler import schedule_refresh
 
 
 logger = logging.getLogger(__name__)
@@ -39,6 +41,7 @@ class Legend(Widget):
 
 
 class CPUTotalUsageTextPanel(BaseStatic):
+    POWERMETRICS_KEYS = ()
     BORDER_TITLE = "CPU"
 
     DEFAULT_CSS = """
@@ -74,7 +77,12 @@ class CPUTotalUsageTextPanel(BaseStatic):
         self.color_idle = color_idle
 
     def on_mount(self):
-        self.set_interval(self.refresh_interval, self.update_percentages)
+        schedule_refresh(
+            self,
+            self.update_percentages,
+            self.refresh_interval,
+            source=MetricsSource.PSUTIL,
+        )
 
     def update_percentages(self):
         self.percentages = get_cpu_percentage()
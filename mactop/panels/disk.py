@@ -2,7 +2,7 @@ from textual.widgets import Label
 from textual.app import ComposeResult
 
 from mactop.widgets import DynamicText
-from mactop.metrics_store import metrics
+from mactop.metrics_store import MetricsSource, metrics
 from mactop.utils.formatting import packet_speed_fmt, speed_sizeof_fmt
 from ._base import BaseStatic
 from ._base import SparkLinePanelBase
@@ -13,6 +13,7 @@ def format_ops(value):
 
 
 class DiskIOOpsPerSText(BaseStatic):
+    POWERMETRICS_KEYS = ("disk",)
     BORDER_TITLE = "Disk IO"
 
     DEFAULT_CSS = """
@@ -36,6 +37,7 @@ class DiskIOOpsPerSText(BaseStatic):
             value_render_fn=format_ops,
             classes="disk-io",
             update_interval=self.refresh_interval,
+            source=MetricsSource.POWERMETRICS,
         )
         yield Label(" " * 5, classes="disk-ops-prefix")
         yield DynamicText(
@@ -44,10 +46,12 @@ class DiskIOOpsPerSText(BaseStatic):
             value_render_fn=format_ops,
             classes="disk-io",
             update_interval=self.refresh_interval,
+            source=MetricsSource.POWERMETRICS,
         )
 
 
 class DiskIOBytesPerSText(BaseStatic):
+    POWERMETRICS_KEYS = ("disk",)
     BORDER_TITLE = "Disk IO"
 
     DEFAULT_CSS = """
@@ -71,6 +75,7 @@ class DiskIOBytesPerSText(BaseStatic):
             value_render_fn=speed_sizeof_fmt,
             classes="disk-io",
             update_interval=self.refresh_interval,
+            source=MetricsSource.POWERMETRICS,
         )
         yield Label(" " * 5, classes="disk-bytes-prefix")
         yield DynamicText(
@@ -79,10 +84,12 @@ class DiskIOBytesPerSText(BaseStatic):
             value_render_fn=speed_sizeof_fmt,
             classes="disk-io",
             update_interval=self.refresh_interval,
+            source=MetricsSource.POWERMETRICS,
         )
 
 
 class DiskROpsPerSSparkline(SparkLinePanelBase):
+    POWERMETRICS_KEYS = ("disk",)
     BORDER_TITLE = "Disk Read Ops Per Second"
 
     def __init__(self, label="R: ", reverse=False, show_value=True, *args, **kwargs):
@@ -92,6 +99,7 @@ class DiskROpsPerSSparkline(SparkLinePanelBase):
             label=label,
             reverse=reverse,
             show_value=show_value,
+            source=MetricsSource.POWERMETRICS,
             value_format_fn=format_ops,
             *args,
             **kwargs
@@ -99,6 +107,7 @@ class DiskROpsPerSSparkline(SparkLinePanelBase):
 
 
 class DiskWOpsPerSSparkline(SparkLinePanelBase):
+    POWERMETRICS_KEYS = ("disk",)
     BORDER_TITLE = "Disk Write Ops Per Second"
 
     def __init__(self, label="W: ", reverse=True, show_value=True, *args, **kwargs):
@@ -108,6 +117,7 @@ class DiskWOpsPerSSparkline(SparkLinePanelBase):
             label=label,
             reverse=reverse,
             show_value=show_value,
+            source=MetricsSource.POWERMETRICS,
             value_format_fn=format_ops,
             *args,
             **kwargs
@@ -115,6 +125,7 @@ class DiskWOpsPerSSparkline(SparkLinePanelBase):
 
 
 class DiskRBytesPerSSparkline(SparkLinePanelBase):
+    POWERMETRICS_KEYS = ("disk",)
     BORDER_TITLE = "Disk Read Bytes Per Second"
 
     def __init__(self, label="R: ", reverse=False, show_value=True, *args, **kwargs):
@@ -124,6 +135,7 @@ class DiskRBytesPerSSparkline(SparkLinePanelBase):
             label=label,
             reverse=reverse,
             show_value=show_value,
+            source=MetricsSource.POWERMETRICS,
             value_format_fn=speed_sizeof_fmt,
             *args,
             **kwargs
@@ -131,6 +143,7 @@ class DiskRBytesPerSSparkline(SparkLinePanelBase):
 
 
 class DiskWBytesPerSSparkline(SparkLinePanelBase):
+    POWERMETRICS_KEYS = ("disk",)
     BORDER_TITLE = "Disk Write Bytes Per Second"
 
     def __init__(self, label="W: ", reverse=True, show_value=True, *args, **kwargs):
@@ -140,6 +153,7 @@ class DiskWBytesPerSSparkline(SparkLinePanelBase):
             label=label,
             reverse=reverse,
             show_value=show_value,
+            source=MetricsSource.POWERMETRICS,
             value_format_fn=speed_sizeof_fmt,
             *args,
             **kwargs
@@ -3,7 +3,7 @@ import logging
 
 from textual.app import ComposeResult
 
-from mactop.metrics_store import metrics
+from mactop.metrics_store import MetricsSource, metrics
 from mactop.widgets import LabeledSparkline
 from ._base import BaseStatic
 
@@ -11,6 +11,7 @@ logger = logging.getLogger(__name__)
 
 
 class IntelProcessorEnergyPanel(BaseStatic):
+    POWERMETRICS_KEYS = ("processor_intel",)
     BORDER_TITLE = "Energy"
 
     DEFAULT_CSS = """
@@ -32,5 +33,6 @@ class IntelProcessorEnergyPanel(BaseStatic):
             update_fn=lambda: metrics.get_powermetrics().processor_intel.package_watts_history,
             value_render_fn=self.value_render_fn,
             update_interval=self.refresh_interval,
+            source=MetricsSource.POWERMETRICS,
             prefix_label=self.label,
         )
@@ -1,7 +1,7 @@
 from textual.app import ComposeResult
 
 from mactop.widgets import DynamicText
-from mactop.metrics_store import metrics
+from mactop.metrics_store import MetricsSource, metrics
 from ._base import BaseStatic
 
 
@@ -11,6 +11,7 @@ def refresh_callback(*_):
 
 
 class LoadAvgText(BaseStatic):
+    POWERMETRICS_KEYS = ()
     BORDER_TITLE = "Load Average"
 
     def __init__(self, label="Load average: ", *args, **kwargs):
@@ -24,4 +25,5 @@ class LoadAvgText(BaseStatic):
             value_render_fn=lambda x: x,
             classes="loadavg-text",
             update_interval=self.refresh_interval,
+            source=MetricsSource.PSUTIL,
         )
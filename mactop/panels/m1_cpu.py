@@ -1,6 +1,6 @@
 from textual.app import ComposeResult
 
-from mactop.metrics_store import metrics
+from mactop.metrics_store import MetricsSource, metrics
 from ._base import BaseStatic
 from mactop.widgets import LabeledSparkline
 
@@ -11,6 +11,7 @@ def get_cpu_energy():
 
 
 class M1CPUEnergyPanel(BaseStatic):
+    POWERMETRICS_KEYS = ("processor_m1",)
     BORDER_TITLE = "CPU Energy"
 
     def __init__(self, label="CPU Power", show_value=True, *args, **kwargs):
@@ -20,7 +21,7 @@ class M1CPUEnergyPanel(BaseStatic):
 
             def show_energy(x):
                 if x:
-                    return f" {x} mW"
+                    return f" {x:.0f} mW"
                 return "N/A"
 
             self.value_render_fn = show_energy
@@ -33,5 +34,6 @@ class M1CPUEnergyPanel(BaseStatic):
             update_fn=get_cpu_energy,
             value_render_fn=self.value_render_fn,
             update_interval=self.refresh_interval,
+            source=MetricsSource.POWERMETRICS,
             prefix_label=self.label,
         )
@@ -1,7 +1,7 @@
 from textual.app import ComposeResult
 
 from mactop.widgets import DynamicText
-from mactop.metrics_store import metrics
+from mactop.metrics_store import MetricsSource, metrics
 from ._base import BaseStatic
 from mactop import const
 from mactop.widgets import LabeledColorBar, LabeledSparkline
@@ -13,6 +13,7 @@ def refresh_callback(*_):
 
 
 class GPUFreqText(BaseStatic):
+    POWERMETRICS_KEYS = ("m1_gpu",)
     BORDER_TITLE = "GPU Freq"
 
     def __init__(self, label="GPU Freq: ", *args, **kwargs):
@@ -26,6 +27,7 @@ class GPUFreqText(BaseStatic):
             value_render_fn=lambda x: f"{x:.2f}MHz",
             classes="gpu-freq-text",
             update_interval=self.refresh_interval,
+            source=MetricsSource.POWERMETRICS,
         )
 
 
@@ -44,6 +46,8 @@ def display_gpu_ration(x):
 
 
 class GPUUsageBarPanel(BaseStatic):
+    POWERMETRICS_KEYS = ("m1_gpu",)
+
     def __init__(
         self,
         color_busy=const.COLOR_USER,
@@ -68,6 +72,7 @@ class GPUUsageBarPanel(BaseStatic):
             percentages_update_fn=get_gpu_usage,
             value_render_fn=display_gpu_ration,
             update_interval=self.refresh_interval,
+            source=MetricsSource.POWERMETRICS,
         )
 
 
@@ -77,6 +82,7 @@ def get_gpu_energy():
 
 
 class M1GPUEnergyPanel(BaseStatic):
+    POWERMETRICS_KEYS = ("m1_gpu",)
     BORDER_TITLE = "GPU Energy"
 
     def __init__(self, label="GPU Power", show_value=True, *args, **kwargs):
@@ -86,7 +92,7 @@ class M1GPUEnergyPanel(BaseStatic):
 
             def show_energy(x):
                 if x:
-                    return f" {x} mW"
+                    return f" {x:.0f} mW"
                 return "N/A"
 
             self.value_render_fn = show_energy
@@ -99,5 +105,6 @@ class M1GPUEnergyPanel(BaseStatic):
             update_fn=get_gpu_energy,
             value_render_fn=self.value_render_fn,
             update_interval=self.refresh_interval,
+            source=MetricsSource.POWERMETRICS,
             prefix_label=self.label,
         )
@@ -5,7 +5,8 @@ from textual.app import ComposeResult
 from textual.containers import Grid
 
 from mactop.widgets import DynamicText
-from mactop.metrics_store import metrics
+from mactop.metrics_store import MetricsSource, metrics
+from mactop.scheduler import schedule_refresh
 from mactop.utils.formatting import hz_format
 from mactop.widgets import LabeledColorBar
 from mactop import const
@@ -20,6 +21,7 @@ def get_cluster(index):
 
 
 class M1CPUFreqPanel(BaseStatic):
+    POWERMETRICS_KEYS = ("processor_m1",)
     BORDER_TITLE = "CPU Frequency"
     DEFAULT_CSS = """
     M1CPUFreqPanel {
@@ -32,7 +34,12 @@ class M1CPUFreqPanel(BaseStatic):
         self.cpu_cluster_mouted = False
 
     def on_mount(self):
-        self.set_interval(0.5, self.dynamic_mount_cpu_clusters)
+        self.mount_refresh = schedule_refresh(
+            self,
+            self.dynamic_mount_cpu_clusters,
+            self.refresh_interval,
+            source=MetricsSource.POWERMETRICS,
+        )
 
     def dynamic_mount_cpu_clusters(self):
         logger.debug("dynamic_mount_cpu_clusters now run...")
@@ -61,6 +68,7 @@ class M1CPUFreqPanel(BaseStatic):
         logger.debug("max cpus: %s", max_cpu)
         self.styles.height = 1 + 2 + max_cpu
         self.cpu_cluster_mouted = True
+        self.mount_refresh.stop()
 
     def compose(self):
         yield Grid(id="m1cpu-freq-container")
@@ -114,6 +122,7 @@ class M1CPUClusterBlock(BaseStatic):
     def compose(self) -> ComposeResult:
         yield LabeledColorBar(
             update_interval=self.refresh_interval,
+            source=MetricsSource.POWERMETRICS,
             prefix_label="Busy ",
             color_choices=[const.COLOR_USER, const.COLOR_IDLE],
             percentages_update_fn=self.ratio_update_fn,
@@ -125,4 +134,5 @@ class M1CPUClusterBlock(BaseStatic):
             value_render_fn=self.text_update_fn,
             classes="cpucore-display-block",
             update_interval=self.refresh_interval,
+            source=MetricsSource.POWERMETRICS,
         )
@@ -2,12 +2,13 @@ from textual.widgets import Label
 from textual.app import ComposeResult
 
 from mactop.widgets import DynamicText
-from mactop.metrics_store import metrics
+from mactop.metrics_store import MetricsSource, metrics
 from mactop.utils.formatting import speed_sizeof_fmt
 from ._base import BaseStatic
 
 
 class NetworkIOByteRateText(BaseStatic):
+    POWERMETRICS_KEYS = ("network",)
     BORDER_TITLE = "Network Byte Rate"
 
     DEFAULT_CSS = """
@@ -31,6 +32,7 @@ class NetworkIOByteRateText(BaseStatic):
             value_render_fn=speed_sizeof_fmt,
             classes="network-speed",
             update_interval=self.refresh_interval,
+            source=MetricsSource.POWERMETRICS,
         )
         yield Label(" " * 5, classes="network-iorate-byte-prefix")
         yield DynamicText(
@@ -39,4 +41,5 @@ class NetworkIOByteRateText(BaseStatic):
             value_render_fn=speed_sizeof_fmt,
             classes="network-speed",
             update_interval=self.refresh_interval,
+            source=MetricsSource.POWERMETRICS,
         )
@@ -2,12 +2,13 @@ from textual.widgets import Label
 from textual.app import ComposeResult
 
 from mactop.widgets import DynamicText
-from mactop.metrics_store import metrics
+from mactop.metrics_store import MetricsSource, metrics
 from mactop.utils.formatting import packet_speed_fmt
 from ._base import BaseStatic
 
 
 class NetworkIOPacketRateText(BaseStatic):
+    POWERMETRICS_KEYS = ("network",)
     BORDER_TITLE = "Network Packet Rate"
 
     DEFAULT_CSS = """
@@ -31,6 +32,7 @@ class NetworkIOPacketRateText(BaseStatic):
             value_render_fn=packet_speed_fmt,
             classes="network-speed",
             update_interval=self.refresh_interval,
+            source=MetricsSource.POWERMETRICS,
         )
         yield Label(" " * 5, classes="network-iorate-packet-prefix")
         yield DynamicText(
@@ -39,4 +41,5 @@ class NetworkIOPacketRateText(BaseStatic):
             value_render_fn=packet_speed_fmt,
             classes="network-speed",
             update_interval=self.refresh_interval,
+            source=MetricsSource.POWERMETRICS,
         )
@@ -1,10 +1,11 @@
-from mactop.metrics_store import metrics
+from mactop.metrics_store import MetricsSource, metrics
 from mactop.utils.formatting import speed_sizeof_fmt, packet_speed_fmt
 
 from ._base import SparkLinePanelBase
 
 
 class NetworkIByteRateSparkline(SparkLinePanelBase):
+    POWERMETRICS_KEYS = ("network",)
     BORDER_TITLE = "Network Input Byte Rate"
 
     def __init__(self, label=" IN: ", reverse=False, show_value=True, *args, **kwargs):
@@ -14,6 +15,7 @@ class NetworkIByteRateSparkline(SparkLinePanelBase):
             label=label,
             reverse=reverse,
             show_value=show_value,
+            source=MetricsSource.POWERMETRICS,
             value_format_fn=speed_sizeof_fmt,
             *args,
             **kwargs
@@ -21,6 +23,7 @@ class NetworkIByteRateSparkline(SparkLinePanelBase):
 
 
 class NetworkOByteRateSparkline(SparkLinePanelBase):
+    POWERMETRICS_KEYS = ("network",)
     BORDER_TITLE = "Network Output Byte Rate"
 
     def __init__(self, label="OUT: ", reverse=True, show_value=True, *args, **kwargs):
@@ -30,6 +33,7 @@ class NetworkOByteRateSparkline(SparkLinePanelBase):
             label=label,
             reverse=reverse,
             show_value=show_value,
+            source=MetricsSource.POWERMETRICS,
             value_format_fn=speed_sizeof_fmt,
             *args,
             **kwargs
@@ -37,6 +41,7 @@ class NetworkOByteRateSparkline(SparkLinePanelBase):
 
 
 class NetworkIPacketRateSparkline(SparkLinePanelBase):
+    POWERMETRICS_KEYS = ("network",)
     BORDER_TITLE = "Network Input Packet Rate"
 
     def __init__(self, label=" IN: ", reverse=False, show_value=True, *args, **kwargs):
@@ -46,6 +51,7 @@ class NetworkIPacketRateSparkline(SparkLinePanelBase):
             label=label,
             reverse=reverse,
             show_value=show_value,
+            source=MetricsSource.POWERMETRICS,
             value_format_fn=packet_speed_fmt,
             *args,
             **kwargs
@@ -53,6 +59,7 @@ class NetworkIPacketRateSparkline(SparkLinePanelBase):
 
 
 class NetworkOPacketRateSparkline(SparkLinePanelBase):
+    POWERMETRICS_KEYS = ("network",)
     BORDER_TITLE = "Network Output Packet Rate"
 
     def __init__(self, label="OUT: ", reverse=True, show_value=True, *args, **kwargs):
@@ -62,6 +69,7 @@ class NetworkOPacketRateSparkline(SparkLinePanelBase):
             label=label,
             reverse=reverse,
             show_value=show_value,
+            source=MetricsSource.POWERMETRICS,
             value_format_fn=packet_speed_fmt,
             *args,
             **kwargs
@@ -0,0 +1,27 @@
+from mactop.metrics_store import refresh_stats
+from mactop.scheduler import schedule_refresh
+from ._base import BaseStatic
+
+
+class RefreshStatsText(BaseStatic):
+    """
+    Shows how many widget refreshes were done, and how many were skipped
+    because no new sample arrived.
+    """
+
+    POWERMETRICS_KEYS = ()
+    BORDER_TITLE = "Refreshes"
+
+    def __init__(self, label="Refreshes: ", *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.label = label
+
+    def on_mount(self) -> None:
+        schedule_refresh(self, self.update_stats, self.refresh_interval)
+
+    def update_stats(self) -> None:
+        self.update(
+            f"{self.label}{refresh_stats.refreshed} done,"
+            f" {refresh_stats.skipped} skipped,"
+            f" {refresh_stats.latency * 1000:.0f}ms after sample"
+        )
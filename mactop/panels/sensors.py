@@ -4,7 +4,7 @@ import logging
 from textual.app import ComposeResult
 from textual.containers import Vertical
 
-from mactop.metrics_store import metrics
+from mactop.metrics_store import MetricsSource, metrics
 from mactop.widgets.labeled_progress import LabelProgressWidget
 from ._base import BaseStatic
 
@@ -12,6 +12,7 @@ logger = logging.getLogger(__name__)
 
 
 class SensorsPanel(BaseStatic):
+    POWERMETRICS_KEYS = ("smc",)
     BORDER_TITLE = "Sensors"
 
     DEFAULT_CSS = """
@@ -26,6 +27,7 @@ class SensorsPanel(BaseStatic):
                 update_fn=lambda: metrics.get_powermetrics().smc.cpu_die,
                 value_render_fn=lambda cput: f"{cput:.1f} °C",
                 update_interval=self.refresh_interval,
+                source=MetricsSource.POWERMETRICS,
                 progress_total=120,
                 prefix_label="CPU",
             ),
@@ -33,6 +35,7 @@ class SensorsPanel(BaseStatic):
                 update_fn=lambda: metrics.get_powermetrics().smc.gpu_die,
                 value_render_fn=lambda cput: f"{cput:.1f} °C",
                 update_interval=self.refresh_interval,
+                source=MetricsSource.POWERMETRICS,
                 progress_total=120,
                 prefix_label="GPU",
             ),
@@ -40,6 +43,7 @@ class SensorsPanel(BaseStatic):
                 update_fn=lambda: metrics.get_powermetrics().smc.fan,
                 value_render_fn=lambda cput: f"{cput:.1f} RPM",
                 update_interval=self.refresh_interval,
+                source=MetricsSource.POWERMETRICS,
                 progress_total=7000,
                 prefix_label="FAN",
             ),
@@ -2,13 +2,14 @@ from textual.widgets import Label
 from textual.app import ComposeResult
 
 from mactop.widgets import DynamicText
-from mactop.metrics_store import metrics
+from mactop.metrics_store import MetricsSource, metrics
 from mactop.utils.formatting import sizeof_fmt_plain, sizeof_fmt
 from ._base import BaseStatic
 from mactop.widgets import LabeledVStringBar
 
 
 class SwapMemoryInOutText(BaseStatic):
+    POWERMETRICS_KEYS = ()
     BORDER_TITLE = "Swap memory"
 
     DEFAULT_CSS = """
@@ -32,6 +33,7 @@ class SwapMemoryInOutText(BaseStatic):
             value_render_fn=sizeof_fmt,
             classes="swap-memory-inout",
             update_interval=self.refresh_interval,
+            source=MetricsSource.PSUTIL,
         )
         yield Label(" " * 3, classes="swap-memory-inout-delimiter")
         yield DynamicText(
@@ -40,6 +42,7 @@ class SwapMemoryInOutText(BaseStatic):
             value_render_fn=sizeof_fmt,
             classes="swap-memory-inout",
             update_interval=self.refresh_interval,
+            source=MetricsSource.PSUTIL,
         )
 
 
@@ -56,6 +59,7 @@ def get_swap_display(*_):
 
 
 class SwapMemoryUsageVBar(BaseStatic):
+    POWERMETRICS_KEYS = ()
     BORDER_TITLE = "Swap memory"
 
     def __init__(self, label="Swp", *args, **kwargs):
@@ -67,6 +71,7 @@ class SwapMemoryUsageVBar(BaseStatic):
             prefix_label=self.label,
             color_choices=["red", "black"],
             update_interval=self.refresh_interval,
+            source=MetricsSource.PSUTIL,
             percentages_update_fn=get_swap_percentages,
             value_render_fn=get_swap_display,
         )
@@ -1,76 +1,222 @@
+from dataclasses import replace
 import logging
 
 from textual.widgets import DataTable
-from textual.widgets.data_table import RowDoesNotExist
+from textual.widgets.data_table import CellDoesNotExist
 from textual.reactive import reactive
 
 
-from mactop.metrics_store import metrics
-
+from mactop.metrics_store import (
+    DEFAULT_TASK_LIMIT,
+    TASK_COLUMNS,
+    TASK_ROW_COLUMNS,
+    MetricsSource,
+    TaskQuery,
+    metrics,
+)
+from mactop.scheduler import schedule_refresh
 
 logger = logging.getLogger(__name__)
 
 
+class TaskDiff:
+    """
+    What changed in the task list since the last tick, keyed by pid.
+    """
+
+    def __init__(self) -> None:
+        # (row key, values)
+        self.added = []
+        self.removed = []
+        # (row key, column, value)
+        self.changed = []
+        # all the row keys in the new order, None if the order is the same
+        self.order = None
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed or self.order)
+
+
+def diff_tasks(previous: dict, rows, columns):
+    """
+    Compare the rows (tuples of the values of `columns`, pid first) with the
+    rows shown, `previous` maps row key to the tuple of values shown.
+
+    Returns the diff and the rows to be compared with next time.
+    """
+    diff = TaskDiff()
+    current = {}
+    for values in rows:
+        row_key = str(values[0])
+        current[row_key] = values
+
+        old_values = previous.get(row_key)
+        if old_values is None:
+            diff.added.append((row_key, values))
+        elif old_values != values:
+            for col, old, new in zip(columns, old_values, values):
+                if old != new:
+                    diff.changed.append((row_key, col, new))
+
+    if len(current) != len(previous) or diff.added:
+        diff.removed = [key for key in previous if key not in current]
+    if list(current) != [key for key in previous if key in current] + [
+        key for key, _ in diff.added
+    ]:
+        diff.order = list(current)
+    return diff, current
+
+
+TREND_BLOCKS = "▁▂▃▄▅▆▇█"
+
+
+def trend_text(values):
+    """
+    A tiny sparkline of the values, scaled from 0 to the max of them.
+    """
+    top = max(values, default=0)
+    if top <= 0:
+        return TREND_BLOCKS[0] * len(values)
+    scale = (len(TREND_BLOCKS) - 1) / top
+    return "".join(TREND_BLOCKS[int(max(v, 0) * scale)] for v in values)
+
+
+def display_row(row):
+    pid, name, energy, energy_delta, cpu_ms_per_s, cputime_ns, trend = row
+    return (
+        pid,
+        name,
+        round(energy, 2),
+        round(energy_delta, 2),
+        round(cpu_ms_per_s, 1),
+        cputime_ns,
+        trend_text(trend),
+    )
+
+
+def as_bool(value):
+    if isinstance(value, str):
+        return value.lower() in ("true", "yes", "1")
+    return bool(value)
+
+
 class TaskTable(DataTable):
+    """
+    Tasks sorted by `sort_by` (click a column header to change), only the
+    ones whose name contains or pid is `filter`, at most `limit` (0 means
+    no limit) of them. Tasks are selected by the collector, see TaskQuery.
+    """
+
+    POWERMETRICS_KEYS = ("tasks",)
     tasks = reactive([])
     # PID must be the first and can not change
     # used for unique key for location
-    show_columns = ["pid", "name", "energy_impact", "cputime_ns"]
-
-    def __init__(self, refresh_interval, *args, **kwargs):
+    show_columns = list(TASK_ROW_COLUMNS)
+    # sort these columns from the smallest by default
+    ascending_columns = ("pid", "name")
+
+    def __init__(
+        self,
+        refresh_interval,
+        sort_by="energy_impact",
+        descending=None,
+        filter="",
+        limit=DEFAULT_TASK_LIMIT,
+        *args,
+        **kwargs,
+    ):
         super().__init__(*args, **kwargs)
-        self.refresh_interval = refresh_interval
+        self.refresh_interval = float(refresh_interval)
+        if descending is None:
+            descending = sort_by not in self.ascending_columns
+        self.task_query = TaskQuery(sort_by, as_bool(descending), filter, int(limit))
+        # row key -> values shown
+        self.shown = {}
 
     def on_mount(self) -> None:
-        self.add_columns(*self.show_columns)
-        self.set_interval(self.refresh_interval, self.update_tasks)
+        for col in self.show_columns:
+            self.add_column(col, key=col)
+        metrics.add_task_query(self.task_query)
+        schedule_refresh(
+            self,
+            self.update_tasks,
+            self.refresh_interval,
+            source=MetricsSource.POWERMETRICS,
+        )
         self.cursor_type = "row"
 
-    def update_tasks(self) -> None:
-        if tasks := metrics.get_powermetrics().tasks:
-            self.tasks = tasks
+    def on_unmount(self) -> None:
+        metrics.remove_task_query(self.task_query)
 
-    def watch_tasks(self, tasks) -> None:
-        logger.debug("tasks: %d", len(tasks))
-        if not tasks:
+    def on_data_table_header_selected(self, event) -> None:
+        sort_by = event.column_key.value
+        if sort_by not in TASK_COLUMNS:
             return
+        if sort_by == self.task_query.sort_by:
+            descending = not self.task_query.descending
+        else:
+            descending = sort_by not in self.ascending_columns
+        self.set_query(replace(self.task_query, sort_by=sort_by, descending=descending))
 
-        try:
-            old_cursor_row_key = self.get_cursor_row_key()
-        except RowDoesNotExist:
-            old_cursor_row_key = None
-
-        existing_keys = set(list((k) for k in self.rows.keys()))
-        for task in tasks:
-            self._update_task(task, existing_keys)
+    def set_query(self, query: TaskQuery) -> None:
+        metrics.remove_task_query(self.task_query)
+        self.task_query = query
+        metrics.add_task_query(query)
+        # don't wait for the next sample
+        if records := metrics.get_powermetrics().task_records:
+            self.tasks = records.select(query)
 
-        new_keys = set(str(t["pid"]) for t in tasks)
+    def update_tasks(self) -> None:
+        powermetrics = metrics.get_powermetrics()
+        rows = powermetrics.task_views.get(self.task_query)
+        if rows is None and powermetrics.task_records is not None:
+            # sampled before the query was added
+            rows = powermetrics.task_records.select(self.task_query)
+        if rows is not None:
+            self.tasks = rows
 
-        for key in existing_keys:
-            if key not in new_keys:
-                self.remove_row(key)
+    def watch_tasks(self, tasks) -> None:
+        logger.debug("tasks: %d", len(tasks))
 
-        if old_cursor_row_key and old_cursor_row_key in new_keys:
-            self.reset_cursor(old_cursor_row_key)
+        rows = [display_row(row) for row in tasks]
+        diff, self.shown = diff_tasks(self.shown, rows, self.show_columns)
+        if diff:
+            self.apply_diff(diff)
+
+    def apply_diff(self, diff: TaskDiff) -> None:
+        cursor_row_key = self.get_cursor_row_key()
+        cursor_row = self.cursor_coordinate.row
+
+        # repaint once for the whole diff
+        with self.app.batch_update():
+            for row_key in diff.removed:
+                self.remove_row(row_key)
+            for row_key, values in diff.added:
+                self.add_row(*values, key=row_key)
+            for row_key, col, value in diff.changed:
+                self.update_cell(row_key, col, value)
+            if diff.order is not None:
+                # the rows are selected in the order of the query, tasks with
+                # the same value may be swapped, but they look the same
+                self.sort(self.task_query.sort_by, reverse=self.task_query.descending)
+
+        if cursor_row_key is not None and cursor_row_key in self.rows:
+            self.keep_cursor(cursor_row_key, cursor_row)
 
     def get_cursor_row_key(self):
-        row_index = self.cursor_coordinate.row
-        if not row_index:  # 0 means no rows at the beginning
+        if not self.row_count:
+            return None
+        try:
+            return self.coordinate_to_cell_key(self.cursor_coordinate).row_key
+        except CellDoesNotExist:
+            return None
+
+    def keep_cursor(self, row_key, old_row):
+        """
+        Keep the cursor on the same task, and at the same line on screen.
+        """
+        row = self.get_row_index(row_key)
+        if row == old_row:
             return
-        row = self.get_row_at(row_index=row_index)
-        return row[0]
-
-    def reset_cursor(self, old_cursor_row_key):
-        index = self.get_row_index(old_cursor_row_key)
-        self.move_cursor(row=index, animate=True)
-
-    def _update_task(self, task, existing_keys):
-        row_key = str(task["pid"])
-
-        task_existing = row_key in existing_keys
-
-        if not task_existing:
-            self.add_row(*[task[key] for key in self.show_columns], key=row_key)
-        else:
-            for col in self.show_columns:
-                self.update_cell(row_key, col, task[col])
+        self.scroll_to(y=max(self.scroll_y + row - old_row, 0), animate=False)
+        self.move_cursor(row=row, animate=False)
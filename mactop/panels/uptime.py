@@ -16,6 +16,7 @@ def refresh_callback(*_):
 
 
 class UptimeText(BaseStatic):
+    POWERMETRICS_KEYS = ()
     BORDER_TITLE = "Uptime"
 
     def __init__(self, label="Uptime: ", *args, **kwargs):
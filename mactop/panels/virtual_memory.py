@@ -2,7 +2,7 @@ import logging
 from textual.app import ComposeResult
 
 from mactop.widgets import DynamicText, LabeledVStringBar
-from mactop.metrics_store import metrics
+from mactop.metrics_store import MetricsSource, metrics
 from mactop.utils.formatting import sizeof_fmt_plain
 from ._base import BaseStatic
 
@@ -10,6 +10,7 @@ logger = logging.getLogger(__name__)
 
 
 class MemoryStatsText(BaseStatic):
+    POWERMETRICS_KEYS = ()
     BORDER_TITLE = "Memory"
 
     DEFAULT_CSS = """
@@ -31,6 +32,7 @@ class MemoryStatsText(BaseStatic):
             value_render_fn=sizeof_fmt_plain,
             classes="virtual-memory-text",
             update_interval=self.refresh_interval,
+            source=MetricsSource.PSUTIL,
         )
         yield DynamicText(
             prefix_label="total:",
@@ -38,6 +40,7 @@ class MemoryStatsText(BaseStatic):
             value_render_fn=sizeof_fmt_plain,
             classes="virtual-memory-text",
             update_interval=self.refresh_interval,
+            source=MetricsSource.PSUTIL,
         )
         yield DynamicText(
             prefix_label="used:",
@@ -45,6 +48,7 @@ class MemoryStatsText(BaseStatic):
             value_render_fn=sizeof_fmt_plain,
             classes="virtual-memory-text",
             update_interval=self.refresh_interval,
+            source=MetricsSource.PSUTIL,
         )
         yield DynamicText(
             prefix_label="wired:",
@@ -52,6 +56,7 @@ class MemoryStatsText(BaseStatic):
             value_render_fn=sizeof_fmt_plain,
             classes="virtual-memory-text",
             update_interval=self.refresh_interval,
+            source=MetricsSource.PSUTIL,
         )
         yield DynamicText(
             prefix_label="free:",
@@ -59,6 +64,7 @@ class MemoryStatsText(BaseStatic):
             value_render_fn=sizeof_fmt_plain,
             classes="virtual-memory-text",
             update_interval=self.refresh_interval,
+            source=MetricsSource.PSUTIL,
         )
         yield DynamicText(
             prefix_label="active:",
@@ -66,6 +72,7 @@ class MemoryStatsText(BaseStatic):
             value_render_fn=sizeof_fmt_plain,
             classes="virtual-memory-text",
             update_interval=self.refresh_interval,
+            source=MetricsSource.PSUTIL,
         )
         yield DynamicText(
             prefix_label="inactive:",
@@ -73,6 +80,7 @@ class MemoryStatsText(BaseStatic):
             value_render_fn=sizeof_fmt_plain,
             classes="virtual-memory-text",
             update_interval=self.refresh_interval,
+            source=MetricsSource.PSUTIL,
         )
 
 
@@ -97,6 +105,7 @@ def get_vm_display(*_):
 
 
 class MemoryUsageVBar(BaseStatic):
+    POWERMETRICS_KEYS = ()
     BORDER_TITLE = "Memory"
 
     def __init__(self, label="Mem", *args, **kwargs):
@@ -108,6 +117,7 @@ class MemoryUsageVBar(BaseStatic):
             prefix_label=self.label,
             color_choices=["red", "black"],
             update_interval=self.refresh_interval,
+            source=MetricsSource.PSUTIL,
             percentages_update_fn=get_available_vm_percentages,
             value_render_fn=get_vm_display,
         )
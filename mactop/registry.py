@@ -0,0 +1,80 @@
+"""
+Lazy registries of the widgets a theme can use, see PANELS and LAYOUTS.
+"""
+from collections.abc import Mapping
+import importlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Registry(Mapping):
+    """
+    Maps the tags of a theme to widget classes. The module of a class is
+    imported on the first lookup, so only the panels used by the theme are
+    imported.
+
+    Besides the builtin classes (tag -> "module:attribute"), third party
+    packages can register their classes by entry points of `group`, e.g.
+    in pyproject.toml with poetry:
+
+        [tool.poetry.plugins."mactop.panels"]
+        MyPanel = "my_package.panels:MyPanel"
+
+    A builtin class wins over a plugin with the same tag.
+    """
+
+    def __init__(self, builtin, group) -> None:
+        self.builtin = builtin
+        self.group = group
+        self._classes = {}
+        self._plugins = None
+
+    @property
+    def plugins(self):
+        """
+        Entry points of the plugins, not loaded yet.
+        """
+        if self._plugins is None:
+            # slow to import, only when a tag is not builtin
+            from importlib.metadata import entry_points
+
+            self._plugins = {}
+            for entry_point in entry_points(group=self.group):
+                if entry_point.name in self.builtin:
+                    logger.warning(
+                        "%s %s is builtin, ignored %s",
+                        self.group,
+                        entry_point.name,
+                        entry_point.value,
+                    )
+                    continue
+                self._plugins[entry_point.name] = entry_point
+        return self._plugins
+
+    def __getitem__(self, name):
+        try:
+            return self._classes[name]
+        except KeyError:
+            pass
+
+        if name in self.builtin:
+            module_name, _, attribute = self.builtin[name].partition(":")
+            cls = getattr(importlib.import_module(module_name), attribute)
+        elif name in self.plugins:
+            logger.info("loading %s %s", self.group, self.plugins[name].value)
+            cls = self.plugins[name].load()
+        else:
+            raise KeyError(name)
+        self._classes[name] = cls
+        return cls
+
+    def __contains__(self, name):
+        return name in self.builtin or name in self.plugins
+
+    def __iter__(self):
+        yield from self.builtin
+        yield from self.plugins
+
+    def __len__(self):
+        return len(self.builtin) + len(self.plugins)
@@ -0,0 +1,156 @@
+"""
+One refresh timer for the whole app.
+
+Instead of every widget running its own `set_interval`, widgets subscribe to
+the app's RefreshScheduler. The scheduler wakes up once per interval, and only
+when a new sample was published (or some subscriber doesn't depend on any
+metrics source), it calls all the due subscribers in one batched update.
+
+In push mode there is no timer at all: collectors notify the scheduler when a
+sample is published, and the refresh runs right after that.
+"""
+import logging
+import time
+
+from textual.message import Message
+
+from mactop.metrics_store import MetricsSource, metrics, refresh_stats
+
+logger = logging.getLogger(__name__)
+
+
+class SampleReady(Message):
+    """Posted to the app from the collector threads, in push mode."""
+
+
+class Subscription:
+    def __init__(self, widget, callback, interval, source) -> None:
+        self.widget = widget
+        self.callback = callback
+        self.interval = interval
+        self.source = source
+        self.last_run = None
+        self.last_generation = None
+        self.stopped = False
+
+    def is_due(self, now, tolerance):
+        if self.last_run is None:
+            return True
+        return now - self.last_run >= self.interval - tolerance
+
+    def stop(self):
+        self.stopped = True
+
+
+class RefreshScheduler:
+    def __init__(self, app, interval, push=False) -> None:
+        self.app = app
+        self.interval = interval
+        self.push = push
+        self.subscriptions = []
+        self.timer = None
+        self.push_pending = False
+
+    def start(self):
+        if self.push:
+            metrics.add_listener(self.on_sample_published)
+            return
+        self.timer = self.app.set_interval(self.interval, self.tick)
+
+    def stop(self):
+        if self.push:
+            metrics.remove_listener(self.on_sample_published)
+        elif self.timer is not None:
+            self.timer.stop()
+
+    def subscribe(self, widget, callback, interval, source=None):
+        """
+        Call `callback` at most every `interval` seconds.
+
+        If `source` is given, callback is only called when that source
+        published a new sample, leave it None if the widget displays something
+        changes with time.
+        """
+        subscription = Subscription(widget, callback, interval, source)
+        self.subscriptions.append(subscription)
+
+        if interval < self.interval:
+            logger.info("Scheduler interval changed to %s", interval)
+            self.interval = interval
+            if self.timer is not None:
+                self.timer.stop()
+                self.start()
+        return subscription
+
+    def on_sample_published(self, source: MetricsSource, snapshot):
+        """
+        Called in the collector's thread, wake up the app without blocking
+        the collector. Samples published before the app handles it are
+        coalesced into one refresh.
+        """
+        if self.push_pending:
+            return
+        self.push_pending = True
+        self.app.post_message(SampleReady())
+
+    def handle_sample_ready(self):
+        self.push_pending = False
+        self.tick()
+
+    def tick(self):
+        now = time.monotonic()
+        generations = {
+            source: metrics.get_generation(source) for source in MetricsSource
+        }
+        tolerance = self.interval / 2
+
+        due = []
+        alive = []
+        for subscription in self.subscriptions:
+            if subscription.stopped or not subscription.widget.is_attached:
+                continue
+            alive.append(subscription)
+
+            if subscription.source is not None:
+                generation = generations[subscription.source]
+                if generation == subscription.last_generation:
+                    refresh_stats.skipped += 1
+                    continue
+            else:
+                generation = None
+
+            if subscription.is_due(now, tolerance):
+                subscription.last_generation = generation
+                due.append(subscription)
+        self.subscriptions = alive
+
+        if not due:
+            return
+
+        refresh_stats.refreshed += len(due)
+        with self.app.batch_update():
+            for subscription in due:
+                subscription.last_run = now
+                subscription.callback()
+
+        published_at = metrics.get_latest_published_at()
+        refresh_stats.latency = time.monotonic() - published_at
+        logger.debug(
+            "Scheduler refreshed %d widgets, %.3fs after the sample was published",
+            len(due),
+            refresh_stats.latency,
+        )
+
+
+def schedule_refresh(widget, callback, interval, source=None):
+    """
+    Subscribe `callback` to the app's RefreshScheduler, fallback to a timer of
+    the widget itself when the app doesn't have one, which calls it every
+    interval, whether or not a new sample was published.
+
+    Returns an object which can `stop()`.
+    """
+    scheduler = getattr(widget.app, "refresh_scheduler", None)
+    if scheduler is None:
+        return widget.set_interval(interval, callback)
+    return scheduler.subscribe(widget, callback, interval, source)
@@ -0,0 +1,269 @@
+"""
+Watch the theme file for --auto-reload.
+
+The kernel tells when the file changes, kqueue on macOS and inotify on
+Linux, polling its stat is the fallback. The directory is watched as well,
+since editors often save by writing a new file and renaming it over the old
+one. A change is only reported when the content is different.
+"""
+import hashlib
+import logging
+import os
+from pathlib import Path
+import select
+import struct
+import sys
+import threading
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 1.0
+# editors may write a file in several steps
+SETTLE_DELAY = 0.05
+# how often a kernel backend checks whether the watcher is stopped
+WAIT_TIMEOUT = 0.5
+
+
+class PollingBackend:
+    """
+    Tell a change when the stat of the file is different.
+    """
+
+    def __init__(self, path, interval=POLL_INTERVAL) -> None:
+        self.path = path
+        self.interval = interval
+        self.stat = self.read_stat()
+
+    def read_stat(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def wait(self, stopped: threading.Event) -> bool:
+        if stopped.wait(self.interval):
+            return False
+        stat = self.read_stat()
+        changed = stat != self.stat
+        self.stat = stat
+        return changed
+
+    def close(self):
+        pass
+
+
+class InotifyBackend:
+    """
+    inotify(7) on the directory of the file, by ctypes.
+    """
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_NONBLOCK = os.O_NONBLOCK
+    IN_CLOEXEC = 0o2000000
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self, path) -> None:
+        # slow to import, Linux only
+        import ctypes
+        import ctypes.util
+
+        self.path = Path(path).absolute()
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = (
+            self.IN_MODIFY
+            | self.IN_ATTRIB
+            | self.IN_CLOSE_WRITE
+            | self.IN_MOVED_TO
+            | self.IN_CREATE
+        )
+        directory = os.fsencode(self.path.parent)
+        if libc.inotify_add_watch(self.fd, directory, mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch {self.path.parent} failed")
+        self.name = os.fsencode(self.path.name)
+
+    def wait(self, stopped: threading.Event) -> bool:
+        readable, _, _ = select.select([self.fd], [], [], WAIT_TIMEOUT)
+        if not readable:
+            return False
+        changed = False
+        for name in self.read_names():
+            changed = changed or name == self.name
+        return changed
+
+    def read_names(self):
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = self.EVENT.unpack_from(data, offset)
+            offset += self.EVENT.size
+            yield data[offset : offset + length].rstrip(b"\0")
+            offset += length
+
+    def close(self):
+        os.close(self.fd)
+
+
+class KqueueBackend:
+    """
+    kqueue(2) vnode events of the file and of its directory.
+    """
+
+    # only for events, doesn't keep the volume busy, macOS only
+    OPEN_FLAGS = getattr(os, "O_EVTONLY", 0)
+
+    def __init__(self, path) -> None:
+        self.path = Path(path).absolute()
+        self.kqueue = select.kqueue()
+        self.dir_fd = os.open(self.path.parent, os.O_RDONLY | self.OPEN_FLAGS)
+        self.file_fd = None
+        self.register(self.dir_fd, select.KQ_NOTE_WRITE)
+        self.open_file()
+
+    def register(self, fd, fflags):
+        event = select.kevent(
+            fd,
+            filter=select.KQ_FILTER_VNODE,
+            flags=select.KQ_EV_ADD | select.KQ_EV_CLEAR,
+            fflags=fflags,
+        )
+        self.kqueue.control([event], 0, 0)
+
+    def open_file(self):
+        """
+        Watch the file again, after it was replaced.
+        """
+        if self.file_fd is not None:
+            os.close(self.file_fd)
+            self.file_fd = None
+        try:
+            self.file_fd = os.open(self.path, os.O_RDONLY | self.OPEN_FLAGS)
+        except FileNotFoundError:
+            return
+        self.register(
+            self.file_fd,
+            select.KQ_NOTE_WRITE
+            | select.KQ_NOTE_EXTEND
+            | select.KQ_NOTE_ATTRIB
+            | select.KQ_NOTE_DELETE
+            | select.KQ_NOTE_RENAME,
+        )
+
+    def wait(self, stopped: threading.Event) -> bool:
+        events = self.kqueue.control(None, 8, WAIT_TIMEOUT)
+        if not events:
+            return False
+        replaced = any(
+            event.ident == self.dir_fd
+            or event.fflags & (select.KQ_NOTE_DELETE | select.KQ_NOTE_RENAME)
+            for event in events
+        )
+        if replaced:
+            self.open_file()
+        return True
+
+    def close(self):
+        if self.file_fd is not None:
+            os.close(self.file_fd)
+        os.close(self.dir_fd)
+        self.kqueue.close()
+
+
+def create_backend(path):
+    """
+    The kernel backend of this platform, or polling if there is none.
+    """
+    if hasattr(select, "kqueue"):
+        backend_class = KqueueBackend
+    elif sys.platform.startswith("linux"):
+        backend_class = InotifyBackend
+    else:
+        return PollingBackend(path)
+    try:
+        return backend_class(path)
+    except (OSError, AttributeError):
+        logger.warning(
+            "Can not watch %s with %s, polling it instead",
+            path,
+            backend_class.__name__,
+            exc_info=True,
+        )
+        return PollingBackend(path)
+
+
+class ThemeWatcher:
+    """
+    Call `on_change(content)` in a daemon thread, every time the content of
+    the theme file changes.
+    """
+
+    def __init__(self, path, on_change, backend=None) -> None:
+        self.path = path
+        self.on_change = on_change
+        self.backend = backend
+        self.digest = None
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def read(self):
+        try:
+            with open(self.path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def start(self):
+        if self.backend is None:
+            self.backend = create_backend(self.path)
+        logger.info("watching %s by %s", self.path, type(self.backend).__name__)
+        content = self.read()
+        if content is not None:
+            self.digest = hashlib.sha256(content).digest()
+        self.thread = threading.Thread(
+            target=self.run, name="theme-watcher", daemon=True
+        )
+        self.thread.start()
+
+    def run(self):
+        try:
+            while not self.stopped.is_set():
+                if not self.backend.wait(self.stopped):
+                    continue
+                if self.stopped.wait(SETTLE_DELAY):
+                    break
+                self.check()
+        except Exception:
+            logger.exception("error when watch the theme file %s", self.path)
+        finally:
+            self.backend.close()
+
+    def check(self):
+        content = self.read()
+        if content is None:
+            return
+        digest = hashlib.sha256(content).digest()
+        if digest == self.digest:
+            return
+        self.digest = digest
+        logger.info("Theme file %s has been changed", self.path)
+        try:
+            self.on_change(content)
+        except Exception:
+            logger.exception("error when reload the theme file %s", self.path)
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
@@ -1,4 +0,0 @@
-from .rwlock import RWLock
-
-
-__all__ = ["RWLock"]
@@ -1,4 +1,8 @@
-from rich.text import Text
+from bisect import bisect_right
+from functools import lru_cache
+
+from rich.style import Style
+from rich.text import Span, Text
 
 
 def sizeof_fmt_plain(num, suffix="B"):
@@ -15,40 +19,129 @@ def sizeof_fmt_plain(num, suffix="B"):
     return f.format(num=num, unit="Yi", suffix=suffix)
 
 
+BOLD = Style(bold=True)
+
+BINARY_UNITS = ("", "Ki", "Mi", "Gi", "Ti", "Pi", "Ei", "Zi", "Yi")
+BINARY_SCALES = tuple(1 << (10 * i) for i in range(len(BINARY_UNITS)))
+DECIMAL_UNITS = ("", "k", "M", "B")
+DECIMAL_SCALES = (1, 1000, 1000**2, 1000**3)
+HZ_UNITS = ("", "k", "M")
+
+
+def binary_unit(magnitude):
+    """
+    Index of the unit of BINARY_UNITS that `magnitude` (not negative) fits
+    in, every unit is 10 bits more.
+    """
+    try:
+        index = (int(magnitude).bit_length() - 1) // 10
+    except (OverflowError, ValueError):
+        # inf or nan
+        return len(BINARY_UNITS) - 1
+    return min(max(index, 0), len(BINARY_UNITS) - 1)
+
+
+def decimal_unit(scales):
+    """
+    Pick the unit by comparing `magnitude` with `scales`, the last unit if it
+    is larger than all of them.
+    """
+    thresholds = scales[1:]
+
+    def pick(magnitude):
+        return bisect_right(thresholds, magnitude)
+
+    return pick
+
+
+class UnitFormatter:
+    """
+    Formats a number as Text, in the unit it fits in, like `   1.5KiB`.
+
+    The label of every unit is built once, a call only picks the unit and
+    formats the number, no markup is parsed.
+    """
+
+    def __init__(
+        self,
+        scales,
+        pick_unit,
+        number_format,
+        labels,
+        label_style=None,
+        tail="",
+        integer=False,
+    ) -> None:
+        self.scales = scales
+        self.pick_unit = pick_unit
+        self.number_format = number_format
+        self.labels = labels
+        self.label_style = label_style
+        self.tail = tail
+        self.integer = integer
+
+    def __call__(self, num) -> Text:
+        if self.integer:
+            num = int(num)
+        index = self.pick_unit(abs(num))
+        scale = self.scales[index]
+        if self.integer:
+            number = format(num // scale, self.number_format)
+        else:
+            number = format(num / scale, self.number_format)
+        label = self.labels[index]
+        text = Text(number + label + self.tail)
+        if self.label_style is not None:
+            start = len(number)
+            text.spans.append(Span(start, start + len(label), self.label_style))
+        return text
+
+
+@lru_cache(maxsize=None)
+def size_formatter(suffix="B"):
+    labels = tuple(f"{unit:<2}{suffix}" for unit in BINARY_UNITS)
+    return UnitFormatter(BINARY_SCALES, binary_unit, ">6.1f", labels, BOLD)
+
+
+@lru_cache(maxsize=None)
+def packet_speed_formatter(suffix="packets/s", align=">"):
+    labels = tuple(f"{unit:<1}" for unit in DECIMAL_UNITS)
+    return UnitFormatter(
+        DECIMAL_SCALES,
+        decimal_unit(DECIMAL_SCALES),
+        f"{align}5.1f",
+        labels,
+        BOLD,
+        tail=suffix,
+    )
+
+
+@lru_cache(maxsize=None)
+def hz_formatter(suffix="hz"):
+    labels = tuple(f"{unit:<1}{suffix}" for unit in HZ_UNITS)
+    scales = DECIMAL_SCALES[: len(HZ_UNITS)]
+    return UnitFormatter(scales, decimal_unit(scales), ">4d", labels, integer=True)
+
+
 def sizeof_fmt(num, suffix="B"):
     """
     return Text
     """
-    f = "{num:>6.1f}[b]{unit:<2}{suffix}[/b]"
-    for unit in ("", "Ki", "Mi", "Gi", "Ti", "Pi", "Ei", "Zi"):
-        if abs(num) < 1024.0:
-            return Text.from_markup(f.format(num=num, unit=unit, suffix=suffix))
-        num /= 1024.0
-    return Text.from_markup(f.format(num=num, unit="Yi", suffix=suffix))
+    return size_formatter(suffix)(num)
 
 
 def speed_sizeof_fmt(num, suffix="B"):
     """
     Return 11 chars constant
     """
-    f = "{num:>6.1f}[b]{unit:<2}{suffix}/s[/b]"
-    for unit in ("", "Ki", "Mi", "Gi", "Ti", "Pi", "Ei", "Zi"):
-        if abs(num) < 1024.0:
-            return Text.from_markup(f.format(num=num, unit=unit, suffix=suffix))
-        num /= 1024.0
-    return Text.from_markup(f.format(num=num, unit="Yi", suffix=suffix))
+    return size_formatter(suffix + "/s")(num)
 
 
 def packet_speed_fmt(num, suffix="packets/s", align=">"):
     """
     always return 16 chars
     """
-    f = "{num:%s5.1f}[b]{unit:<1}[/b]%s" % (align, suffix)
-    for unit in ("", "k", "M"):
-        if abs(num) < 1000:
-            return Text.from_markup(f.format(num=num, unit=unit))
-        num /= 1000.0
-    return Text.from_markup(f.format(num=num, unit="B"))
+    return packet_speed_formatter(suffix, align)(num)
 
 
 def render_cpu_percentage_1(percentages):
@@ -62,10 +155,4 @@ def render_cpu_percentage_100(percentages):
 
 
 def hz_format(num, suffix="hz"):
-    f = "{num:>4d}{unit:<1}{suffix}"
-    for unit in ("", "k"):
-        num = int (num)
-        if abs(num) < 1000:
-            return Text.from_markup(f.format(num=num, unit=unit, suffix=suffix))
-        num //= 1000
-    return Text.from_markup(f.format(num=num, unit="M", suffix=suffix))
+    return hz_formatter(suffix)(num)
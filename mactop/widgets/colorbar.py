@@ -1,3 +1,4 @@
+from functools import lru_cache
 import logging
 from rich.console import RenderableType
 from rich.style import Style
@@ -7,6 +8,10 @@ from textual.reactive import reactive
 
 logger = logging.getLogger(__name__)
 
+# rendered bars kept, a few frames of every bar on the screen
+BAR_CACHE_SIZE = 1024
+BAR_STYLE_CACHE_SIZE = 256
+
 
 class ColorBar(Widget):
     BARS = [
@@ -44,36 +49,40 @@ class ColorBar(Widget):
         _total = sum(self.percentages)
         if not _total:
             return " "
-        percentages = [p / _total for p in self.percentages]
-        units = width * 8
 
         if not self.color_choices or len(self.color_choices) != len(self.color_choices):
             return "ERR: color not match"
 
-        total = len(percentages)
+        # quantized to what can be drawn, 1/8 of a cell
+        units = width * 8
+        segment_units = tuple(int(units * (p / _total)) for p in self.percentages)
+        return render_bar(segment_units, tuple(self.color_choices))
 
-        previous_taken_units = 0
 
-        segments = []
-        for index, (percent, color) in enumerate(zip(percentages, self.color_choices)):
-            current_units = max(units * percent - previous_taken_units, 0)
-            full_block_count = int(current_units // 8)
-            reminder_units = int(current_units % 8)
-            if reminder_units:
-                reminder_block = self.BARS[reminder_units - 1]
-            else:
-                reminder_block = ""
+@lru_cache(maxsize=BAR_STYLE_CACHE_SIZE)
+def bar_style(color, bgcolor=None) -> Style:
+    return Style(color=color, bgcolor=bgcolor)
 
-            display = "".join(full_block_count * self.BARS[-1])
-            display += reminder_block
 
-            if index < total - 1:
-                next_color = self.color_choices[index + 1]
-            else:
-                next_color = color
+@lru_cache(maxsize=BAR_CACHE_SIZE)
+def render_bar(segment_units, color_choices) -> Text:
+    """
+    Render the segments, each is `units` 1/8 cells long. The result is shared
+    between renders, must not be modified.
+    """
+    total = len(segment_units)
+    segments = []
+    for index, (units, color) in enumerate(zip(segment_units, color_choices)):
+        full_block_count, reminder_units = divmod(units, 8)
+        display = ColorBar.BARS[-1] * full_block_count
+        if reminder_units:
+            display += ColorBar.BARS[reminder_units - 1]
 
-            segments.append((display, Style(color=color, bgcolor=next_color)))
+        if index < total - 1:
+            next_color = color_choices[index + 1]
+        else:
+            next_color = color
 
-        bar = Text.assemble(*segments)
+        segments.append((display, bar_style(color, next_color)))
 
-        return bar
+    return Text.assemble(*segments)
@@ -5,6 +5,9 @@ from textual.app import ComposeResult
 from textual.widgets import Static, Label
 from textual.reactive import reactive
 
+from mactop.metrics_store import MetricsSource
+from mactop.scheduler import schedule_refresh
+
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +30,7 @@ class DynamicText(Static):
         update_interval,
         warning_threshold=None,
         error_threshold=None,
+        source: MetricsSource | None = None,
         *args,
         **kwargs,
     ) -> None:
@@ -39,9 +43,15 @@ class DynamicText(Static):
 
         self.warning_threshold = warning_threshold
         self.error_threshold = error_threshold
+        self.source = source
 
     def on_mount(self) -> None:
-        self.set_interval(self.update_interval, self.update_value)
+        schedule_refresh(
+            self,
+            self.update_value,
+            self.update_interval,
+            source=self.source,
+        )
 
     def update_value(self) -> None:
         result = self.update_fn()
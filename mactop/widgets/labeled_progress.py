@@ -7,6 +7,9 @@ from textual.app import ComposeResult
 from textual.widgets import Static, ProgressBar, Label
 from textual.reactive import reactive
 
+from mactop.metrics_store import MetricsSource
+from mactop.scheduler import schedule_refresh
+
 INTERVAL = 0.3
 logger = logging.getLogger(__name__)
 
@@ -28,6 +31,7 @@ class LabelProgressWidget(Static):
         update_interval=INTERVAL,
         progress_total=100,
         progress_total_update_fn: None | Callable[[], float] = None,
+        source: MetricsSource | None = None,
         *args,
         **kwargs,
     ) -> None:
@@ -39,9 +43,15 @@ class LabelProgressWidget(Static):
         self.prefix_label = prefix_label
         self.progress_total = progress_total
         self.progress_total_update_fn = progress_total_update_fn
+        self.source = source
 
     def on_mount(self) -> None:
-        self.set_interval(INTERVAL, self.update_value)
+        schedule_refresh(
+            self,
+            self.update_value,
+            self.update_interval,
+            source=self.source,
+        )
 
     def update_value(self) -> None:
         if self.progress_total_update_fn:
@@ -1,6 +1,5 @@
-import copy
 import logging
-from typing import Callable, List
+from typing import Callable
 
 import textual
 from textual.app import ComposeResult, RenderResult
@@ -10,9 +9,13 @@ from textual.renderables.sparkline import Sparkline as SparklineRenderable
 from textual.renderables._blend_colors import blend_colors
 
 from rich.console import Console, ConsoleOptions, RenderResult
-from rich.segment import Segment
+from rich.segment import Segment, Segments
 from rich.style import Style
 
+from mactop.metrics_store import HistorySnapshot, MetricsSource
+from mactop.scheduler import schedule_refresh
+from mactop.widgets.sparkline_buckets import SparklineBuckets
+
 logger = logging.getLogger(__name__)
 
 
@@ -43,10 +46,11 @@ class LabeledSparkline(Static):
     def __init__(
         self,
         prefix_label,
-        update_fn: Callable[[], List[float]],
+        update_fn: Callable[[], HistorySnapshot | None],
         value_render_fn,
         update_interval=1.0,
         sparkline_reverse=False,
+        source: MetricsSource | None = None,
         *args,
         **kwargs,
     ) -> None:
@@ -57,14 +61,22 @@ class LabeledSparkline(Static):
         self.update_interval = update_interval
         self.prefix_label = prefix_label
         self.sparkline_reverse = sparkline_reverse
+        self.source = source
+        self.history = None
 
     def on_mount(self) -> None:
-        self.set_interval(self.update_interval, self.update_value)
+        schedule_refresh(
+            self,
+            self.update_value,
+            self.update_interval,
+            source=self.source,
+        )
 
     def update_value(self) -> None:
         result = self.update_fn()
         if result is not None:
-            self.value = copy.copy(result)
+            self.history = result
+            self.value = result.view()
 
     def watch_value(self, value) -> None:
         if not value:
@@ -83,6 +95,8 @@ class LabeledSparkline(Static):
                 "Can not found DOM element in Sparkline"
             )
             return
+        if isinstance(sparkline, ReversedSparkline):
+            sparkline.history = self.history
         sparkline.data = value
 
     def compose(self) -> ComposeResult:
@@ -134,19 +148,51 @@ class ReversedSparklineRenderable(SparklineRenderable):
 
 
 class ReversedSparkline(Sparkline):
+    """
+    Rendered incrementally from `history` (the HistorySnapshot of `data`)
+    when it is set, see SparklineBuckets.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.history: HistorySnapshot | None = None
+        self.buckets: SparklineBuckets | None = None
+
     def render(self) -> RenderResult:
         """Renders the sparkline when there is data available."""
         if not self.data:
             return " "
         _, base = self.background_colors
-        return ReversedSparklineRenderable(
-            self.data,
-            width=self.size.width,
-            min_color=(
-                base + self.get_component_styles("sparkline--min-color").color
-            ).rich_color,
-            max_color=(
-                base + self.get_component_styles("sparkline--max-color").color
-            ).rich_color,
-            summary_function=self.summary_function,
+        min_color = (
+            base + self.get_component_styles("sparkline--min-color").color
+        ).rich_color
+        max_color = (
+            base + self.get_component_styles("sparkline--max-color").color
+        ).rich_color
+        width = self.size.width
+        history = self.history
+        if history is None or not width:
+            return ReversedSparklineRenderable(
+                self.data,
+                width=width,
+                min_color=min_color,
+                max_color=max_color,
+                summary_function=self.summary_function,
+            )
+
+        if len(history) == 1:
+            return Segments([Segment(" " * width, Style.from_color(max_color))])
+        buckets = self.buckets
+        if (
+            buckets is None
+            or buckets.width != width
+            or buckets.capacity != history.capacity
+            or buckets.summary_function is not self.summary_function
+        ):
+            buckets = self.buckets = SparklineBuckets(
+                width, history.capacity, self.summary_function
+            )
+        buckets.update(history)
+        return Segments(
+            buckets.segments(ReversedSparklineRenderable.BARS, min_color, max_color)
         )
@@ -6,6 +6,8 @@ from textual.app import ComposeResult
 from textual.widgets import Static, Label
 from textual.reactive import reactive
 
+from mactop.metrics_store import MetricsSource
+from mactop.scheduler import schedule_refresh
 from mactop.widgets import VStringBar
 
 logger = logging.getLogger(__name__)
@@ -30,6 +32,7 @@ class LabeledVStringBar(Static):
         update_interval,
         percentages_update_fn: Callable[[], List[float]],
         value_render_fn: Callable[[List[float]], str],
+        source: MetricsSource | None = None,
         *args,
         **kwargs,
     ) -> None:
@@ -40,9 +43,15 @@ class LabeledVStringBar(Static):
         self.update_interval = update_interval
         self.prefix_label = prefix_label
         self.value_render_fn = value_render_fn
+        self.source = source
 
     def on_mount(self) -> None:
-        self.set_interval(self.update_interval, self.update_percentages)
+        schedule_refresh(
+            self,
+            self.update_percentages,
+            self.update_interval,
+            source=self.source,
+        )
 
     def update_percentages(self) -> None:
         result = self.percentages_update_fn()
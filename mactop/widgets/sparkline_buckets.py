@@ -0,0 +1,154 @@
+"""
+Incremental sparkline rendering for the published histories, see
+HistorySnapshot.
+
+A history grows by one sample per tick, but a sparkline used to recompute the
+min, the max and every bucket over the whole history on every paint.
+
+Here buckets are aligned to the absolute sample index (HistorySnapshot.count),
+not to the start of the window, so a new sample only touches the last bucket,
+and the window sliding only drops buckets from the front. The min and max of the
+window are kept by monotonic deques. Rendered segments are cached until the
+next sample, and styles are cached per bar level.
+"""
+from collections import deque
+from functools import lru_cache
+
+from rich.segment import Segment
+from rich.style import Style
+from textual.renderables._blend_colors import blend_colors
+
+from mactop.metrics_store import HistorySnapshot
+
+
+@lru_cache(maxsize=256)
+def level_style(min_color, max_color, level, levels) -> Style:
+    return Style.from_color(blend_colors(min_color, max_color, level / levels))
+
+
+class SparklineBuckets:
+    """
+    Bars of a sparkline `width` columns wide, over a history of `capacity`
+    samples. Every bar is `summary_function` of `size` samples.
+    """
+
+    def __init__(self, width, capacity, summary_function=max) -> None:
+        self.width = width
+        self.capacity = capacity
+        self.size = -(-capacity // width)
+        self.summary_function = summary_function
+        # [bucket id, summary], oldest first
+        self.buckets = deque()
+        # (sample index, value), values increasing / decreasing
+        self.lows = deque()
+        self.highs = deque()
+        # samples consumed, same as HistorySnapshot.count
+        self.count = 0
+        self._segments = None
+        self._segments_key = None
+
+    def reset(self, count, length):
+        self.buckets.clear()
+        self.lows.clear()
+        self.highs.clear()
+        self.count = count - length
+
+    def update(self, history: HistorySnapshot) -> bool:
+        """
+        Consume the samples appended to `history` since the last update,
+        returns False if there was nothing new.
+        """
+        # a snapshot never changes, but read it once anyway
+        count = history.count
+        data = history.view()
+        new = count - self.count
+        if not new:
+            return False
+        if new < 0 or new > len(data):
+            self.reset(count, len(data))
+
+        start = count - len(data)
+        size = self.size
+        for index in range(self.count, count):
+            value = data[index - start]
+            while self.lows and self.lows[-1][1] >= value:
+                self.lows.pop()
+            self.lows.append((index, value))
+            while self.highs and self.highs[-1][1] <= value:
+                self.highs.pop()
+            self.highs.append((index, value))
+
+            bucket_id = index // size
+            if self.buckets and self.buckets[-1][0] == bucket_id:
+                bucket_start = max(bucket_id * size, start)
+                partition = data[bucket_start - start : index - start + 1]
+                self.buckets[-1][1] = self.summary_function(partition)
+            else:
+                self.buckets.append([bucket_id, value])
+        self.count = count
+
+        self._evict(data, start)
+        self._segments = None
+        return True
+
+    def _evict(self, data, start):
+        while self.lows[0][0] < start:
+            self.lows.popleft()
+        while self.highs[0][0] < start:
+            self.highs.popleft()
+
+        size = self.size
+        while (self.buckets[0][0] + 1) * size <= start:
+            self.buckets.popleft()
+        first = self.buckets[0]
+        if first[0] * size < start:
+            # partly slid out of the window
+            first[1] = self.summary_function(data[: (first[0] + 1) * size - start])
+        while len(self.buckets) > self.width:
+            self.buckets.popleft()
+
+    @property
+    def minimum(self):
+        return self.lows[0][1]
+
+    @property
+    def maximum(self):
+        return self.highs[0][1]
+
+    def segments(self, bars, min_color, max_color):
+        """
+        The segments of the sparkline, `bars` are the glyphs from the lowest
+        level. Consecutive bars of the same level are merged.
+        """
+        key = (bars, min_color, max_color)
+        if self._segments is not None and self._segments_key == key:
+            return self._segments
+
+        minimum = self.minimum
+        extent = self.maximum - minimum or 1
+        levels = len(bars) - 1
+        bucket_levels = [
+            int((summary - minimum) / extent * levels) for _, summary in self.buckets
+        ]
+
+        # stretch the buckets to the width, the same as textual's Sparkline
+        step = len(bucket_levels) / self.width
+        column_levels = [bucket_levels[int(i * step)] for i in range(self.width)]
+
+        segments = []
+        run_level, run_length = column_levels[0], 0
+        for level in column_levels:
+            if level != run_level:
+                segments.append(self._segment(bars, run_level, run_length, key))
+                run_level, run_length = level, 0
+            run_length += 1
+        segments.append(self._segment(bars, run_level, run_length, key))
+
+        self._segments = segments
+        self._segments_key = key
+        return segments
+
+    def _segment(self, bars, level, length, key):
+        _, min_color, max_color = key
+        style = level_style(min_color, max_color, level, len(bars) - 1)
+        return Segment(bars[level] * length, style)
@@ -1,3 +1,4 @@
+from functools import lru_cache
 import logging
 from rich.console import RenderableType
 from rich.style import Style
@@ -5,8 +6,12 @@ from rich.text import Text
 from textual.widget import Widget
 from textual.reactive import reactive
 
+from mactop.widgets.colorbar import BAR_CACHE_SIZE, bar_style
+
 logger = logging.getLogger(__name__)
 
+BRACKET_STYLE = Style(bold=True)
+
 
 class VStringBar(Widget):
     BAR = "|"
@@ -30,13 +35,28 @@ class VStringBar(Widget):
     def render(self) -> RenderableType:
         width = self.size.width
         content_width = width - 2
+        if self.percentages and sum(self.percentages) and self.color_choices:
+            return render_vstring_bar(
+                self.quantize(content_width),
+                content_width,
+                tuple(self.color_choices),
+                self.last_empty,
+            )
+
         content = self.render_content(content_width)
         return Text.assemble(
-            ("[", Style(bold=True)),
+            ("[", BRACKET_STYLE),
             content,
-            ("]", Style(bold=True)),
+            ("]", BRACKET_STYLE),
         )
 
+    def quantize(self, width):
+        """
+        Cells taken by every segment but the last one, which takes the rest.
+        """
+        _total = sum(self.percentages)
+        return tuple(int(width * (p / _total)) for p in self.percentages[:-1])
+
     def render_content(self, width):
         if not self.percentages:
             return " " * width
@@ -45,26 +65,34 @@ class VStringBar(Widget):
 
         if not _total:
             return " " * width
-        percentages = [p / _total for p in self.percentages]
 
         if not self.color_choices or len(self.color_choices) != len(self.color_choices):
             return "ERR: color not match"
 
-        segments = []
-        left_spaces = width
-        count = len(self.percentages)
-        for index, (percent, color) in enumerate(zip(percentages, self.color_choices)):
-            if index == count - 1:  # last one
-                if self.last_empty:
-                    b = " "
-                else:
-                    b = self.BAR
-                segments.append((b * left_spaces, Style(color=color)))
-                break
-            current = int(width * percent)
-            segments.append((self.BAR * current, Style(color=color)))
-            left_spaces -= current
-
-        bar = Text.assemble(*segments)
-
-        return bar
+        return build_vstring_content(
+            self.quantize(width), width, tuple(self.color_choices), self.last_empty
+        )
+
+
+def build_vstring_content(cells, width, color_choices, last_empty) -> Text:
+    segments = []
+    left_spaces = width
+    for current, color in zip(cells, color_choices):
+        segments.append((VStringBar.BAR * current, bar_style(color)))
+        left_spaces -= current
+    if len(color_choices) > len(cells):
+        b = " " if last_empty else VStringBar.BAR
+        segments.append((b * left_spaces, bar_style(color_choices[len(cells)])))
+    return Text.assemble(*segments)
+
+
+@lru_cache(maxsize=BAR_CACHE_SIZE)
+def render_vstring_bar(cells, width, color_choices, last_empty) -> Text:
+    """
+    The result is shared between renders, must not be modified.
+    """
+    return Text.assemble(
+        ("[", BRACKET_STYLE),
+        build_vstring_content(cells, width, color_choices, last_empty),
+        ("]", BRACKET_STYLE),
+    )
@@ -1,8 +1,14 @@
-from mactop.panels.battery import ChargingRateDisplay
+from mactop.metrics_store import BatteryCapacityHistory
+
+
+def build_history(items, retention=3600):
+    history = BatteryCapacityHistory(retention=retention)
+    for timestamp, capacity in items:
+        history.append(timestamp, capacity)
+    return history
 
 
 def test_battery_changing_get_second_last():
-    b = ChargingRateDisplay()
     charging_history = [
         (1693963302.615168, 3461),
         (1693963303.615168, 3469),
@@ -25,30 +31,62 @@ def test_battery_changing_get_second_last():
         (1693963321.313658, 3519),
         (1693963322.361393, 3519),
     ]
-    result = b._get_last_change(charging_history)
-    assert result == (
-        (1693963303.615168, 3469),
-        (1693963320.277039, 3519),
+    history = build_history(charging_history)
+    assert len(history) == 3
+    assert history.last_change == (1693963320.277039, 3519)
+    assert history.minute_rate == (
+        (3519 - 3469) / (1693963320.277039 - 1693963303.615168) * 60
     )
+    assert history.total_time == 1693963322.361393 - 1693963302.615168
+    assert history.accumulated == 3519 - 3461
 
 
 def test_battery_changing_get_second_last_only_1_or_empty():
-    b = ChargingRateDisplay()
-    charging_history = [
-        (1693963322.361393, 3519),
-    ]
-    result = b._get_last_change(charging_history)
-    assert result == (None, None)
-    charging_history = []
-    result = b._get_last_change(charging_history)
-    assert result == (None, None)
+    history = build_history([(1693963322.361393, 3519)])
+    assert history.minute_rate is None
+    assert history.estimate_minutes(3519, 8000) is None
+
+    history = build_history([])
+    assert history.minute_rate is None
+    assert history.total_time == 0
 
 
 def test_battery_changing_get_second_last_only_2():
-    b = ChargingRateDisplay()
-    charging_history = [
-        (1693963317.1332538, 3469),
-        (1693963322.361393, 3519),
-    ]
-    result = b._get_last_change(charging_history)
-    assert result == (None, None)
+    history = build_history(
+        [
+            (1693963317.1332538, 3469),
+            (1693963322.361393, 3519),
+        ]
+    )
+    assert history.minute_rate is None
+
+
+def test_battery_history_estimate():
+    history = build_history([(0, 100), (60, 110), (120, 120), (150, 120)])
+    assert history.minute_rate == 10
+    assert history.estimate_minutes(120, 200) == 8
+
+    history = build_history([(0, 100), (60, 90), (120, 80)])
+    assert history.minute_rate == -10
+    assert history.estimate_minutes(80, 200) == 8
+
+
+def test_battery_history_retention():
+    history = build_history(
+        [(t, 1000 + t // 60) for t in range(0, 3600, 10)], retention=600
+    )
+    # one run per minute, only the last 10 minutes are kept
+    assert len(history) == 11
+    assert history.runs[0][0] == 2940
+    assert history.minute_rate == 1
+
+
+def test_battery_snapshot_never_changes():
+    history = build_history([(0, 100), (60, 110), (120, 120)])
+    snapshot = history.snapshot()
+    history.append(180, 140)
+
+    assert (len(snapshot), snapshot.total_time, snapshot.accumulated) == (3, 120, 20)
+    assert snapshot.minute_rate == 10
+    assert snapshot.estimate_minutes(120, 200) == 8
+    assert history.minute_rate == 20
@@ -0,0 +1,91 @@
+import plistlib
+import threading
+from pathlib import Path
+
+from mactop import metrics_store
+from mactop.metrics_source import ioreg
+from mactop.metrics_source.ioreg import (
+    AdaptiveInterval,
+    FileIORegSource,
+    create_ioreg_source,
+    handle_ioreg_sample,
+    run_ioreg_periodic,
+)
+
+FIXTURE = Path(__file__).parent / "fixtures" / "apple_smart_battery.plist"
+
+
+def test_file_source_replays_samples(monkeypatch):
+    monkeypatch.setattr(ioreg, "metrics", metrics_store.Metrics())
+    source = create_ioreg_source(FIXTURE)
+    assert isinstance(source, FileIORegSource)
+    assert len(source.samples) == 5
+
+    capacities = [
+        handle_ioreg_sample(source.read()).apple_smart_battery.apple_raw_current_capacity
+        for _ in range(6)
+    ]
+    assert capacities == [3461, 3461, 3469, 3469, 3519, 3461]
+
+
+def test_adaptive_interval_backoff():
+    polling = AdaptiveInterval(1, 10)
+    assert polling.next(True) == 1
+    assert [polling.next(False) for _ in range(5)] == [2, 4, 8, 10, 10]
+    assert polling.next(True) == 1
+
+
+def test_run_ioreg_periodic_publish(monkeypatch):
+    m = metrics_store.Metrics()
+    monkeypatch.setattr(ioreg, "metrics", m)
+    stop = threading.Event()
+
+    def stop_after_samples(source, snapshot):
+        if snapshot.generation >= 3:
+            stop.set()
+
+    m.add_listener(stop_after_samples)
+    run_ioreg_periodic(stop, FileIORegSource(FIXTURE), 0.001, 0.004)
+
+    battery = m.get_ioregmetrics().apple_smart_battery
+    assert battery.apple_raw_current_capacity == 3469
+    assert battery.external_connected
+    assert battery.adapter_details.watts == 94
+
+
+class RecordedInterval(AdaptiveInterval):
+    waits = []
+
+    def next(self, changed):
+        self.waits.append(super().next(changed))
+        return self.waits[-1]
+
+
+class ListSource:
+    name = "list"
+
+    def __init__(self, samples, stop) -> None:
+        self.samples = list(samples)
+        self.stop = stop
+
+    def read(self):
+        sample = self.samples.pop(0)
+        if not self.samples:
+            self.stop.set()
+        return sample
+
+
+def test_plug_event_resets_interval(monkeypatch):
+    monkeypatch.setattr(ioreg, "metrics", metrics_store.Metrics())
+    monkeypatch.setattr(ioreg, "AdaptiveInterval", RecordedInterval)
+    monkeypatch.setattr(RecordedInterval, "waits", [])
+    raw = plistlib.loads(FileIORegSource(FIXTURE).samples[0])
+
+    def sample(connected):
+        raw[0]["ExternalConnected"] = connected
+        return plistlib.dumps(raw)
+
+    stop = threading.Event()
+    samples = [sample(True)] * 4 + [sample(False)]
+    run_ioreg_periodic(stop, ListSource(samples, stop), 0.001, 0.004)
+    assert RecordedInterval.waits == [0.001, 0.002, 0.004, 0.004, 0.001]
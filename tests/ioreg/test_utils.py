@@ -1,4 +1,11 @@
-from mactop.utils.formatting import speed_sizeof_fmt, packet_speed_fmt, hz_format
+from rich.style import Style
+
+from mactop.utils.formatting import (
+    speed_sizeof_fmt,
+    packet_speed_fmt,
+    hz_format,
+    sizeof_fmt,
+)
 
 
 def test_speed_sizeof_fmt():
@@ -21,3 +28,15 @@ def test_packet_speed_format():
 def test_hz_format():
     assert "2604Mhz" == str(hz_format(2604490000.0))
     assert "2804Mhz" == str(hz_format(2804490000.0))
+
+
+def test_sizeof_fmt():
+    assert "1023.0  B" == str(sizeof_fmt(1023))
+    assert "   1.5KiB" == str(sizeof_fmt(1536))
+    assert "   1.0YiB" == str(sizeof_fmt(1024**8))
+    assert "   infYiB" == str(sizeof_fmt(float("inf")))
+    text = sizeof_fmt(-2048)
+    assert "  -2.0KiB" == str(text)
+    assert [(span.start, span.end, span.style) for span in text.spans] == [
+        (6, 9, Style(bold=True))
+    ]
@@ -0,0 +1,50 @@
+from pathlib import Path
+
+import pytest
+
+from mactop import metrics_store
+from mactop.metrics_source import fast_plist, powermetrics
+from mactop.metrics_source.fast_plist import BARE_AMPERSAND, FragmentsReader
+
+FIXTURE = Path(__file__).parent / "fixtures" / "ampersand_tasks.plist"
+NAMES = [
+    "kernel_task",
+    "Google Chrome Helper (Renderer)",
+    "Foo & Bar Helper",
+    "AT&T Global Network Client",
+    "Q&A;",
+    "Tom&Jerry&",
+    "&&",
+]
+
+
+def samples():
+    return [s for s in FIXTURE.read_bytes().split(b"\x00") if s.strip()]
+
+
+@pytest.mark.parametrize("loads", [fast_plist.loads, fast_plist.full_loads])
+def test_task_names_kept(loads):
+    for sample in samples():
+        data = loads(sample)
+        assert [t["name"] for t in data["tasks"]] == NAMES
+        assert data["network"]["ibyte_rate"] == 5102.82
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 11, 64])
+def test_entity_not_split_between_reads(size):
+    content = b"<s>&amp; & &#38;&lt;&</s>" * 3
+    reader = FragmentsReader([content[:10], content[10:]])
+    chunks = []
+    while chunk := reader.read(size):
+        chunks.append(chunk)
+    assert b"".join(chunks) == BARE_AMPERSAND.sub(b"&amp;", content)
+
+
+def test_handle_sample(monkeypatch):
+    m = metrics_store.Metrics()
+    m.add_task_query(metrics_store.TaskQuery())
+    monkeypatch.setattr(powermetrics, "metrics", m)
+    for sample in samples():
+        powermetrics.handle_sample(sample, 1)
+    assert m.get_powermetrics().backlight == 61
+    assert [t["name"] for t in m.get_powermetrics().tasks] == NAMES
@@ -0,0 +1,61 @@
+import gzip
+import json
+from pathlib import Path
+
+from mactop import metrics_store
+from mactop.metrics_source import powermetrics
+from mactop.metrics_source.debug_dump import DebugDumpWriter
+
+FIXTURE = Path(__file__).parent / "fixtures" / "ampersand_tasks.plist"
+
+
+def read_dumps(path):
+    with gzip.open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_dump_samples_and_errors(tmp_path, monkeypatch):
+    monkeypatch.setattr(powermetrics, "metrics", metrics_store.Metrics())
+    writer = DebugDumpWriter(tmp_path)
+
+    sample = FIXTURE.read_bytes().split(b"\x00")[0]
+    powermetrics.handle_sample(sample, 1, debug=True, debug_writer=writer)
+    powermetrics.handle_sample(b"<plist>", 1, debug_writer=writer)
+    writer.close()
+
+    dumped, error = read_dumps(tmp_path / "mactop_debug.jsonl.gz")
+    assert dumped["sample"]["tasks"][2]["name"] == "Foo & Bar Helper"
+    assert error["raw"] == "<plist>"
+
+
+def test_worker_started_on_first_dump(tmp_path, monkeypatch):
+    monkeypatch.setattr(powermetrics, "metrics", metrics_store.Metrics())
+    writer = DebugDumpWriter(tmp_path)
+    sample = FIXTURE.read_bytes().split(b"\x00")[0]
+    powermetrics.handle_sample(sample, 1, debug_writer=writer)
+    assert writer.worker is None
+
+    powermetrics.handle_sample(b"<plist>", 1, debug_writer=writer)
+    assert writer.worker is not None
+    writer.close()
+    assert [d["raw"] for d in read_dumps(writer.path)] == ["<plist>"]
+
+
+def test_rotate_within_retention(tmp_path):
+    writer = DebugDumpWriter(tmp_path, retention=1, files=3)
+    writer.file_size = 200
+    for i in range(100):
+        writer.write({"sample": i, "padding": str(i) * 200})
+    writer.close()
+
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert files == [
+        "mactop_debug.jsonl.gz",
+        "mactop_debug.jsonl.gz.1",
+        "mactop_debug.jsonl.gz.2",
+    ]
+    kept = [
+        d["sample"] for name in reversed(files) for d in read_dumps(tmp_path / name)
+    ]
+    assert kept == list(range(kept[0], 100))
+    assert kept[0] > 0
@@ -0,0 +1,99 @@
+from datetime import datetime
+import plistlib
+
+from mactop.metrics_source import fast_plist
+from mactop.metrics_source.powermetrics import PowerMetricsParser
+from mactop.metrics_store import PowerMetrics, TaskQuery
+
+SAMPLE = {
+    "is_delta": True,
+    "hw_model": "MacBookPro16,1",
+    "timestamp": datetime(2023, 12, 6, 16, 34, 28),
+    "backlight": {"value": 42},
+    "tasks": [
+        {
+            "pid": 1,
+            "name": "launchd <1> & co",
+            "cputime_ns": 123,
+            "timer_wakeups": [{"interval_ns": 2000000, "wakeups": 0}],
+        },
+        {"pid": 2, "name": "kernel_task", "cputime_ns": -1, "timer_wakeups": []},
+    ],
+    "interrupts": [{"cpu": 0, "total_irq": 12.5, "smc": {"disk": []}}],
+    "network": {"ibyte_rate": 1.5, "obyte_rate": 0.0},
+    "disk": {"rbytes_per_s": 1024.0, "blob": b"\x00\x01", "empty": {}},
+    "smc": {"cpu_die": 60.5, "fan": 2000.0, "ok": False},
+    "processor": {
+        "package_watts": 12.0,
+        "packages": [
+            {
+                "c_state_ratio": 0.5,
+                "cores": [
+                    {
+                        "core": 0,
+                        "c_state_ratio": 0.1,
+                        "cpus": [{"cpu": 0, "freq_hz": 2.6e9, "freq_ratio": 1.0}],
+                    }
+                ],
+            }
+        ],
+    },
+}
+
+
+def test_same_as_plistlib():
+    content = plistlib.dumps(SAMPLE)
+    full = plistlib.loads(content)
+    fast = fast_plist.loads(content)
+
+    assert set(fast) == {"backlight", "tasks", "network", "disk", "smc", "processor"}
+    for key, value in fast.items():
+        assert value == full[key], key
+
+
+def test_tasks_are_lazy():
+    fast = fast_plist.loads(plistlib.dumps(SAMPLE))
+    tasks = fast["tasks"]
+    assert not tasks.parsed
+    # only a copy of the array, the sample isn't kept
+    assert tasks.content.startswith(b"<array>")
+    assert tasks.content.endswith(b"</array>")
+    assert tasks[0]["name"] == "launchd <1> & co"
+    assert tasks.parsed
+    assert len(tasks) == 2
+
+    empty = fast_plist.loads(plistlib.dumps({"tasks": [], "smc": {}}))
+    assert list(empty["tasks"]) == []
+    assert empty["smc"] == {}
+
+
+def test_same_powermetrics():
+    content = plistlib.dumps(SAMPLE)
+    results = []
+    for loads in (plistlib.loads, fast_plist.loads):
+        results.append(
+            PowerMetricsParser(loads(content), PowerMetrics(), 1).parse()
+        )
+    full, fast = results
+    # HistorySnapshot compares by identity, compare the values by repr
+    assert repr(fast) == repr(full)
+
+
+def test_tasks_only_published_for_queries():
+    raw = fast_plist.loads(plistlib.dumps(SAMPLE))
+    parsed = PowerMetricsParser(raw, PowerMetrics(), 1).parse()
+    assert parsed.tasks is None
+    assert not raw["tasks"].parsed
+
+    query = TaskQuery()
+    parsed = PowerMetricsParser(raw, PowerMetrics(), 1, task_queries=[query]).parse()
+    # parsed in the worker, not when a widget reads it
+    assert parsed.tasks.parsed
+    assert len(parsed.task_views[query]) == 2
+
+
+def test_published_history_never_changes():
+    old = PowerMetricsParser({"disk": {"rops_per_s": 1.0}}, PowerMetrics(), 1).parse()
+    new = PowerMetricsParser({"disk": {"rops_per_s": 2.0}}, old, 1).parse()
+    assert old.disk.rops_per_s_history.view().tolist() == [1.0]
+    assert new.disk.rops_per_s_history.view().tolist() == [1.0, 2.0]
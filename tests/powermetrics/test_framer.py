@@ -0,0 +1,33 @@
+import io
+
+from mactop.metrics_source.framer import SampleFramer
+
+
+SAMPLE = b'<?xml version="1.0"?>\n<plist version="1.0">\n<dict></dict>\n</plist>\n'
+
+
+def frames(content, chunk_size=7):
+    fd = io.BufferedReader(io.BytesIO(content))
+    return list(SampleFramer(fd, chunk_size=chunk_size))
+
+
+def test_split_samples_on_nul():
+    assert frames(SAMPLE + b"\x00" + SAMPLE + b"\x00") == [SAMPLE, SAMPLE]
+
+
+def test_last_sample_without_delimiter():
+    assert frames(SAMPLE + b"\x00" + SAMPLE) == [SAMPLE, SAMPLE]
+
+
+def test_leading_whitespace_and_empty_frames():
+    assert frames(b"\n" + SAMPLE + b"\x00\x00\n") == [SAMPLE]
+
+
+def test_bytes_copied():
+    content = (SAMPLE + b"\x00") * 10
+    fd = io.BufferedReader(io.BytesIO(content))
+    framer = SampleFramer(fd, chunk_size=4096)
+    assert len(list(framer)) == 10
+    assert framer.bytes_read == len(content)
+    # each byte is copied into the buffer once, and once more into the sample
+    assert framer.bytes_copied == len(content) + len(SAMPLE) * 10
@@ -0,0 +1,64 @@
+import io
+import threading
+from pathlib import Path
+
+from mactop import metrics_store
+from mactop.metrics_source import powermetrics
+from mactop.metrics_source.pipeline import DropOldestQueue, start_worker
+from mactop.metrics_store import PipelineStats
+
+FIXTURE = Path(__file__).parent / "fixtures" / "ampersand_tasks.plist"
+
+
+def test_drop_oldest():
+    queue = DropOldestQueue(maxsize=2)
+    assert queue.put(1)
+    assert queue.put(2)
+    assert not queue.put(3)
+    queue.close()
+
+    assert queue.get() == 2
+    assert queue.get() == 3
+    assert queue.get() is None
+    assert queue.stats.received == 3
+    assert queue.stats.dropped == 1
+    assert queue.stats.max_depth == 2
+    assert queue.stats.depth == 0
+
+
+def test_slow_worker_gets_freshest():
+    handled = []
+    blocked = threading.Event()
+    release = threading.Event()
+
+    def handle(item):
+        handled.append(item)
+        blocked.set()
+        release.wait(5)
+
+    queue = DropOldestQueue(maxsize=1)
+    worker = start_worker(queue, handle)
+    queue.put(0)
+    assert blocked.wait(5)
+    for i in range(1, 10):
+        queue.put(i)
+    release.set()
+    queue.close()
+    worker.join(5)
+
+    assert handled == [0, 9]
+    assert queue.stats.dropped == 8
+    assert queue.stats.handled == 2
+
+
+def test_streaming_publishes_every_sample(monkeypatch):
+    m = metrics_store.Metrics()
+    monkeypatch.setattr(powermetrics, "metrics", m)
+    stats = PipelineStats()
+
+    with open(FIXTURE, "rb") as f:
+        powermetrics.streaming_powermetrics(io.BufferedReader(f), 1, stats=stats)
+
+    assert m.get_powermetrics().backlight == 61
+    assert stats.received == stats.handled == 2
+    assert stats.dropped == 0
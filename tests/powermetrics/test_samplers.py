@@ -0,0 +1,64 @@
+import importlib.metadata
+from pathlib import Path
+
+import pytest
+
+from mactop.layout_loader import XmlLayoutLoader
+from mactop.metrics_source.powermetrics import (
+    SAMPLER_BY_KEY,
+    PowerMetricsManager,
+    samplers_for_keys,
+)
+from mactop.panels import PANELS
+
+THEMES = Path(__file__).parent.parent.parent / "mactop" / "themes"
+
+
+def test_samplers_for_keys():
+    assert samplers_for_keys([]) == []
+    assert samplers_for_keys(["processor_m1", "m1_gpu", "backlight"]) == [
+        "battery",
+        "cpu_power",
+        "gpu_power",
+    ]
+    with pytest.raises(ValueError):
+        samplers_for_keys(["not_a_key"])
+    assert samplers_for_keys(None) is None
+
+
+def test_panels_declare_known_keys():
+    for tag in PANELS.builtin:
+        for key in PANELS[tag].POWERMETRICS_KEYS:
+            assert key in SAMPLER_BY_KEY, tag
+
+
+def test_layout_powermetrics_keys(tmp_path):
+    theme = tmp_path / "theme.xml"
+    theme.write_text(
+        "<Mactop><layout>"
+        "<CPUUsageBarPanel/>"
+        "<Horizontal><SensorsPanel/><DiskROpsPerSSparkline/></Horizontal>"
+        "</layout></Mactop>"
+    )
+    assert XmlLayoutLoader(theme, 1).powermetrics_keys() == {"smc", "disk"}
+
+    keys = XmlLayoutLoader(THEMES / "m1.xml", 1).powermetrics_keys()
+    assert "tasks" not in keys
+    assert "processor_m1" in keys
+
+
+def test_undeclared_panel_needs_all_samplers(tmp_path, monkeypatch):
+    plugin = importlib.metadata.EntryPoint(
+        "MyPanel", "textual.widgets:Static", PANELS.group
+    )
+    monkeypatch.setattr(PANELS, "_plugins", {"MyPanel": plugin})
+    monkeypatch.setattr(PANELS, "_classes", {})
+    theme = tmp_path / "theme.xml"
+    theme.write_text("<Mactop><layout><UptimeText/><MyPanel/></layout></Mactop>")
+    assert XmlLayoutLoader(theme, 1).powermetrics_keys() is None
+
+
+def test_no_powermetrics_when_no_sampler_needed():
+    manager = PowerMetricsManager(1, debug=False, samplers=[])
+    manager.start()
+    assert manager.process is None
@@ -0,0 +1,79 @@
+import asyncio
+
+from textual.app import App
+
+from mactop.panels.tasks import TaskTable, diff_tasks
+
+COLUMNS = ["pid", "name", "energy_impact"]
+
+
+def row(pid, energy=0.0):
+    return (pid, f"p{pid}", energy)
+
+
+def test_first_diff_adds_all():
+    diff, shown = diff_tasks({}, [row(1), row(2)], COLUMNS)
+    assert diff.added == [("1", (1, "p1", 0.0)), ("2", (2, "p2", 0.0))]
+    assert diff.removed == diff.changed == []
+    assert diff.order is None
+    assert shown == {"1": (1, "p1", 0.0), "2": (2, "p2", 0.0)}
+
+
+def test_only_changed_cells():
+    _, shown = diff_tasks({}, [row(1), row(2), row(3)], COLUMNS)
+    diff, shown = diff_tasks(shown, [row(1), row(2, 5.0), row(4)], COLUMNS)
+    assert diff.added == [("4", (4, "p4", 0.0))]
+    assert diff.removed == ["3"]
+    assert diff.changed == [("2", "energy_impact", 5.0)]
+    assert diff.order is None
+    assert set(shown) == {"1", "2", "4"}
+
+
+def test_nothing_changed():
+    _, shown = diff_tasks({}, [row(1), row(2)], COLUMNS)
+    diff, _ = diff_tasks(shown, [row(1), row(2)], COLUMNS)
+    assert not diff
+
+
+def test_reordered():
+    _, shown = diff_tasks({}, [row(1), row(2), row(3)], COLUMNS)
+    diff, _ = diff_tasks(shown, [row(4), row(3), row(1)], COLUMNS)
+    assert diff.order == ["4", "3", "1"]
+    assert diff.removed == ["2"]
+
+
+class TableApp(App):
+    def compose(self):
+        yield TaskTable(refresh_interval=3600)
+
+
+def task_row(pid, energy):
+    return (pid, f"p{pid}", energy, 0.0, 0.0, 0, ())
+
+
+def shown_rows(table):
+    return [table.get_row_at(i)[0] for i in range(table.row_count)]
+
+
+def test_apply_diff():
+    app = TableApp()
+
+    async def run():
+        async with app.run_test() as pilot:
+            table = app.query_one(TaskTable)
+            table.tasks = [task_row(i, 10.0 - i) for i in range(1, 6)]
+            await pilot.pause()
+            assert shown_rows(table) == [1, 2, 3, 4, 5]
+
+            table.tasks = [
+                task_row(6, 9.5),
+                task_row(1, 9.0),
+                task_row(3, 7.0),
+                task_row(5, 5.0),
+            ]
+            await pilot.pause()
+            assert shown_rows(table) == [6, 1, 3, 5]
+            assert table.get_row("1")[2] == 9.0
+            assert table.get_row_index("5") == 3
+
+    asyncio.run(run())
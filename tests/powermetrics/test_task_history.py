@@ -0,0 +1,93 @@
+from mactop.metrics_source.powermetrics import PowerMetricsParser
+from mactop.metrics_store import (
+    TASK_EVICT_AFTER,
+    PowerMetrics,
+    TaskHistory,
+    TaskQuery,
+    TaskRecords,
+)
+
+
+def task(pid, energy, started=1, cputime_ms_per_s=0.0):
+    return {
+        "pid": pid,
+        "name": f"p{pid}",
+        "started_abstime_ns": started,
+        "interval_ns": 1000000000,
+        "energy_impact": energy,
+        "cputime_ns": int(cputime_ms_per_s * 1000000),
+        "cputime_ms_per_s": cputime_ms_per_s,
+    }
+
+
+def test_delta_rate_and_trend():
+    history = TaskHistory(size=4)
+    TaskRecords([task(1, 1.0)], history)
+    TaskRecords([task(1, 3.0)], history)
+    records = TaskRecords([task(1, 2.5, cputime_ms_per_s=250.0)], history)
+
+    assert records.energy_delta[0] == -0.5
+    assert records.cpu_ms_per_s[0] == 250
+    assert records.row(0)[-1] == (1.0, 3.0, 2.5)
+    assert history.trend((1, 1), size=2) == (3.0, 2.5)
+
+    # the records of a published sample don't change with the history
+    TaskRecords([task(1, 4.0)], history)
+    assert records.row(0)[-1] == (1.0, 3.0, 2.5)
+
+
+def test_reused_pid_starts_new_history():
+    history = TaskHistory()
+    TaskRecords([task(1, 5.0, started=1)], history)
+    records = TaskRecords([task(1, 1.0, started=2)], history)
+    assert records.energy_delta[0] == 0
+    assert records.row(0)[-1] == (1.0,)
+
+
+def test_evict_exited_and_bounded():
+    history = TaskHistory(max_tasks=2)
+    TaskRecords([task(1, 1.0), task(2, 1.0), task(3, 1.0)], history)
+    assert len(history) == 2
+    assert history.trend((3, 1)) == ()
+
+    for _ in range(TASK_EVICT_AFTER):
+        TaskRecords([task(2, 1.0)], history)
+    assert set(history.slots) == {(2, 1)}
+
+
+def test_slots_reused_and_trend_wraps():
+    history = TaskHistory(size=3, max_tasks=2)
+    for energy in range(5):
+        TaskRecords([task(1, float(energy))], history)
+    assert history.trend((1, 1), size=5) == (2.0, 3.0, 4.0)
+    assert history.trend((1, 1), size=2) == (3.0, 4.0)
+
+    for _ in range(TASK_EVICT_AFTER):
+        TaskRecords([task(2, 1.0)], history)
+    records = TaskRecords([task(2, 1.0), task(3, 7.0)], history)
+    assert len(history.counts) == 2
+    assert records.row(1)[-1] == (7.0,)
+
+
+def test_history_carried_over_by_parser():
+    query = TaskQuery(limit=1)
+    old = PowerMetrics()
+    for energy in (1.0, 4.0):
+        old = PowerMetricsParser(
+            {"tasks": [task(7, energy)]}, old, 1, task_queries={query}
+        ).parse()
+    assert old.task_views[query][0][3] == 3.0
+    assert old.task_views[query][0][-1] == (1.0, 4.0)
+
+
+def test_empty_history_carried_over_by_parser():
+    query = TaskQuery()
+    old = PowerMetricsParser(
+        {"tasks": []}, PowerMetrics(), 1, task_queries={query}
+    ).parse()
+    history = old.task_history
+    assert len(history) == 0
+    new = PowerMetricsParser(
+        {"tasks": [task(7, 1.0)]}, old, 1, task_queries={query}
+    ).parse()
+    assert new.task_history is history
@@ -0,0 +1,61 @@
+import pytest
+
+from mactop.metrics_source.powermetrics import PowerMetricsParser
+from mactop.metrics_store import PowerMetrics, TaskQuery, TaskRecords
+
+TASKS = [
+    {"pid": 1, "name": "launchd", "energy_impact": 0.5, "cputime_ns": 300},
+    {"pid": 412, "name": "Google Chrome", "energy_impact": 9.0, "cputime_ns": 100},
+    {"pid": 41, "name": "WindowServer", "energy_impact": 3.0, "cputime_ns": 900},
+    {"pid": 533, "name": "Chrome Helper", "energy_impact": 1.0, "cputime_ns": 200},
+]
+
+
+def pids(rows):
+    return [row[0] for row in rows]
+
+
+def test_sort_and_limit():
+    records = TaskRecords(TASKS)
+    assert pids(records.select(TaskQuery())) == [412, 41, 533, 1]
+    assert pids(records.select(TaskQuery(limit=2))) == [412, 41]
+    assert pids(records.select(TaskQuery("cputime_ns", limit=1))) == [41]
+    assert pids(records.select(TaskQuery("pid", descending=False, limit=3))) == [
+        1,
+        41,
+        412,
+    ]
+    assert records.select(TaskQuery(limit=1))[0] == (
+        412,
+        "Google Chrome",
+        9.0,
+        0.0,
+        0.0,
+        100,
+        (),
+    )
+
+
+def test_filter_by_name_or_pid():
+    records = TaskRecords(TASKS)
+    assert pids(records.select(TaskQuery(filter="chrome"))) == [412, 533]
+    assert pids(records.select(TaskQuery(filter="41"))) == [41]
+    assert records.select(TaskQuery(filter="nothing")) == []
+
+
+def test_unknown_sort_key():
+    with pytest.raises(ValueError):
+        TaskQuery("memory")
+
+
+def test_views_only_for_queries():
+    raw = {"tasks": TASKS}
+    powermetrics = PowerMetricsParser(raw, PowerMetrics(), 1).parse()
+    assert powermetrics.task_records is None
+    assert powermetrics.task_views == {}
+
+    query = TaskQuery(limit=1)
+    powermetrics = PowerMetricsParser(
+        raw, PowerMetrics(), 1, task_queries={query}
+    ).parse()
+    assert pids(powermetrics.task_views[query]) == [412]
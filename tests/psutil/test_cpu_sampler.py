@@ -0,0 +1,39 @@
+import threading
+from collections import namedtuple
+
+from mactop import metrics_store
+from mactop.metrics_source import psutil_manager
+from mactop.metrics_source.psutil_manager import cpu_times_percent_delta, run_psutil
+
+cputimes = namedtuple("scputimes", ["user", "nice", "system", "idle"])
+
+
+def test_cpu_times_percent_delta():
+    old = cputimes(user=10, nice=0, system=5, idle=85)
+    new = cputimes(user=30, nice=0, system=15, idle=155)
+    p = cpu_times_percent_delta(old, new)
+    assert (p.user, p.nice, p.system, p.idle) == (20.0, 0.0, 10.0, 70.0)
+
+
+def test_cpu_times_percent_delta_no_change():
+    t = cputimes(user=10, nice=0, system=5, idle=85)
+    p = cpu_times_percent_delta(t, t)
+    assert (p.user, p.nice, p.system, p.idle) == (0.0, 0.0, 0.0, 0.0)
+
+
+def test_run_psutil_publish_with_jitter(monkeypatch):
+    m = metrics_store.Metrics()
+    monkeypatch.setattr(psutil_manager, "metrics", m)
+    stop = threading.Event()
+
+    def stop_after_samples(source, snapshot):
+        if snapshot.generation >= 3:
+            stop.set()
+
+    m.add_listener(stop_after_samples)
+    run_psutil(stop, 0.01)
+
+    psu = m.get_psutilmetrics()
+    assert psu.tick_jitter is not None
+    assert psu.cpu_percent_percpu
+    assert psu.virtual_memory.total
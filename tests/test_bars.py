@@ -0,0 +1,19 @@
+from mactop.widgets.colorbar import bar_style, render_bar
+from mactop.widgets.vstringbar import render_vstring_bar
+
+
+def test_render_bar():
+    bar = render_bar((20, 3, 0), ("green", "red", "grey23"))
+    assert bar.plain == "██▌▍"
+    assert [span.style for span in bar.spans] == [
+        bar_style("green", "red"),
+        bar_style("red", "grey23"),
+    ]
+    assert render_bar((20, 3, 0), ("green", "red", "grey23")) is bar
+
+
+def test_render_vstring_bar():
+    bar = render_vstring_bar((3, 1), 8, ("green", "red", "grey23"), True)
+    assert bar.plain == "[||||    ]"
+    bar = render_vstring_bar((3, 1), 8, ("green", "red", "grey23"), False)
+    assert bar.plain == "[||||||||]"
@@ -0,0 +1,120 @@
+from textual.css.stylesheet import Stylesheet
+
+from mactop.app import CACHEABLE_STYLESHEET, CachedStylesheet
+from mactop.compile_cache import FileCache, RulesCache
+from mactop.layout_loader import XmlLayoutLoader
+
+THEME = (
+    "<Mactop><layout>"
+    '<CPUUsageBarPanel class="bars" columns="4"/>'
+    "<Horizontal><SensorsPanel/></Horizontal>"
+    "</layout><style>SensorsPanel { height: 5; }</style></Mactop>"
+)
+
+CSS = """
+SensorsPanel {
+    border: solid $secondary;
+    height: 5;
+}
+"""
+
+
+def test_file_cache(tmp_path):
+    cache = FileCache(tmp_path, "layout", max_files=2)
+    assert cache.get("a") is None
+    cache.put("a", {"value": 1})
+    assert cache.get("a") == {"value": 1}
+
+    cache.path("b").write_bytes(b"not a pickle")
+    assert cache.get("b") is None
+
+    cache.put("c", 3)
+    cache.put("d", 4)
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "layout-c.pickle",
+        "layout-d.pickle",
+    ]
+
+
+def test_compiled_layout_cache(tmp_path):
+    theme = tmp_path / "theme.xml"
+    theme.write_text(THEME)
+    cache = FileCache(tmp_path / "cache", "layout")
+
+    loader = XmlLayoutLoader(theme, 2, cache=cache)
+    nodes, css = loader.compile()
+    assert nodes == [
+        ("CPUUsageBarPanel", True, {"classes": "bars", "columns": "4"}, []),
+        ("Horizontal", False, {}, [("SensorsPanel", True, {}, [])]),
+    ]
+    assert css == "SensorsPanel { height: 5; }"
+
+    def compile_xml(content):
+        raise AssertionError("theme parsed again")
+
+    loader.compile_xml = compile_xml
+    assert loader.compile() == (nodes, css)
+    assert loader.powermetrics_keys() == {"smc"}
+
+    widgets, _ = loader.load()
+    assert [type(widget).__name__ for widget in widgets] == [
+        "CPUUsageBarPanel",
+        "Horizontal",
+    ]
+    assert widgets[0].refresh_interval == 2
+
+    theme.write_text(THEME.replace("<SensorsPanel/>", ""))
+    del loader.compile_xml
+    nodes, _ = loader.compile()
+    assert nodes[1] == ("Horizontal", False, {}, [])
+
+
+def test_cached_stylesheet(tmp_path, monkeypatch):
+    variables = {"secondary": "#004578"}
+    rules_cache = RulesCache(FileCache(tmp_path, "css"))
+    stylesheet = CachedStylesheet(rules_cache=rules_cache, variables=variables)
+    stylesheet.add_source(CSS, "theme")
+    stylesheet.parse()
+    rules_cache.save()
+
+    expected = Stylesheet(variables=variables)
+    expected.add_source(CSS, "theme")
+    assert stylesheet.css == expected.css
+
+    # the next start
+    rules_cache = RulesCache(FileCache(tmp_path, "css"))
+    stylesheet = CachedStylesheet(rules_cache=rules_cache, variables=variables)
+
+    def parse_rules(*args, **kwargs):
+        raise AssertionError("css parsed again")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(Stylesheet, "_parse_rules", parse_rules)
+        stylesheet.add_source(CSS, "theme")
+        stylesheet.parse()
+    assert stylesheet.css == expected.css
+
+    # other variables are parsed again
+    stylesheet.set_variables({"secondary": "#ff0000"})
+    stylesheet.parse()
+    assert "border: solid #FF0000;" in stylesheet.css
+
+
+def test_stylesheet_cacheable_on_pinned_textual():
+    assert CACHEABLE_STYLESHEET
+
+
+def test_cached_stylesheet_ignores_invalid_rules(tmp_path):
+    variables = {"secondary": "#004578"}
+    rules_cache = RulesCache(FileCache(tmp_path, "css"))
+    stylesheet = CachedStylesheet(rules_cache=rules_cache, variables=variables)
+    stylesheet.add_source(CSS, "theme")
+    stylesheet.parse()
+    # e.g. written by another version of textual
+    for key in rules_cache.load():
+        rules_cache.put(key, ["not a rule"])
+
+    stylesheet = CachedStylesheet(rules_cache=rules_cache, variables=variables)
+    stylesheet.add_source(CSS, "theme")
+    stylesheet.parse()
+    assert "height: 5;" in stylesheet.css
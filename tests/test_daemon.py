@@ -0,0 +1,188 @@
+from collections import Counter
+import io
+import os
+import pickle
+import socket
+import stat
+import threading
+
+import pytest
+
+from mactop import metrics_store
+from mactop.metrics_source import daemon as daemon_module
+from mactop.metrics_source.daemon import (
+    STREAM_MAGIC,
+    AttachManager,
+    MetricsDaemon,
+    encode_sample,
+    prepare_socket_directory,
+    read_samples,
+)
+from mactop.metrics_source.recorder import FRAME_HEADER, SOURCE_IDS
+from mactop.metrics_store import (
+    BatteryCapacityHistory,
+    IORegMetrics,
+    MetricsSource,
+    PowerMetrics,
+    ProcessorIntel,
+    RingBuffer,
+    TaskHistory,
+    TaskQuery,
+    TaskRecords,
+)
+
+
+class PublishCounter:
+    def __init__(self) -> None:
+        self.backlights = Counter()
+        self.condition = threading.Condition()
+
+    def __call__(self, source, snapshot):
+        with self.condition:
+            self.backlights[snapshot.value.backlight] += 1
+            self.condition.notify_all()
+
+    def wait_for(self, expected):
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: all(self.backlights[k] >= v for k, v in expected.items()),
+                timeout=5,
+            )
+
+
+def collect(collector, backlight):
+    """
+    Publish a powermetrics sample in the daemon, with a history.
+    """
+    old = collector.get_powermetrics().processor_intel.package_watts_history
+    history = RingBuffer(10) if old is None else old.buffer
+    history.append(backlight)
+    collector.set_powermetrics(
+        PowerMetrics(
+            backlight=backlight,
+            processor_intel=ProcessorIntel(package_watts_history=history.snapshot()),
+            task_records=TaskRecords(
+                [{"pid": 1, "name": "a"}, {"pid": 2, "name": "b"}], TaskHistory()
+            ),
+            task_history=TaskHistory(),
+        )
+    )
+
+
+@pytest.fixture
+def daemon_and_viewer(tmp_path, monkeypatch):
+    """
+    The metrics of the daemon's collectors, and of the viewers.
+    """
+    collector = metrics_store.Metrics()
+    viewer = metrics_store.Metrics()
+    monkeypatch.setattr(daemon_module, "metrics", viewer)
+    daemon = MetricsDaemon(str(tmp_path / "mactop.sock"))
+    collector.add_listener(daemon.publish)
+    yield daemon, collector, viewer
+    daemon.stop()
+
+
+def test_viewers_receive_latest_and_live_samples(daemon_and_viewer):
+    daemon, collector, viewer = daemon_and_viewer
+    counter = PublishCounter()
+    viewer.add_listener(counter)
+    viewer.add_task_query(TaskQuery(sort_by="pid", descending=True))
+
+    for backlight in range(1, 4):
+        collect(collector, backlight)
+    daemon.start()
+    viewers = [AttachManager(daemon.socket_path) for _ in range(2)]
+    try:
+        for attached in viewers:
+            attached.start()
+        # only the latest sample, it has the history
+        assert counter.wait_for({3: 2})
+
+        collect(collector, 42)
+        assert counter.wait_for({42: 2})
+    finally:
+        for attached in viewers:
+            attached.stop()
+
+    assert counter.backlights == {3: 2, 42: 2}
+    powermetrics = viewer.get_powermetrics()
+    history = powermetrics.processor_intel.package_watts_history
+    assert history.view().tolist() == [1, 2, 3, 42]
+    assert history.count == 4
+    assert history.buffer is None
+    # collector only
+    assert powermetrics.task_history is None
+    query = TaskQuery(sort_by="pid", descending=True)
+    assert [row[0] for row in powermetrics.task_views[query]] == [2, 1]
+
+
+def test_reconnect_gets_latest_sample(daemon_and_viewer, monkeypatch):
+    daemon, collector, viewer = daemon_and_viewer
+    monkeypatch.setattr(daemon_module, "RECONNECT_INTERVAL", 0.01)
+    counter = PublishCounter()
+    viewer.add_listener(counter)
+
+    collect(collector, 1)
+    daemon.start()
+    attached = AttachManager(daemon.socket_path)
+    try:
+        attached.start()
+        assert counter.wait_for({1: 1})
+        attached.sock.shutdown(socket.SHUT_RDWR)
+        collect(collector, 42)
+        assert counter.wait_for({42: 1})
+    finally:
+        attached.stop()
+    history = viewer.get_powermetrics().processor_intel.package_watts_history
+    assert history.view().tolist() == [1, 42]
+
+
+def test_battery_history_not_sent():
+    history = BatteryCapacityHistory()
+    history.append(0, 3000)
+    history.append(60, 3010)
+    ioreg = IORegMetrics()
+    ioreg.apple_smart_battery.battery_capacity_history = history.snapshot()
+    frame = encode_sample(MetricsSource.IOREG, ioreg)
+
+    [(source, received)] = read_samples(io.BytesIO(STREAM_MAGIC + frame))
+    assert source is MetricsSource.IOREG
+    snapshot = received.apple_smart_battery.battery_capacity_history
+    assert snapshot == history.snapshot()
+    assert snapshot.history is None
+
+
+def test_only_metrics_unpickled():
+    payload = pickle.dumps(os.getcwd)
+    header = FRAME_HEADER.pack(SOURCE_IDS[MetricsSource.PSUTIL], 0, len(payload))
+    with pytest.raises(pickle.UnpicklingError):
+        list(read_samples(io.BytesIO(STREAM_MAGIC + header + payload)))
+
+
+def test_viewers_limited_and_socket_private(tmp_path):
+    socket_path = str(tmp_path / "mactop.sock")
+    daemon = MetricsDaemon(socket_path, max_viewers=1)
+    daemon.start()
+    try:
+        assert stat.S_IMODE(os.stat(socket_path).st_mode) == 0o600
+        first = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        first.connect(socket_path)
+        assert first.recv(len(STREAM_MAGIC)) == STREAM_MAGIC
+        second = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        second.connect(socket_path)
+        assert second.recv(len(STREAM_MAGIC)) == b""
+        first.close()
+        second.close()
+    finally:
+        daemon.stop()
+
+
+def test_socket_directory(tmp_path):
+    directory = tmp_path / "mactop"
+    prepare_socket_directory(directory, os.getuid())
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+
+    (tmp_path / "link").symlink_to(directory)
+    with pytest.raises(RuntimeError):
+        prepare_socket_directory(tmp_path / "link", os.getuid())
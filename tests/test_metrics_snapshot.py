@@ -0,0 +1,19 @@
+from mactop.metrics_store import IORegMetrics, Metrics, PowerMetrics
+
+
+def test_publish_bumps_generation():
+    m = Metrics()
+    assert m.get_powermetrics_snapshot().generation == 0
+
+    p = PowerMetrics(backlight=10)
+    m.set_powermetrics(p)
+    snapshot = m.get_powermetrics_snapshot()
+    assert snapshot.value is p
+    assert m.get_powermetrics() is p
+    assert snapshot.generation == 1
+
+    m.set_ioregmetrics(IORegMetrics())
+    assert m.get_ioregmetrics_snapshot().generation == 2
+    # publishing ioreg doesn't touch powermetrics
+    assert m.get_powermetrics_snapshot() is snapshot
+
@@ -0,0 +1,128 @@
+import io
+import plistlib
+from pathlib import Path
+
+import pytest
+
+from mactop import metrics_store
+from mactop.metrics_source import ioreg, powermetrics, psutil_manager
+from mactop.metrics_source.psutil_manager import (
+    decode_psutil_sample,
+    encode_psutil_sample,
+)
+from mactop.metrics_source.recorder import (
+    RecordFormatError,
+    Recorder,
+    read_frames,
+    replay,
+)
+from mactop.metrics_store import (
+    CPUTimesPercent,
+    LoadAvg,
+    MetricsSource,
+    PsutilMetrics,
+)
+
+POWERMETRICS_SAMPLE = (
+    b'<?xml version="1.0"?>\n<plist version="1.0">\n<dict>'
+    b"<key>backlight</key><dict><key>value</key><integer>42</integer></dict>"
+    b"</dict>\n</plist>\n"
+)
+IOREG_SAMPLE = (
+    Path(__file__).parent / "ioreg" / "fixtures" / "apple_smart_battery.plist"
+).read_bytes().split(b"\x00")[0]
+
+
+def psutil_sample():
+    return PsutilMetrics(
+        cpu_percent_percpu=[CPUTimesPercent(user=10, idle=90)],
+        cpu_percent=CPUTimesPercent(user=10, idle=90),
+        cpu_count=1,
+        cpu_physical_count=1,
+        loadavg=LoadAvg(1.0, 2.0, 3.0),
+        boot_time=1693963302.0,
+    )
+
+
+def test_psutil_sample_roundtrip():
+    psu = psutil_sample()
+    assert decode_psutil_sample(encode_psutil_sample(psu)) == psu
+
+
+def test_record_and_read_frames(tmp_path):
+    path = tmp_path / "session.mactop"
+    recorder = Recorder(path)
+    recorder.write(MetricsSource.POWERMETRICS, POWERMETRICS_SAMPLE, timestamp=1.0)
+    recorder.close()
+
+    # append to the existing record
+    recorder = Recorder(path)
+    recorder.write(MetricsSource.IOREG, IOREG_SAMPLE, timestamp=2.0)
+    recorder.close()
+    recorder.write(MetricsSource.IOREG, IOREG_SAMPLE, timestamp=3.0)
+
+    with open(path, "rb") as f:
+        frames = list(read_frames(f))
+    assert frames == [
+        (MetricsSource.POWERMETRICS, 1.0, POWERMETRICS_SAMPLE),
+        (MetricsSource.IOREG, 2.0, IOREG_SAMPLE),
+    ]
+
+
+def test_truncated_record(tmp_path):
+    path = tmp_path / "session.mactop"
+    recorder = Recorder(path)
+    recorder.write(MetricsSource.POWERMETRICS, POWERMETRICS_SAMPLE, timestamp=1.0)
+    recorder.write(MetricsSource.POWERMETRICS, POWERMETRICS_SAMPLE, timestamp=2.0)
+    recorder.close()
+
+    content = path.read_bytes()
+    frames = list(read_frames(io.BytesIO(content[:-3])))
+    assert [f[1] for f in frames] == [1.0]
+
+    with pytest.raises(RecordFormatError):
+        list(read_frames(io.BytesIO(b"not a record")))
+
+
+def test_replay_all_sources(tmp_path, monkeypatch):
+    m = metrics_store.Metrics()
+    for module in (ioreg, powermetrics, psutil_manager):
+        monkeypatch.setattr(module, "metrics", m)
+
+    path = tmp_path / "session.mactop"
+    recorder = Recorder(path)
+    recorder.write(MetricsSource.POWERMETRICS, POWERMETRICS_SAMPLE, timestamp=1.0)
+    recorder.write(MetricsSource.IOREG, IOREG_SAMPLE, timestamp=1.5)
+    recorder.write(
+        MetricsSource.PSUTIL, encode_psutil_sample(psutil_sample()), timestamp=2.0
+    )
+    recorder.close()
+
+    with open(path, "rb") as f:
+        assert replay(f, 1.0, speed=0) == 3
+
+    assert m.get_powermetrics().backlight == 42
+    assert m.get_ioregmetrics().apple_smart_battery.apple_raw_current_capacity == 3461
+    assert m.get_psutilmetrics() == psutil_sample()
+
+
+def test_replay_uses_recorded_time(tmp_path, monkeypatch):
+    m = metrics_store.Metrics()
+    monkeypatch.setattr(ioreg, "metrics", m)
+
+    battery = plistlib.loads(IOREG_SAMPLE)
+    path = tmp_path / "session.mactop"
+    recorder = Recorder(path)
+    for i in range(5):
+        battery[0]["AppleRawCurrentCapacity"] = 3000 + i * 10
+        recorder.write(
+            MetricsSource.IOREG, plistlib.dumps(battery), timestamp=1000.0 + i * 60
+        )
+    recorder.close()
+
+    with open(path, "rb") as f:
+        replay(f, 1.0, speed=0)
+
+    history = m.get_ioregmetrics().apple_smart_battery.battery_capacity_history
+    assert history.minute_rate == 10
+    assert history.total_time == 240
@@ -0,0 +1,56 @@
+import importlib.metadata
+import subprocess
+import sys
+
+from textual.containers import Vertical
+from textual.widgets import Static
+
+from mactop.layouts import LAYOUTS
+from mactop.panels import PANELS
+from mactop.registry import Registry
+
+
+def test_import_main_is_lazy():
+    code = (
+        "import sys, mactop.main;"
+        "print(sorted(m for m in sys.modules"
+        " if m == 'textual' or m.startswith('mactop.panels.')))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout
+    assert output.strip() == "[]"
+
+
+def test_import_main_without_ctypes():
+    code = "import sys, mactop.main; print('ctypes' in sys.modules)"
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout
+    assert output.strip() == "False"
+
+
+def test_builtin_imported_on_lookup():
+    assert "TaskTable" in PANELS
+    assert PANELS["TaskTable"].__name__ == "TaskTable"
+    assert sys.modules["mactop.panels.tasks"]
+    assert LAYOUTS["Vertical"] is Vertical
+
+
+def test_plugin_entry_points(monkeypatch):
+    group = "mactop.test_panels"
+    entry_points = [
+        importlib.metadata.EntryPoint("MyPanel", "textual.widgets:Static", group),
+        importlib.metadata.EntryPoint("Builtin", "textual.widgets:Label", group),
+    ]
+    monkeypatch.setattr(
+        importlib.metadata,
+        "entry_points",
+        lambda group: [e for e in entry_points if e.group == group],
+    )
+    registry = Registry({"Builtin": "textual.containers:Vertical"}, group)
+
+    assert registry["MyPanel"] is Static
+    assert registry["Builtin"] is Vertical
+    assert list(registry) == ["Builtin", "MyPanel"]
+    assert "Unknown" not in registry
@@ -0,0 +1,69 @@
+import pytest
+
+from mactop.metrics_store import RingBuffer
+
+
+def test_ring_buffer_keeps_latest_values():
+    r = RingBuffer(3)
+    assert len(r) == 0
+    assert r.last() is None
+    assert r.view().tolist() == []
+
+    for value in range(1, 6):
+        r.append(value)
+
+    assert len(r) == 3
+    assert r.count == 5
+    assert r.last() == 5
+    assert r.view().tolist() == [3, 4, 5]
+    assert r.view(2).tolist() == [4, 5]
+    assert r.view(10).tolist() == [3, 4, 5]
+    assert list(r) == [3, 4, 5]
+    assert r[-1] == 5
+
+
+def test_ring_buffer_view_is_contiguous_after_every_append():
+    r = RingBuffer(4)
+    expected = []
+    # the array is replaced a few times
+    for value in range(40):
+        r.append(value)
+        expected = (expected + [value])[-4:]
+        assert r.view().tolist() == expected
+        assert max(r.view()) == value
+
+
+def test_ring_buffer_skips_none():
+    r = RingBuffer(2)
+    r.append(1)
+    r.append(None)
+    assert r.view().tolist() == [1]
+    assert r.count == 1
+
+
+def test_snapshot_never_changes():
+    r = RingBuffer(4)
+    for value in range(4):
+        r.append(value)
+    snapshot = r.snapshot()
+    r.append(99)
+
+    assert snapshot.view().tolist() == [0, 1, 2, 3]
+    assert snapshot.view(2).tolist() == [2, 3]
+    assert (snapshot.count, snapshot.last(), len(snapshot)) == (4, 3, 4)
+    assert r.snapshot().view().tolist() == [1, 2, 3, 99]
+    assert snapshot.buffer is r
+
+
+def test_snapshot_not_copied_and_kept_when_array_replaced():
+    r = RingBuffer(2)
+    r.append(1)
+    first = r.snapshot()
+    assert first.view().obj is r.view().obj
+    with pytest.raises(TypeError):
+        first.view()[0] = 5
+
+    for value in range(2, 20):
+        r.append(value)
+    assert first.view().tolist() == [1]
+    assert r.view().tolist() == [18, 19]
@@ -0,0 +1,90 @@
+import contextlib
+
+from mactop import scheduler as scheduler_module
+from mactop.metrics_store import Metrics, MetricsSource, PowerMetrics, RefreshStats
+from mactop.scheduler import RefreshScheduler
+
+
+class FakeApp:
+    def __init__(self):
+        self.batches = 0
+        self.messages = []
+
+    def set_interval(self, interval, callback):
+        return None
+
+    def post_message(self, message):
+        self.messages.append(message)
+
+    @contextlib.contextmanager
+    def batch_update(self):
+        self.batches += 1
+        yield
+
+
+class FakeWidget:
+    is_attached = True
+
+
+def test_scheduler_fans_out_only_on_new_samples(monkeypatch):
+    m = Metrics()
+    stats = RefreshStats()
+    monkeypatch.setattr(scheduler_module, "metrics", m)
+    monkeypatch.setattr(scheduler_module, "refresh_stats", stats)
+    app = FakeApp()
+    s = RefreshScheduler(app, 1.0)
+
+    calls = []
+    s.subscribe(
+        FakeWidget(),
+        lambda: calls.append("metrics"),
+        1.0,
+        source=MetricsSource.POWERMETRICS,
+    )
+    s.subscribe(FakeWidget(), lambda: calls.append("clock"), 0)
+
+    s.tick()
+    assert sorted(calls) == ["clock", "metrics"]
+    assert app.batches == 1
+
+    calls.clear()
+    m.set_psutilmetrics(m.get_psutilmetrics())
+    s.tick()
+    assert calls == ["clock"]
+
+    calls.clear()
+    m.set_powermetrics(PowerMetrics())
+    monkeypatch.setattr(scheduler_module.time, "monotonic", lambda: 10**9)
+    s.tick()
+    assert sorted(calls) == ["clock", "metrics"]
+    assert (stats.refreshed, stats.skipped) == (5, 1)
+
+
+def test_scheduler_drops_detached_and_stopped():
+    s = RefreshScheduler(FakeApp(), 1.0)
+    detached = FakeWidget()
+    detached.is_attached = False
+    s.subscribe(detached, lambda: None, 1.0)
+    s.subscribe(FakeWidget(), lambda: None, 1.0).stop()
+    s.tick()
+    assert s.subscriptions == []
+
+
+def test_push_mode_coalesces_samples(monkeypatch):
+    m = Metrics()
+    monkeypatch.setattr(scheduler_module, "metrics", m)
+    app = FakeApp()
+    s = RefreshScheduler(app, 1.0, push=True)
+    s.start()
+
+    m.set_powermetrics(PowerMetrics())
+    m.set_powermetrics(PowerMetrics())
+    assert len(app.messages) == 1
+
+    s.handle_sample_ready()
+    m.set_powermetrics(PowerMetrics())
+    assert len(app.messages) == 2
+
+    s.stop()
+    m.set_powermetrics(PowerMetrics())
+    assert len(app.messages) == 2
@@ -0,0 +1,62 @@
+import random
+
+from rich.color import Color
+
+from mactop.metrics_store import RingBuffer
+from mactop.widgets.sparkline_buckets import SparklineBuckets
+
+BARS = "▇▆▅▄▃▂▁ "
+
+
+def expected_buckets(history, size):
+    """Recompute the buckets from scratch."""
+    start = history.count - len(history)
+    buckets = {}
+    for index, value in enumerate(history.view(), start):
+        buckets.setdefault(index // size, []).append(value)
+    return [max(values) for values in buckets.values()]
+
+
+def test_incremental_buckets_match_recompute():
+    rng = random.Random(1)
+    history = RingBuffer(30)
+    buckets = SparklineBuckets(width=7, capacity=30)
+    assert buckets.size == 5
+    for _ in range(100):
+        for _ in range(rng.choice((1, 1, 1, 3))):
+            history.append(rng.randint(0, 100))
+        snapshot = history.snapshot()
+        assert buckets.update(snapshot)
+        assert not buckets.update(snapshot)
+
+        expected = expected_buckets(history, 5)[-7:]
+        assert [summary for _, summary in buckets.buckets] == expected
+        assert buckets.minimum == min(history.view())
+        assert buckets.maximum == max(history.view())
+
+
+def test_jump_rebuilds():
+    history = RingBuffer(10)
+    buckets = SparklineBuckets(width=10, capacity=10)
+    history.append(5)
+    buckets.update(history.snapshot())
+    for value in range(50):
+        history.append(value)
+    buckets.update(history.snapshot())
+    assert [summary for _, summary in buckets.buckets] == list(range(40, 50))
+    assert (buckets.minimum, buckets.maximum) == (40, 49)
+
+
+def test_segments():
+    history = RingBuffer(4)
+    for value in (0, 0, 10, 10):
+        history.append(value)
+    buckets = SparklineBuckets(width=8, capacity=4)
+    buckets.update(history.snapshot())
+    low, high = Color.from_rgb(128, 0, 0), Color.from_rgb(255, 0, 0)
+    segments = buckets.segments(BARS, low, high)
+    assert [segment.text for segment in segments] == ["▇▇▇▇", "    "]
+    assert buckets.segments(BARS, low, high) is segments
+    history.append(5)
+    buckets.update(history.snapshot())
+    assert "".join(s.text for s in buckets.segments(BARS, low, high)) == "▇▇    ▄▄"
@@ -0,0 +1,97 @@
+import asyncio
+import sys
+import threading
+
+import pytest
+
+from mactop.layout_loader import XmlLayoutLoader
+from mactop.app import MactopApp
+from mactop.theme_watcher import InotifyBackend, PollingBackend, ThemeWatcher
+
+THEME = """<Mactop><layout>
+  <LoadAvgText id="load"/>
+  <Horizontal id="row">
+    <UptimeText id="uptime"/>
+    <LoadAvgText id="load2"/>
+  </Horizontal>
+</layout><style>#load { height: 2; }</style></Mactop>"""
+
+NEW_THEME = """<Mactop><layout>
+  <Horizontal id="row">
+    <LoadAvgText id="load3"/>
+    <UptimeText id="uptime"/>
+  </Horizontal>
+  <LoadAvgText id="load"/>
+</layout><style>#load { height: 3; }</style></Mactop>"""
+
+
+def test_reload_theme_in_place(tmp_path):
+    theme = tmp_path / "theme.xml"
+    theme.write_text(THEME)
+    loader = XmlLayoutLoader(theme, 3600)
+    items, css = loader.load()
+    MactopApp.CSS = css
+    app = MactopApp(items, threading.Event(), 3600)
+
+    async def run():
+        async with app.run_test(size=(80, 24)) as pilot:
+            await pilot.pause()
+            load = app.query_one("#load")
+            row = app.query_one("#row")
+            uptime = app.query_one("#uptime")
+            assert load.styles.height.value == 2
+
+            nodes, css = loader.compile(NEW_THEME.encode())
+            await app.reload_theme(loader, nodes, css)
+            await pilot.pause()
+
+            assert app.query_one("#load") is load
+            assert app.query_one("#row") is row
+            assert app.query_one("#uptime") is uptime
+            assert not app.query("#load2")
+            body = [w for w in app.screen.children if hasattr(w, "layout_node")]
+            assert body == [row, load]
+            assert [w.id for w in row.children] == ["load3", "uptime"]
+            assert load.styles.height.value == 3
+
+            # invalid CSS is not applied, the layout still is
+            nodes, _ = loader.compile(THEME.encode())
+            await app.reload_theme(loader, nodes, "#load { height: wrong; }")
+            await pilot.pause()
+            assert load.styles.height.value == 3
+            assert app.query_one("#load2")
+
+    asyncio.run(run())
+
+
+def wait_for_change(backend, theme, content):
+    changes = []
+    watcher = ThemeWatcher(theme, changes.append, backend=backend)
+    watcher.start()
+    try:
+        # the same content is not a change
+        theme.write_bytes(theme.read_bytes())
+        replaced = theme.with_suffix(".tmp")
+        replaced.write_bytes(content)
+        replaced.rename(theme)
+        for _ in range(100):
+            if changes:
+                break
+            watcher.stopped.wait(0.05)
+    finally:
+        watcher.stop()
+    return changes
+
+
+def test_polling_watcher(tmp_path):
+    theme = tmp_path / "theme.xml"
+    theme.write_text(THEME)
+    backend = PollingBackend(theme, interval=0.05)
+    assert wait_for_change(backend, theme, b"new") == [b"new"]
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify")
+def test_inotify_watcher(tmp_path):
+    theme = tmp_path / "theme.xml"
+    theme.write_text(THEME)
+    assert wait_for_change(InotifyBackend(theme), theme, b"new") == [b"new"]